@@ -3,15 +3,32 @@ import irc.strings
 from irc.connection import Factory
 import ssl
 
+from irc_watcher.records import ChatLogWriter, make_record
+
 class LoggerBot(irc.bot.SingleServerIRCBot):
-    def __init__(self, channel, nickname, server, port=6667):
+    def __init__(self, channel, nickname, server, port=6667, log_filepath="chat.log"):
         ssl_factory = Factory(wrapper=ssl.wrap_socket)
         irc.bot.SingleServerIRCBot.__init__(self, [(server, port, ssl_factory)], nickname, nickname)
         self.channel = channel
+        self.log = ChatLogWriter(log_filepath)
 
     def on_join(self, connection, event):
         if event.source.nick == self.connection.get_nickname():
             print(f"Successfully joined channel {self.channel}")
+        self.log.write(make_record('join', event.source.nick))
+
+    def on_part(self, connection, event):
+        self.log.write(make_record('part', event.source.nick))
+
+    def on_quit(self, connection, event):
+        self.log.write(make_record('quit', event.source.nick))
+
+    def on_kick(self, connection, event):
+        # The kicked nick is the first argument, the source is the operator
+        self.log.write(make_record('kick', event.arguments[0]))
+
+    def on_nick(self, connection, event):
+        self.log.write(make_record('nick', event.source.nick, new_nick=event.target))
 
     def on_disconnect(self, connection, event):
         print("Disconnected from the server.")
@@ -24,12 +41,17 @@ class LoggerBot(irc.bot.SingleServerIRCBot):
     def on_pubmsg(self, connection, event):
         message = f"{event.source.nick}: {event.arguments[0]}"
         print(message)
-        with open("chat.log", "a") as log_file:
-            log_file.write(message + "\n")
+        self.log.write(make_record('pubmsg', event.source.nick, event.arguments[0]))
+
+    def on_privmsg(self, connection, event):
+        # Makers answer !orderbook requests with private messages
+        self.log.write(make_record('privmsg', event.source.nick, event.arguments[0]))
 
 if __name__ == "__main__":
     bot = LoggerBot("#joinmarket-pit", "DHE", "irc.cyberguerrilla.org")
     try:
         bot.start()
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
+    finally:
+        bot.log.close()
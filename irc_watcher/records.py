@@ -0,0 +1,75 @@
+import json
+import time
+from typing import Any, Dict, Optional
+
+# Record types written by the watcher, see LoggerBot
+RECORD_TYPES = ('pubmsg', 'privmsg', 'join', 'part', 'quit', 'kick', 'nick')
+
+
+def make_record(record_type: str, nick: str, message: Optional[str] = None,
+                timestamp: Optional[float] = None, **fields: Any) -> Dict[str, Any]:
+    """
+    Builds a chat log record.
+
+    Parameters:
+        record_type (str): One of RECORD_TYPES.
+        nick (str): Nick the event is about, the sender of a message.
+        message (Optional[str]): Message text of pubmsg/privmsg records.
+        timestamp (Optional[float]): Seconds since the epoch, the current time when None.
+        **fields: Extra fields, e.g. 'new_nick' of nick changes.
+
+    Returns:
+        Dict[str, Any]: The record.
+    """
+    record = {'ts': round(time.time() if timestamp is None else timestamp, 3), 'type': record_type, 'nick': nick}
+    if message is not None:
+        record['msg'] = message
+    record.update(fields)
+    return record
+
+
+def format_record(record: Dict[str, Any]) -> str:
+    """Serializes a record as one JSON line, without the newline."""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_record(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses one chat log line.
+
+    Lines of the old plain 'nick: message' format become pubmsg records without a
+    timestamp ('ts' is None), so old logs can still be replayed.
+
+    Parameters:
+        line (str): A line of the chat log.
+
+    Returns:
+        Optional[Dict[str, Any]]: The record, None for blank or unparseable lines.
+    """
+    line = line.rstrip('\r\n')
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
+    nick, separator, message = line.partition(': ')
+    if not separator:
+        return None
+    return {'ts': None, 'type': 'pubmsg', 'nick': nick, 'msg': message}
+
+
+class ChatLogWriter:
+    """Appends records to a JSON-lines chat log, flushing after every record."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = open(filepath, 'a', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(format_record(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
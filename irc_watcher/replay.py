@@ -0,0 +1,275 @@
+import argparse
+import bisect
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from irc_watcher.records import parse_record
+from src.preprocessing.snapshot import process_snapshot_data
+from src.preprocessing.validation import KNOWN_ORDERTYPES
+
+# Joinmarket ends every IRC line with ' ;' when the message continues on the next line
+# and with ' ~' on its last line
+CONTINUED, COMPLETE = ' ;', ' ~'
+
+# Sidecar index entries: record time (seconds since the epoch) and byte offset of the record
+_INDEX_ENTRY = struct.Struct('<dq')
+DEFAULT_INDEX_STEP = 60.0
+
+
+def parse_commands(message: str) -> List[List[str]]:
+    """Splits a complete Joinmarket message into '!command arg ...' token lists."""
+    return [part.split() for part in message.split('!')[1:] if part.strip()]
+
+
+class OrderbookState:
+    """
+    Orderbook rebuilt from the chat feed, offers keyed by (counterparty, oid).
+
+    Offers come from '!<ordertype> oid minsize maxsize txfee cjfee' commands, '!cancel oid'
+    removes one and leaving the channel removes all offers of a nick. Fidelity bond proofs
+    are not decoded, so fidelity_bond_value is always 0.
+    """
+
+    def __init__(self):
+        self.offers: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._partial: Dict[Tuple[str, str], str] = {}
+
+    def _message(self, kind: str, nick: str, message: str):
+        key = (kind, nick)
+        if message.endswith(CONTINUED):
+            self._partial[key] = self._partial.get(key, '') + message[:-len(CONTINUED)]
+            return
+        if message.endswith(COMPLETE):
+            message = message[:-len(COMPLETE)]
+        message = self._partial.pop(key, '') + message
+
+        for command in parse_commands(message):
+            name = command[0]
+            if name in KNOWN_ORDERTYPES and len(command) >= 6:
+                try:
+                    oid, minsize, maxsize, txfee = (int(value) for value in command[1:5])
+                except ValueError:
+                    continue
+                self.offers[(nick, oid)] = {
+                    'counterparty': nick, 'oid': oid, 'ordertype': name, 'minsize': minsize,
+                    'maxsize': maxsize, 'txfee': txfee, 'cjfee': command[5], 'fidelity_bond_value': 0,
+                }
+            elif name == 'cancel' and len(command) >= 2:
+                try:
+                    self.offers.pop((nick, int(command[1])), None)
+                except ValueError:
+                    continue
+
+    def _remove_nick(self, nick: str):
+        for key in [key for key in self.offers if key[0] == nick]:
+            del self.offers[key]
+        for key in [key for key in self._partial if key[1] == nick]:
+            del self._partial[key]
+
+    def apply(self, record: Dict[str, Any]):
+        """Updates the orderbook with one chat log record."""
+        record_type = record.get('type')
+        nick = record.get('nick')
+        if record_type in ('pubmsg', 'privmsg'):
+            self._message(record_type, nick, record.get('msg', ''))
+        elif record_type in ('part', 'quit', 'kick'):
+            self._remove_nick(nick)
+        elif record_type == 'nick':
+            new_nick = record.get('new_nick')
+            for (counterparty, oid) in [key for key in self.offers if key[0] == nick]:
+                offer = self.offers.pop((counterparty, oid))
+                self.offers[(new_nick, oid)] = {**offer, 'counterparty': new_nick}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The current orderbook in the layout of the orderbook snapshot files."""
+        return {'offers': list(self.offers.values()), 'fidelitybonds': []}
+
+
+class ChatLogIndex:
+    """
+    Sidecar index '<chat log>.idx' mapping record times to byte offsets in the log.
+
+    An entry is stored for the first record of every `step` seconds, so seeking to a time
+    reads at most `step` seconds of records before the target. The index is extended
+    incrementally from its last entry as the log grows.
+    """
+
+    def __init__(self, log_filepath: str, step: float = DEFAULT_INDEX_STEP):
+        self.log_filepath = log_filepath
+        self.filepath = f"{log_filepath}.idx"
+        self.step = step
+        self.times: List[float] = []
+        self.offsets: List[int] = []
+        if os.path.exists(self.filepath):
+            with open(self.filepath, 'rb') as file:
+                data = file.read()
+            # A torn last entry of an interrupted update is ignored
+            usable = len(data) - len(data) % _INDEX_ENTRY.size
+            for time, offset in _INDEX_ENTRY.iter_unpack(data[:usable]):
+                self.times.append(time)
+                self.offsets.append(offset)
+
+    def update(self) -> int:
+        """
+        Indexes the records appended since the last update.
+
+        Returns:
+            int: Number of new index entries.
+        """
+        start = self.offsets[-1] if self.offsets else 0
+        next_time = (self.times[-1] // self.step + 1) * self.step if self.times else None
+        entries = []
+        with open(self.log_filepath, 'rb') as log:
+            log.seek(start)
+            offset = start
+            for line in log:
+                if not line.endswith(b'\n'):
+                    break  # Record still being written
+                record = parse_record(line.decode('utf-8', errors='replace'))
+                timestamp = record.get('ts') if record else None
+                if timestamp is not None and (next_time is None or timestamp >= next_time):
+                    entries.append((timestamp, offset))
+                    next_time = (timestamp // self.step + 1) * self.step
+                offset += len(line)
+
+        with open(self.filepath, 'ab') as file:
+            for timestamp, offset in entries:
+                file.write(_INDEX_ENTRY.pack(timestamp, offset))
+        for timestamp, offset in entries:
+            self.times.append(timestamp)
+            self.offsets.append(offset)
+        return len(entries)
+
+    def offset_at(self, timestamp: float) -> int:
+        """Byte offset of a record at or before the given time, 0 when before the first entry."""
+        position = bisect.bisect_right(self.times, timestamp) - 1
+        return self.offsets[position] if position >= 0 else 0
+
+
+def _to_epoch(value) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    # Naive UTC, like the timestamps parsed from the snapshot filepaths
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def iter_records(log_filepath: str, start=None, end=None, index: Optional[ChatLogIndex] = None
+                 ) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the records of a chat log, jumping to the start time through the index.
+
+    Parameters:
+        log_filepath (str): JSON-lines chat log written by LoggerBot.
+        start: Earliest record time (datetime, ISO string, epoch seconds or None), read from the beginning if None.
+        end: Exclusive end time, read to the end if None.
+        index (Optional[ChatLogIndex]): Index used to skip to the start time.
+
+    Yields:
+        Dict[str, Any]: Records in log order.
+    """
+    start, end = _to_epoch(start), _to_epoch(end)
+    offset = index.offset_at(start) if index is not None and start is not None else 0
+    with open(log_filepath, 'rb') as log:
+        log.seek(offset)
+        for line in log:
+            record = parse_record(line.decode('utf-8', errors='replace'))
+            if record is None:
+                continue
+            timestamp = record.get('ts')
+            if timestamp is not None:
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    break
+            yield record
+
+
+def replay_snapshots(log_filepath: str, interval: float = 60.0, start=None, end=None, warmup: float = 0.0,
+                     index: Optional[ChatLogIndex] = None) -> Iterator[Tuple[datetime, Dict[str, Any]]]:
+    """
+    Rebuilds orderbook snapshots from a chat log.
+
+    The orderbook is emitted at every multiple of `interval` seconds, holding the offers
+    announced before that time. Since only offers seen in the replayed records are known,
+    jumping into the middle of a log should replay a warm-up period first, long enough to
+    include a full '!orderbook' round.
+
+    Parameters:
+        log_filepath (str): JSON-lines chat log written by LoggerBot.
+        interval (float): Seconds between emitted snapshots.
+        start: First snapshot time, the beginning of the log if None.
+        end: Exclusive end time, the end of the log if None.
+        warmup (float): Seconds of records replayed before start without emitting snapshots.
+        index (Optional[ChatLogIndex]): Index used to skip to the start of the warm-up.
+
+    Yields:
+        Tuple[datetime, Dict[str, Any]]: Snapshot time and the snapshot in the layout of the
+            orderbook snapshot files.
+    """
+    state = OrderbookState()
+    first = _to_epoch(start)
+    replay_from = None if first is None else first - warmup
+    next_emit = None if first is None else -(-first // interval) * interval
+
+    for record in iter_records(log_filepath, replay_from, end, index):
+        timestamp = record.get('ts')
+        if timestamp is not None:
+            if next_emit is None:
+                next_emit = (timestamp // interval + 1) * interval
+            while timestamp >= next_emit:
+                yield _to_datetime(next_emit), state.snapshot()
+                next_emit += interval
+        state.apply(record)
+
+
+def replay_to_records(log_filepath: str, interval: float = 60.0, start=None, end=None, warmup: float = 0.0,
+                      index: Optional[ChatLogIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Replays a chat log through process_snapshot_data, the path of the snapshot files.
+
+    Returns:
+        List[Dict[str, Any]]: One snapshot analysis record per emitted snapshot, ready for
+            pd.DataFrame(records).set_index('timestamp').
+    """
+    return [
+        process_snapshot_data(snapshot, timestamp)
+        for timestamp, snapshot in replay_snapshots(log_filepath, interval, start, end, warmup, index)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Rebuild orderbook statistics from an IRC watcher chat log.')
+    parser.add_argument('log', help="Chat log written by the watcher")
+    parser.add_argument('-o', '--output', default='replay.pkl', help="Pickle file to write")
+    parser.add_argument('--interval', type=float, default=60.0, help="Seconds between snapshots")
+    parser.add_argument('--start', help="First snapshot time, ISO format, UTC")
+    parser.add_argument('--end', help="End time, ISO format, UTC")
+    parser.add_argument('--warmup', type=float, default=3600.0,
+                        help="Seconds replayed before --start to rebuild the orderbook")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    index = ChatLogIndex(args.log)
+    print(f"Indexed {index.update()} new positions of {args.log}")
+    records = replay_to_records(args.log, args.interval, args.start, args.end, args.warmup, index)
+    df_stats = pd.DataFrame(records)
+    if not df_stats.empty:
+        df_stats.set_index('timestamp', inplace=True)
+    df_stats.to_pickle(args.output)
+    print(f"Wrote {len(df_stats)} snapshots to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,282 @@
+from typing import List, Optional, Iterable
+import heapq
+import math
+import warnings
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class ChangeEvent:
+    """A detected level shift in a metric."""
+    metric: str
+    timestamp: pd.Timestamp     # Estimated onset of the change
+    detected_at: pd.Timestamp   # Time at which the change was detected
+    before: float               # Level before the change
+    after: float                # Level after the change
+
+    @property
+    def magnitude(self) -> float:
+        return self.after - self.before
+
+    @property
+    def direction(self) -> str:
+        return 'increase' if self.after >= self.before else 'decrease'
+
+
+def events_to_dataframe(events: Iterable[ChangeEvent]) -> pd.DataFrame:
+    """Convert change events to a DataFrame with magnitude and direction columns."""
+    rows = [
+        {**asdict(event), 'magnitude': event.magnitude, 'direction': event.direction}
+        for event in events
+    ]
+    columns = ['metric', 'timestamp', 'detected_at', 'before', 'after', 'magnitude', 'direction']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _noise_scale(values: np.ndarray) -> float:
+    """Robust noise level from the median absolute successive difference."""
+    diffs = np.abs(np.diff(values))
+    scale = np.median(diffs) / (math.sqrt(2) * 0.6745) if len(diffs) else 0.0
+    if scale == 0:
+        scale = values.std() or 1.0
+    return scale
+
+
+def detect_change_points(series: pd.Series, penalty: Optional[float] = None, min_size: int = 60,
+                         max_changes: int = 1000) -> List[ChangeEvent]:
+    """
+    Detect shifts in the mean of a series by binary segmentation.
+
+    Each candidate segment is split where the squared error drops most; the costs of all
+    split points are computed at once from prefix sums, so a segment costs O(n) in NumPy.
+    A split is kept when it reduces the cost by more than the penalty.
+
+    Args:
+        series: Metric indexed by timestamp, NaNs are dropped
+        penalty: Minimum cost reduction in units of the noise variance, defaults to 3 log(n)
+        min_size: Minimum number of samples between change points
+        max_changes: Upper bound on the number of change points, the most significant
+            are kept and a RuntimeWarning is issued when more are found
+
+    Returns:
+        Change events sorted by time
+    """
+    series = series.dropna()
+    values = series.to_numpy(dtype=float)
+    n = len(values)
+    if n < 2 * min_size:
+        return []
+
+    # Standardize first, prefix sums of raw satoshi values would lose all precision
+    scale = _noise_scale(values)
+    z = (values - np.median(values)) / scale
+    s1 = np.concatenate([[0.0], np.cumsum(z)])
+    if penalty is None:
+        penalty = 3 * math.log(n)
+
+    def best_split(start: int, end: int):
+        if end - start < 2 * min_size:
+            return None
+        splits = np.arange(start + min_size, end - min_size + 1)
+        left = splits - start
+        right = end - splits
+        left_sum = s1[splits] - s1[start]
+        right_sum = s1[end] - s1[splits]
+        gains = left_sum ** 2 / left + right_sum ** 2 / right - (s1[end] - s1[start]) ** 2 / (end - start)
+        best = int(np.argmax(gains))
+        if gains[best] <= penalty:
+            return None
+        return -gains[best], int(splits[best]), start, end
+
+    # Segments are split in order of decreasing gain, so the cap keeps the most significant changes
+    change_points = []
+    segments = [candidate for candidate in [best_split(0, n)] if candidate is not None]
+    while segments:
+        if len(change_points) >= max_changes:
+            warnings.warn(f"{series.name}: stopped after max_changes={max_changes} change points, "
+                          f"raise the penalty or max_changes", RuntimeWarning, stacklevel=2)
+            break
+        _, split, start, end = heapq.heappop(segments)
+        change_points.append(split)
+        for candidate in (best_split(start, split), best_split(split, end)):
+            if candidate is not None:
+                heapq.heappush(segments, candidate)
+
+    change_points.sort()
+    bounds = [0] + change_points + [n]
+    events = []
+    for i, split in enumerate(change_points):
+        before = values[bounds[i]:split].mean()
+        after = values[split:bounds[i + 2]].mean()
+        events.append(ChangeEvent(series.name, series.index[split], series.index[split], before, after))
+    return events
+
+
+def _lindley(increments: np.ndarray, start: float) -> np.ndarray:
+    """Vectorized S_t = max(0, S_{t-1} + d_t), using S_t = C_t - min(0, min_{j<=t} C_j)."""
+    cumulative = start + np.cumsum(increments)
+    return cumulative - np.minimum(np.minimum.accumulate(cumulative), 0.0)
+
+
+class CusumDetector:
+    """
+    Streaming two-sided CUSUM detector for level shifts.
+
+    The baseline level and noise are estimated from the first `warmup` samples and again
+    after every detected change; that new baseline is the reported level after the change,
+    so an event is returned `warmup` samples after its detection. Samples are processed in
+    vectorized blocks and the state carries over between update() calls, so new data is
+    processed incrementally.
+    """
+    block_size = 4096
+
+    def __init__(self, metric: str, threshold: float = 8.0, drift: float = 1.0, warmup: int = 60):
+        """
+        Args:
+            metric: Name reported in the events
+            threshold: Alarm level of the cumulative sums, in noise standard deviations
+            drift: Allowed slack per sample, in noise standard deviations
+            warmup: Number of samples used to estimate the baseline
+        """
+        self.metric = metric
+        self.threshold = threshold
+        self.drift = drift
+        self.warmup = warmup
+        self._pending = None
+        self._reset()
+
+    def _reset(self):
+        self._baseline = []
+        self._mu = None
+        self._sigma = None
+        # Per side: cumulative sum and start time of the current run above zero
+        self._sums = [0.0, 0.0]
+        self._run_starts = [None, None]
+
+    def _start_baseline(self) -> Optional[ChangeEvent]:
+        baseline = np.asarray(self._baseline)
+        self._mu = baseline.mean()
+        self._sigma = max(baseline.std(ddof=1), _noise_scale(baseline), 1e-12 * max(abs(self._mu), 1.0))
+        self._baseline = []
+        return self._complete_pending(self._mu)
+
+    def _complete_pending(self, after: float) -> Optional[ChangeEvent]:
+        if self._pending is None:
+            return None
+        start, detected_at, before = self._pending
+        self._pending = None
+        return ChangeEvent(self.metric, start, detected_at, before, after)
+
+    def update(self, series: pd.Series) -> List[ChangeEvent]:
+        """
+        Process new samples.
+
+        Args:
+            series: New samples indexed by timestamp, following the previous update
+
+        Returns:
+            Change events completed by the new samples
+        """
+        series = series.dropna()
+        values = series.to_numpy(dtype=float)
+        times = series.index
+        events = []
+
+        i = 0
+        while i < len(values):
+            if self._mu is None:
+                take = min(self.warmup - len(self._baseline), len(values) - i)
+                self._baseline.extend(values[i:i + take])
+                i += take
+                if len(self._baseline) == self.warmup:
+                    event = self._start_baseline()
+                    if event is not None:
+                        events.append(event)
+                continue
+
+            end = min(i + self.block_size, len(values))
+            z = (values[i:end] - self._mu) / self._sigma
+            block_times = times[i:end]
+            paths = [_lindley(z - self.drift, self._sums[0]), _lindley(-z - self.drift, self._sums[1])]
+            alarms = [np.flatnonzero(path > self.threshold) for path in paths]
+            first = [alarm[0] if len(alarm) else len(z) for alarm in alarms]
+            side = int(first[1] < first[0])
+            position = first[side]
+
+            if position == len(z):
+                # No alarm in this block, carry the state over
+                for s, path in enumerate(paths):
+                    self._sums[s] = path[-1]
+                    self._run_starts[s] = self._run_start(s, path, block_times, len(z) - 1)
+                i = end
+                continue
+
+            # The change started after the cumulative sum last left zero
+            start = self._run_start(side, paths[side], block_times, position)
+            self._pending = (start, block_times[position], self._mu)
+            self._reset()
+            i += position + 1
+
+        return events
+
+    def flush(self) -> List[ChangeEvent]:
+        """Complete a pending event with the samples seen after it, at the end of a stream."""
+        if self._pending is None or not self._baseline:
+            return []
+        return [self._complete_pending(float(np.mean(self._baseline)))]
+
+    def _run_start(self, side: int, path: np.ndarray, times: pd.Index, upto: int) -> Optional[pd.Timestamp]:
+        zeros = np.flatnonzero(path[:upto + 1] == 0)
+        if len(zeros):
+            return times[zeros[-1] + 1] if zeros[-1] < upto else None
+        return self._run_starts[side] if self._run_starts[side] is not None else times[0]
+
+
+def detect_cusum(series: pd.Series, threshold: float = 8.0, drift: float = 1.0,
+                 warmup: int = 60) -> List[ChangeEvent]:
+    """Run a CusumDetector over a whole series."""
+    detector = CusumDetector(series.name, threshold, drift, warmup)
+    return detector.update(series) + detector.flush()
+
+
+class RollingZScoreDetector:
+    """Streaming rolling z-score anomaly flags, each sample is scored against the preceding window."""
+
+    def __init__(self, window: int = 1440, threshold: float = 4.0, min_periods: Optional[int] = None):
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods if min_periods is not None else window // 2
+        self._tail = None
+
+    def update(self, series: pd.Series) -> pd.DataFrame:
+        """Score new samples, returning value, zscore and is_anomaly columns for the new rows only."""
+        combined = series if self._tail is None else pd.concat([self._tail, series])
+        history = combined.rolling(window=self.window, min_periods=self.min_periods)
+        mean = history.mean().shift(1)
+        std = history.std().shift(1)
+        zscore = (combined - mean) / std.where(std > 0)
+        self._tail = combined.iloc[-self.window:]
+
+        new = slice(len(combined) - len(series), None)
+        return pd.DataFrame({
+            'value': combined.iloc[new],
+            'zscore': zscore.iloc[new],
+            'is_anomaly': zscore.iloc[new].abs() > self.threshold,
+        })
+
+
+def rolling_zscore_anomalies(series: pd.Series, window: int = 1440, threshold: float = 4.0) -> pd.DataFrame:
+    """Flag samples deviating more than `threshold` standard deviations from the preceding window."""
+    return RollingZScoreDetector(window, threshold).update(series)
+
+
+def detect_liquidity_events(df: pd.DataFrame,
+                            metrics: Iterable[str] = ('total_liquidity', 'total_unique_makers'),
+                            penalty: Optional[float] = None, min_size: int = 60) -> pd.DataFrame:
+    """Detect level shifts of liquidity and maker counts, e.g. large makers entering or leaving."""
+    events = []
+    for metric in metrics:
+        events.extend(detect_change_points(df[metric], penalty=penalty, min_size=min_size))
+    return events_to_dataframe(events).sort_values('timestamp', ignore_index=True)
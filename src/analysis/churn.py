@@ -0,0 +1,245 @@
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from statistics import NormalDist
+
+
+@dataclass
+class MakerPresence:
+    """Which makers were seen in which period, as a periods x makers boolean matrix."""
+    periods: pd.DatetimeIndex
+    makers: np.ndarray   # Counterparty nicknames, one per matrix column
+    matrix: np.ndarray   # matrix[period, maker] is True if the maker offered in that period
+
+    @property
+    def first_seen(self) -> np.ndarray:
+        """Period position of each maker's first appearance."""
+        if len(self.matrix) == 0:
+            return np.zeros(self.matrix.shape[1], dtype=np.int64)
+        return self.matrix.argmax(axis=0)
+
+    @property
+    def last_seen(self) -> np.ndarray:
+        """Period position of each maker's last appearance."""
+        if len(self.matrix) == 0:
+            return np.zeros(self.matrix.shape[1], dtype=np.int64)
+        return len(self.periods) - 1 - self.matrix[::-1].argmax(axis=0)
+
+
+def _presence_from_codes(period_starts: np.ndarray, maker_codes: np.ndarray, makers: np.ndarray,
+                         freq: str) -> MakerPresence:
+    """Build the presence matrix from one (period start, maker code) pair per observation."""
+    if len(period_starts) == 0:
+        return MakerPresence(pd.DatetimeIndex([], name='period'), np.asarray([], dtype=object),
+                             np.zeros((0, 0), dtype=bool))
+    periods = pd.date_range(period_starts.min(), period_starts.max(), freq=freq, name='period')
+    rows = periods.get_indexer(period_starts)
+    # Only makers that were actually seen get a column
+    used, columns = np.unique(maker_codes, return_inverse=True)
+    matrix = np.zeros((len(periods), len(used)), dtype=bool)
+    matrix[rows, columns] = True
+    return MakerPresence(periods, np.asarray(makers, dtype=object)[used], matrix)
+
+
+def maker_presence_from_snapshots(snapshots: Iterable[Tuple[datetime, Iterable[str]]],
+                                  freq: str = 'D') -> MakerPresence:
+    """
+    Collect maker presence per period from per-snapshot maker sets in a single pass.
+
+    Every period keeps the set of nicknames seen in it, so memory grows with the number
+    of distinct (period, maker) pairs, not snapshots. Those pairs are then mapped to
+    integer ids for the presence matrix.
+
+    Args:
+        snapshots: (timestamp, counterparties) pairs, in any order
+        freq: Period length, daily by default
+
+    Returns:
+        MakerPresence over all periods between the first and last snapshot
+    """
+    pairs: Dict[pd.Timestamp, set] = {}
+    period, period_end, seen = None, None, None
+    for timestamp, makers in snapshots:
+        timestamp = pd.Timestamp(timestamp)
+        if period is None or not period <= timestamp < period_end:
+            period = timestamp.floor(freq)
+            period_end = period + pd.tseries.frequencies.to_offset(freq)
+            seen = pairs.setdefault(period, set())
+        seen.update(makers)
+
+    # Nicknames get integer ids only once per distinct (period, maker) pair
+    ids: Dict[str, int] = {}
+    period_starts = [period.asm8 for period, seen in pairs.items() for _ in seen]
+    maker_codes = [ids.setdefault(maker, len(ids)) for seen in pairs.values() for maker in seen]
+    return _presence_from_codes(np.array(period_starts, dtype='M8[ns]'), np.array(maker_codes, dtype=np.int64),
+                                np.array(list(ids), dtype=object), freq)
+
+
+def maker_presence_from_cache(cache, freq: str = 'D') -> MakerPresence:
+    """
+    Collect maker presence per period from a SnapshotCache without decoding any JSON.
+
+    Args:
+        cache: src.preprocessing.cache.SnapshotCache of the snapshot archive
+        freq: Period length, daily by default
+
+    Returns:
+        MakerPresence over all periods between the first and last snapshot
+    """
+    offers = cache.offers
+    period_starts = pd.DatetimeIndex(cache.timestamps).floor(freq).to_numpy()[offers['snapshot']]
+    # Deduplicate (period, maker) pairs before building the matrix
+    pairs = np.unique(np.stack([period_starts.view(np.int64), offers['counterparty'].astype(np.int64)]), axis=1)
+    return _presence_from_codes(pairs[0].view('M8[ns]'), pairs[1], np.asarray(cache.counterparties, dtype=object),
+                                freq)
+
+
+def calculate_daily_churn(presence: MakerPresence) -> pd.DataFrame:
+    """
+    Calculate maker arrivals and departures per period.
+
+    'arrivals' and 'departures' compare consecutive periods, so a maker that pauses for a
+    day counts as departed and arrived again. 'new_makers' and 'lost_makers' count the
+    first and last appearance of each maker; 'lost_makers' of the last period is NaN since
+    those makers may still be active.
+
+    Args:
+        presence: MakerPresence from one of the maker_presence_* builders
+
+    Returns:
+        DataFrame indexed by period with active, arrivals, departures, new_makers and lost_makers
+    """
+    matrix = presence.matrix
+    previous = np.zeros_like(matrix)
+    previous[1:] = matrix[:-1]
+    n_periods = len(presence.periods)
+    lost = np.bincount(presence.last_seen, minlength=n_periods).astype(float)
+    if n_periods:
+        lost[-1] = np.nan
+    return pd.DataFrame({
+        'active': matrix.sum(axis=1),
+        'arrivals': (matrix & ~previous).sum(axis=1),
+        'departures': (previous & ~matrix).sum(axis=1),
+        'new_makers': np.bincount(presence.first_seen, minlength=n_periods),
+        'lost_makers': lost,
+    }, index=presence.periods)
+
+
+def calculate_cohort_retention(presence: MakerPresence, max_age: Optional[int] = None) -> pd.DataFrame:
+    """
+    Calculate the share of each first-seen cohort that is active a given number of periods later.
+
+    Args:
+        presence: MakerPresence from one of the maker_presence_* builders
+        max_age: Last age in periods to report, all observable ages when None
+
+    Returns:
+        DataFrame indexed by cohort period with one column per age, plus the cohort 'size';
+        ages beyond the end of the data are NaN
+    """
+    n_periods = len(presence.periods)
+    if max_age is None:
+        max_age = max(n_periods - 1, 0)
+    first_seen = presence.first_seen
+    rows, makers = np.nonzero(presence.matrix)
+    cohorts = first_seen[makers]
+    ages = rows - cohorts
+    keep = ages <= max_age
+    active = np.zeros((n_periods, max_age + 1))
+    np.add.at(active, (cohorts[keep], ages[keep]), 1)
+
+    size = np.bincount(first_seen, minlength=n_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retention = active / size[:, None]
+    observable = np.arange(n_periods)[:, None] + np.arange(max_age + 1)[None, :] < n_periods
+    retention[~observable] = np.nan
+
+    result = pd.DataFrame(retention, index=presence.periods.rename('cohort'),
+                          columns=pd.RangeIndex(max_age + 1, name='age'))
+    result.insert(0, 'size', size)
+    return result[size > 0]
+
+
+def calculate_maker_lifetimes(presence: MakerPresence) -> pd.DataFrame:
+    """
+    Calculate each maker's lifetime from first to last appearance, in periods.
+
+    Makers still seen in the last period are right-censored, their lifetime is only a
+    lower bound. Gaps between appearances are counted as part of the lifetime.
+
+    Args:
+        presence: MakerPresence from one of the maker_presence_* builders
+
+    Returns:
+        DataFrame indexed by maker with first_seen, last_seen, lifetime, active_periods and observed
+    """
+    first_seen = presence.first_seen
+    last_seen = presence.last_seen
+    return pd.DataFrame({
+        'first_seen': presence.periods[first_seen],
+        'last_seen': presence.periods[last_seen],
+        'lifetime': last_seen - first_seen + 1,
+        'active_periods': presence.matrix.sum(axis=0),
+        'observed': last_seen < len(presence.periods) - 1,
+    }, index=pd.Index(presence.makers, name='maker'))
+
+
+def kaplan_meier(durations, observed, confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Kaplan-Meier estimate of the survival function with Greenwood confidence intervals.
+
+    Args:
+        durations: Lifetime of each subject in whole periods
+        observed: True where the end of the lifetime was observed, False if censored
+        confidence: Confidence level of the intervals
+
+    Returns:
+        DataFrame indexed by duration with at_risk, events, censored, survival, ci_low and ci_high
+    """
+    durations = np.asarray(durations, dtype=np.int64)
+    observed = np.asarray(observed, dtype=bool)
+    if len(durations) == 0:
+        return pd.DataFrame(columns=['at_risk', 'events', 'censored', 'survival', 'ci_low', 'ci_high'])
+
+    times = np.arange(durations.max() + 1)
+    events = np.bincount(durations[observed], minlength=len(times))
+    ended = np.bincount(durations, minlength=len(times))
+    # Subjects with duration >= t are at risk at t
+    at_risk = len(durations) - np.concatenate([[0], np.cumsum(ended)[:-1]])
+    present = ended > 0
+    times, events, ended, at_risk = times[present], events[present], ended[present], at_risk[present]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        survival = np.cumprod(1 - events / at_risk)
+        greenwood = np.cumsum(events / (at_risk * (at_risk - events)))
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * survival * np.sqrt(greenwood)
+    return pd.DataFrame({
+        'at_risk': at_risk,
+        'events': events,
+        'censored': ended - events,
+        'survival': survival,
+        'ci_low': np.clip(survival - margin, 0, 1),
+        'ci_high': np.clip(survival + margin, 0, 1),
+    }, index=pd.Index(times, name='duration'))
+
+
+@dataclass
+class MakerChurnAnalysis:
+    """Churn, cohort retention and lifetime survival of the makers."""
+    churn: pd.DataFrame
+    retention: pd.DataFrame
+    lifetimes: pd.DataFrame
+    survival: pd.DataFrame
+
+
+def analyze_maker_churn(presence: MakerPresence, max_age: Optional[int] = None) -> MakerChurnAnalysis:
+    """Run all churn analyses on a MakerPresence."""
+    lifetimes = calculate_maker_lifetimes(presence)
+    return MakerChurnAnalysis(
+        churn=calculate_daily_churn(presence),
+        retention=calculate_cohort_retention(presence, max_age),
+        lifetimes=lifetimes,
+        survival=kaplan_meier(lifetimes['lifetime'], lifetimes['observed']),
+    )
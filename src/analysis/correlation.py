@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+
+# Metrics of the correlation matrix in the exploratory analysis
+CORRELATION_METRICS = [
+    'total_liquidity', 'total_unique_makers',
+    'relative_fees_percentage_mean', 'absolute_fees_satoshis_mean',
+    'relative_fees_count', 'absolute_fees_count'
+]
+
+
+@dataclass
+class CoMoments:
+    """
+    Mergeable pairwise co-moments of k metrics.
+
+    Like DataFrame.corr(), every pair of metrics uses the rows where both are present,
+    so all statistics are k x k matrices: entry [i, j] of `mean` and `m2` describes
+    metric i over the rows where metrics i and j are both present.
+    """
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    comoment: np.ndarray
+
+    @classmethod
+    def empty(cls, k: int) -> 'CoMoments':
+        return cls(*(np.zeros((k, k)) for _ in range(4)))
+
+    @classmethod
+    def from_values(cls, values) -> 'CoMoments':
+        """Co-moments of a (rows, k) array, NaNs are treated as missing."""
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        if not present.any():
+            return cls.empty(values.shape[1])
+        # Shifting by the column means keeps the sums of squares small and accurate
+        column_count = present.sum(axis=0)
+        shift = np.where(present, values, 0.0).sum(axis=0) / np.maximum(column_count, 1)
+        centered = np.where(present, values - shift, 0.0)
+        weights = present.astype(float)
+
+        count = weights.T @ weights
+        sums = centered.T @ weights
+        squares = (centered ** 2).T @ weights
+        products = centered.T @ centered
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, sums / count, 0.0)
+            m2 = np.where(count > 0, squares - sums * mean, 0.0)
+            comoment = np.where(count > 0, products - sums * mean.T, 0.0)
+        return cls(count, mean + shift[:, None], np.maximum(m2, 0.0), comoment)
+
+    def merge(self, other: 'CoMoments') -> 'CoMoments':
+        """Combine with the co-moments of another chunk (Chan et al. parallel update)."""
+        count = self.count + other.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(count > 0, other.count / count, 0.0)
+        weight = self.count * ratio
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + other.m2 + delta ** 2 * weight
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.count = count
+        return self
+
+    def subtract(self, other: 'CoMoments') -> 'CoMoments':
+        """Remove the co-moments of a chunk previously merged in, the inverse of merge."""
+        count = self.count - other.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, (self.mean * self.count - other.mean * other.count) / count, 0.0)
+            delta = other.mean - mean
+            weight = np.where(count > 0, count * other.count / self.count, 0.0)
+        self.m2 = np.where(count > 0, np.maximum(self.m2 - other.m2 - delta ** 2 * weight, 0.0), 0.0)
+        self.comoment = np.where(count > 0, self.comoment - other.comoment - delta * delta.T * weight, 0.0)
+        self.mean = mean
+        self.count = np.maximum(count, 0.0)
+        return self
+
+    def copy(self) -> 'CoMoments':
+        return CoMoments(self.count.copy(), self.mean.copy(), self.m2.copy(), self.comoment.copy())
+
+    def correlation(self, min_periods: int = 1) -> np.ndarray:
+        """Pearson correlation matrix, NaN for pairs with fewer than max(2, min_periods) rows or no variance."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        correlation = np.clip(correlation, -1.0, 1.0)
+        correlation[(self.count < max(2, min_periods)) | ~np.isfinite(correlation)] = np.nan
+        return correlation
+
+
+class StreamingCorrelation:
+    """
+    Correlation matrices of df_stats columns, updated in O(new rows).
+
+    Co-moments are kept per period of `freq`, so appending rows only touches the periods
+    they fall in. Full-period, per-period and rolling-window matrices are combined from
+    the period co-moments without revisiting the rows.
+    """
+
+    def __init__(self, metrics: Optional[List[str]] = None, freq: str = 'D'):
+        self.metrics = list(metrics or CORRELATION_METRICS)
+        self.freq = freq
+        self.periods: Dict[pd.Timestamp, CoMoments] = {}
+
+    def update(self, df: pd.DataFrame) -> 'StreamingCorrelation':
+        """Add a chunk of df_stats rows, chunks may overlap the same periods."""
+        if df.empty:
+            return self
+        values = df[self.metrics].to_numpy(dtype=float)
+        codes, uniques = pd.factorize(df.index.floor(self.freq), sort=True)
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        for period, rows in zip(uniques, np.split(order, boundaries)):
+            moments = CoMoments.from_values(values[rows])
+            previous = self.periods.get(period)
+            self.periods[period] = moments if previous is None else previous.merge(moments)
+        return self
+
+    def merge(self, other: 'StreamingCorrelation') -> 'StreamingCorrelation':
+        """Combine with the partial result of another chunk or process."""
+        for period, moments in other.periods.items():
+            previous = self.periods.get(period)
+            self.periods[period] = moments.copy() if previous is None else previous.merge(moments)
+        return self
+
+    def _frame(self, matrices: Dict[pd.Timestamp, np.ndarray]) -> pd.DataFrame:
+        if not matrices:
+            index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), []], names=['timestamp', 'metric'])
+            return pd.DataFrame(columns=self.metrics, index=index, dtype=float)
+        return pd.concat(
+            {period: pd.DataFrame(matrix, index=self.metrics, columns=self.metrics)
+             for period, matrix in matrices.items()},
+            names=['timestamp', 'metric']
+        )
+
+    def result(self, min_periods: int = 1) -> pd.DataFrame:
+        """Correlation matrix over all rows, equal to df[metrics].corr()."""
+        total = CoMoments.empty(len(self.metrics))
+        for moments in self.periods.values():
+            total.merge(moments)
+        return pd.DataFrame(total.correlation(min_periods), index=self.metrics, columns=self.metrics)
+
+    def per_period(self, min_periods: int = 1) -> pd.DataFrame:
+        """Correlation matrix of every period, indexed by (timestamp, metric)."""
+        return self._frame({period: self.periods[period].correlation(min_periods)
+                            for period in sorted(self.periods)})
+
+    def rolling(self, window: int, min_periods: int = 1) -> pd.DataFrame:
+        """
+        Correlation matrices over a sliding window of periods, indexed by (timestamp, metric).
+
+        Every matrix covers the `window` periods ending with its timestamp, empty periods
+        included. The window slides by merging the entering and subtracting the leaving
+        period, so the cost grows with the number of periods, not with the window.
+        """
+        if not self.periods:
+            return self._frame({})
+        periods = pd.date_range(min(self.periods), max(self.periods), freq=self.freq)
+        empty = CoMoments.empty(len(self.metrics))
+        window_moments = CoMoments.empty(len(self.metrics))
+        matrices = {}
+        for position, period in enumerate(periods):
+            window_moments.merge(self.periods.get(period, empty))
+            if position >= window:
+                window_moments.subtract(self.periods.get(periods[position - window], empty))
+            matrices[period] = window_moments.correlation(min_periods)
+        return self._frame(matrices)
+
+
+def calculate_correlations(df: pd.DataFrame, metrics: Optional[List[str]] = None,
+                           freq: str = 'D') -> StreamingCorrelation:
+    """
+    Builds the streaming correlation state of df_stats.
+
+    Args:
+        df: DataFrame with the snapshot statistics, indexed by timestamp
+        metrics: Columns to correlate, CORRELATION_METRICS by default
+        freq: Period of the per-period and rolling matrices
+
+    Returns:
+        StreamingCorrelation to query and to update with new rows
+    """
+    metrics = [metric for metric in (metrics or CORRELATION_METRICS) if metric in df.columns]
+    return StreamingCorrelation(metrics, freq).update(df)
@@ -0,0 +1,237 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime
+import json
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+
+from ..preprocessing.archive import iter_snapshot_bytes
+from ..preprocessing.snapshot import CORRUPT_SNAPSHOT_ERRORS
+from ..preprocessing.utils import parse_snapshot_datetime
+from ..preprocessing.validation import validate_snapshot
+
+OFFER_EVENT_KINDS = ('offer_added', 'offer_removed', 'fee_changed', 'size_changed', 'bond_changed')
+
+# Offer fields compared for each change kind, an offer changing several groups emits one event per group
+CHANGE_FIELDS = {
+    'fee_changed': ('ordertype', 'cjfee', 'txfee'),
+    'size_changed': ('minsize', 'maxsize'),
+    'bond_changed': ('fidelity_bond_value',),
+}
+OFFER_FIELDS = tuple(field for fields in CHANGE_FIELDS.values() for field in fields)
+
+OfferKey = Tuple[str, int]
+
+
+@dataclass
+class OfferEvent:
+    """A change of one offer, identified by (counterparty, oid), between consecutive snapshots."""
+    kind: str
+    timestamp: Optional[datetime]       # Time of the later snapshot
+    counterparty: str
+    oid: int
+    before: Optional[Dict[str, Any]]    # Changed fields before, the whole offer for offer_removed
+    after: Optional[Dict[str, Any]]     # Changed fields after, the whole offer for offer_added
+
+
+def _normalize(offer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Offer fields in comparable form, cjfee strings like '0.0002' and '0.00020' are equal.
+
+    A malformed cjfee becomes NaN, the value the SnapshotCache stores for it.
+    """
+    fields = {field: offer.get(field) for field in OFFER_FIELDS}
+    try:
+        fields['cjfee'] = float(fields['cjfee'])
+    except (ValueError, TypeError):
+        fields['cjfee'] = float('nan')
+    return fields
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Equality where two NaNs, e.g. two malformed fees, are the same value."""
+    return a == b or (a != a and b != b)
+
+
+def index_offers(offers: Iterable[Dict[str, Any]]) -> Dict[OfferKey, Dict[str, Any]]:
+    """Normalized offer fields keyed by (counterparty, oid), the last duplicate wins."""
+    return {(offer.get('counterparty'), offer.get('oid')): _normalize(offer) for offer in offers}
+
+
+def _diff_indexed(before: Dict[OfferKey, Dict[str, Any]], after: Dict[OfferKey, Dict[str, Any]],
+                  timestamp: Optional[datetime]) -> List[OfferEvent]:
+    events = []
+    for key, old in before.items():
+        new = after.get(key)
+        if new is None:
+            events.append(OfferEvent('offer_removed', timestamp, key[0], key[1], old, None))
+        elif new != old:
+            for kind, fields in CHANGE_FIELDS.items():
+                changed = [field for field in fields if not _same(old[field], new[field])]
+                if changed:
+                    events.append(OfferEvent(kind, timestamp, key[0], key[1],
+                                             {field: old[field] for field in changed},
+                                             {field: new[field] for field in changed}))
+    for key, new in after.items():
+        if key not in before:
+            events.append(OfferEvent('offer_added', timestamp, key[0], key[1], None, new))
+    return events
+
+
+def diff_snapshots(before: Dict[str, Any], after: Dict[str, Any],
+                   timestamp: Optional[datetime] = None) -> List[OfferEvent]:
+    """
+    Compare the offers of two decoded snapshots.
+
+    Offers are matched through a hash of their (counterparty, oid) key, so a pair of
+    snapshots is compared in linear time.
+
+    Args:
+        before: Earlier snapshot, as returned by load_data
+        after: Later snapshot
+        timestamp: Time stamped on the events, usually that of the later snapshot
+
+    Returns:
+        Events of the removed, changed and added offers
+    """
+    return _diff_indexed(index_offers(before.get('offers', [])), index_offers(after.get('offers', [])), timestamp)
+
+
+def iter_offer_events(filepaths: List[str]) -> Iterator[OfferEvent]:
+    """
+    Stream the offer events between consecutive snapshot files.
+
+    Only the indexed offers of the previous snapshot are kept in memory. Corrupt files are
+    skipped, so the following snapshot is compared with the last readable one.
+
+    Args:
+        filepaths: Snapshot filepaths in time order, e.g. from get_snapshot_filepaths
+
+    Yields:
+        OfferEvent of every consecutive pair, in time order
+    """
+    previous = None
+    for filepath, content in iter_snapshot_bytes(filepaths):
+        try:
+            if isinstance(content, Exception):
+                raise content
+            offers, _, _ = validate_snapshot(json.loads(content))
+        except CORRUPT_SNAPSHOT_ERRORS:
+            continue
+        current = index_offers(offers)
+        if previous is not None:
+            yield from _diff_indexed(previous, current, parse_snapshot_datetime(filepath))
+        previous = current
+
+
+def _cache_keys(offers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted (counterparty, oid) keys of cached offer records packed into one integer, and their order.
+
+    Like index_offers, only the last offer of a duplicated key is kept.
+    """
+    keys = (offers['counterparty'].astype(np.int64) << 32) | (offers['oid'].astype(np.int64) & 0xFFFFFFFF)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    # The stable sort keeps duplicates in snapshot order, so the last of each run wins
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    return keys[last], order[last]
+
+
+def _cached_fields(cache, record) -> Dict[str, Any]:
+    fields = {field: record[field].item() for field in OFFER_FIELDS if field != 'ordertype'}
+    fields['ordertype'] = cache.ordertypes[record['ordertype']]
+    return {field: fields[field] for field in OFFER_FIELDS}
+
+
+def iter_cached_offer_events(cache, start=None, end=None) -> Iterator[OfferEvent]:
+    """
+    Stream the offer events between consecutive snapshots of a SnapshotCache.
+
+    Each snapshot's keys are sorted once, then consecutive snapshots are merged on the
+    sorted keys and compared field by field in NumPy, so only the changed offers are
+    turned into Python objects.
+
+    Args:
+        cache: src.preprocessing.cache.SnapshotCache of the snapshot archive
+        start: Inclusive start of the range, unbounded if None
+        end: Exclusive end of the range, unbounded if None
+
+    Yields:
+        OfferEvent of every consecutive pair, in time order
+    """
+    rows = range(len(cache))[cache.snapshot_range(start, end)]
+    previous = None
+    for row in rows:
+        offers = cache.snapshot_offers(row)
+        keys, order = _cache_keys(offers)
+        current = (keys, offers[order])
+        if previous is not None:
+            yield from _diff_sorted(cache, previous, current, pd.Timestamp(cache.timestamps[row]).to_pydatetime())
+        previous = current
+
+
+def _diff_sorted(cache, before: Tuple[np.ndarray, np.ndarray], after: Tuple[np.ndarray, np.ndarray],
+                 timestamp: datetime) -> List[OfferEvent]:
+    old_keys, old = before
+    new_keys, new = after
+    # Both key arrays are sorted and unique, so a binary search finds the matching positions
+    positions = np.searchsorted(new_keys, old_keys)
+    found = positions < len(new_keys)
+    found[found] = new_keys[positions[found]] == old_keys[found]
+    old_common = np.flatnonzero(found)
+    new_common = positions[found]
+
+    events = []
+    removed = np.ones(len(old), dtype=bool)
+    removed[old_common] = False
+    for record in old[removed]:
+        events.append(OfferEvent('offer_removed', timestamp, cache.counterparties[record['counterparty']],
+                                 int(record['oid']), _cached_fields(cache, record), None))
+
+    old_matched, new_matched = old[old_common], new[new_common]
+    for kind, fields in CHANGE_FIELDS.items():
+        differs = {field: old_matched[field] != new_matched[field] for field in fields}
+        for field in differs:
+            if old_matched.dtype[field].kind == 'f':
+                # NaN marks a malformed value (cjfee, fidelity_bond_value), two NaNs are no change
+                differs[field] &= ~(np.isnan(old_matched[field]) & np.isnan(new_matched[field]))
+        for position in np.flatnonzero(np.logical_or.reduce(list(differs.values()))):
+            old_fields = _cached_fields(cache, old_matched[position])
+            new_fields = _cached_fields(cache, new_matched[position])
+            changed = [field for field in fields if differs[field][position]]
+            events.append(OfferEvent(kind, timestamp, cache.counterparties[old_matched[position]['counterparty']],
+                                     int(old_matched[position]['oid']),
+                                     {field: old_fields[field] for field in changed},
+                                     {field: new_fields[field] for field in changed}))
+
+    added = np.ones(len(new), dtype=bool)
+    added[new_common] = False
+    for record in new[added]:
+        events.append(OfferEvent('offer_added', timestamp, cache.counterparties[record['counterparty']],
+                                 int(record['oid']), None, _cached_fields(cache, record)))
+    return events
+
+
+def events_to_dataframe(events: Iterable[OfferEvent]) -> pd.DataFrame:
+    """Convert offer events to a DataFrame, one row per event."""
+    rows = [
+        (event.kind, event.timestamp, event.counterparty, event.oid, event.before, event.after)
+        for event in events
+    ]
+    return pd.DataFrame(rows, columns=['kind', 'timestamp', 'counterparty', 'oid', 'before', 'after'])
+
+
+def summarize_offer_events(events: Iterable[OfferEvent]) -> pd.DataFrame:
+    """
+    Count the events of each kind per maker.
+
+    Returns:
+        DataFrame indexed by counterparty with one column per event kind and a 'total',
+        sorted by the total number of events
+    """
+    df = events_to_dataframe(events)
+    counts = pd.crosstab(df['counterparty'], df['kind']).reindex(columns=list(OFFER_EVENT_KINDS), fill_value=0)
+    counts['total'] = counts.sum(axis=1)
+    return counts.sort_values('total', ascending=False)
@@ -1,8 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 
+from .correlation import calculate_correlations
+
 
 @dataclass
 class FeeStatistics:
@@ -15,49 +17,45 @@ class FeeStatistics:
     percentiles: Dict[str, float]
 
 
+# Statistic name -> (column of per-snapshot means, column of per-snapshot medians)
+FEE_STATISTICS_COLUMNS = {
+    'relative_percentage': ('relative_fees_percentage_mean', 'relative_fees_percentage_median'),
+    'absolute_satoshis': ('absolute_fees_satoshis_mean', 'absolute_fees_satoshis_median'),
+}
+
+TIME_STATISTICS_AGGREGATIONS = {
+    'relative_fees_percentage_mean': ['mean', 'std', 'count'],
+    'absolute_fees_satoshis_mean': ['mean', 'std', 'count'],
+    'total_liquidity': ['mean', 'std', 'min', 'max'],
+    'total_unique_makers': ['mean', 'min', 'max']
+}
+
+
 def calculate_fee_statistics(df: pd.DataFrame) -> Dict[str, FeeStatistics]:
     """Calculate comprehensive fee analysis."""
     stats = {}
 
-    # Relative fee percentage analysis
-    stats['relative_percentage'] = FeeStatistics(
-        mean=df['relative_fees_percentage_mean'].mean(),
-        median=df['relative_fees_percentage_median'].mean(),
-        std=df['relative_fees_percentage_mean'].std(),
-        min=df['relative_fees_percentage_mean'].min(),
-        max=df['relative_fees_percentage_mean'].max(),
-        percentiles={
-            '25': df['relative_fees_percentage_mean'].quantile(0.25),
-            '75': df['relative_fees_percentage_mean'].quantile(0.75),
-            '95': df['relative_fees_percentage_mean'].quantile(0.95)
-        }
-    )
-
-    # Absolute fee analysis
-    stats['absolute_satoshis'] = FeeStatistics(
-        mean=df['absolute_fees_satoshis_mean'].mean(),
-        median=df['absolute_fees_satoshis_median'].mean(),
-        std=df['absolute_fees_satoshis_mean'].std(),
-        min=df['absolute_fees_satoshis_mean'].min(),
-        max=df['absolute_fees_satoshis_mean'].max(),
-        percentiles={
-            '25': df['absolute_fees_satoshis_mean'].quantile(0.25),
-            '75': df['absolute_fees_satoshis_mean'].quantile(0.75),
-            '95': df['absolute_fees_satoshis_mean'].quantile(0.95)
-        }
-    )
+    # Relative fee percentage and absolute fee analysis
+    for key, (mean_column, median_column) in FEE_STATISTICS_COLUMNS.items():
+        stats[key] = FeeStatistics(
+            mean=df[mean_column].mean(),
+            median=df[median_column].mean(),
+            std=df[mean_column].std(),
+            min=df[mean_column].min(),
+            max=df[mean_column].max(),
+            percentiles={
+                '25': df[mean_column].quantile(0.25),
+                '75': df[mean_column].quantile(0.75),
+                '95': df[mean_column].quantile(0.95)
+            }
+        )
 
     return stats
 
 
 def calculate_time_based_statistics(df: pd.DataFrame, freq: str = 'D') -> pd.DataFrame:
     """Calculate analysis over different time periods."""
-    return df.groupby(pd.Grouper(freq=freq)).agg({
-        'relative_fees_percentage_mean': ['mean', 'std', 'count'],
-        'absolute_fees_satoshis_mean': ['mean', 'std', 'count'],
-        'total_liquidity': ['mean', 'std', 'min', 'max'],
-        'total_unique_makers': ['mean', 'min', 'max']
-    })
+    return df.groupby(pd.Grouper(freq=freq)).agg(TIME_STATISTICS_AGGREGATIONS)
 
 
 # aggregations.py
@@ -132,4 +130,15 @@ def calculate_market_health_metrics(df: pd.DataFrame) -> Dict[str, float]:
         'market_depth': (
                 df['total_liquidity'] * df['total_unique_makers']
         ).mean(),
-    }
\ No newline at end of file
+    }
+
+
+def calculate_metric_correlations(df: pd.DataFrame, metrics: Optional[List[str]] = None,
+                                  freq: str = 'D', window: int = 7) -> Dict[str, pd.DataFrame]:
+    """Calculate full-period, per-period and rolling correlation matrices between the metrics."""
+    correlations = calculate_correlations(df, metrics, freq)
+    return {
+        'full': correlations.result(),
+        'per_period': correlations.per_period(),
+        'rolling': correlations.rolling(window),
+    }
@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional
+import hashlib
+import os
+import pickle
+from statistics import NormalDist
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+
+# Liquidity, makers and fees, the metrics with a daily/weekly rhythm worth profiling
+SEASONALITY_METRICS = [
+    'total_liquidity',
+    'total_unique_makers',
+    'relative_fees_percentage_mean',
+    'absolute_fees_satoshis_mean',
+]
+
+HOURS_PER_DAY = 24
+HOURS_PER_WEEK = 7 * HOURS_PER_DAY
+
+
+@dataclass
+class SeasonalityResult:
+    """Hour-of-day x day-of-week profiles and seasonal decompositions of the metrics."""
+    profile: pd.DataFrame                   # (day_of_week, hour) x (metric, mean/std/count/ci_low/ci_high)
+    decomposition: Dict[str, pd.DataFrame]  # Metric -> hourly observed/trend/seasonal/resid
+    strength: Dict[str, float]              # Metric -> seasonal strength in [0, 1]
+    period: int                             # Seasonal period of the decomposition, in hours
+    data_version: str                       # Digest of the input the result was computed from
+
+
+def data_version(df: pd.DataFrame, metrics: Optional[List[str]] = None) -> str:
+    """Digest of the index and metric columns, changes whenever a snapshot is added or altered."""
+    metrics = [metric for metric in (metrics or SEASONALITY_METRICS) if metric in df.columns]
+    hashes = pd.util.hash_pandas_object(df[metrics], index=True).to_numpy()
+    return hashlib.sha256(hashes.tobytes() + ','.join(metrics).encode()).hexdigest()[:16]
+
+
+def _centered_moving_average(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Centered moving average over one period of every column, from cumulative sums.
+
+    For an even period the window spans period + 1 values with half-weighted end points
+    (the classical 2 x period average), so a seasonal pattern of that period averages out
+    exactly. Edges are held constant.
+    """
+    n = len(values)
+    half = period // 2
+    if n <= 2 * half:
+        return np.repeat(values.mean(axis=0, keepdims=True), n, axis=0)
+    cumsum = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    # Sums of values[i - half:i + half + 1] for every i with a full window
+    window = cumsum[2 * half + 1:] - cumsum[:n - 2 * half]
+    if period % 2 == 0:
+        window -= 0.5 * (values[:n - 2 * half] + values[2 * half:])
+    trend = window / period
+    return np.concatenate([np.repeat(trend[:1], half, axis=0), trend, np.repeat(trend[-1:], half, axis=0)])
+
+
+def _decompose(values: np.ndarray, period: int, iterations: int = 2):
+    """
+    Additive trend/seasonal/residual split of every column.
+
+    Like STL, the trend and the seasonal component are refined alternately: the trend
+    is re-estimated from the deseasonalized series, so seasonal leakage into the trend
+    shrinks with every iteration.
+    """
+    phase = np.arange(len(values)) % period
+    counts = np.bincount(phase, minlength=period)[:, None]
+    seasonal = np.zeros_like(values)
+    for _ in range(iterations):
+        trend = _centered_moving_average(values - seasonal, period)
+        sums = np.zeros((period, values.shape[1]))
+        np.add.at(sums, phase, values - trend)
+        cycle = sums / counts
+        cycle -= cycle.mean(axis=0)
+        seasonal = cycle[phase]
+    return trend, seasonal, values - trend - seasonal
+
+
+def calculate_seasonality(df: pd.DataFrame, metrics: Optional[List[str]] = None,
+                          confidence: float = 0.95, period: Optional[int] = None) -> SeasonalityResult:
+    """
+    Calculate hour-of-day x day-of-week profiles and a seasonal decomposition of the metrics.
+
+    The snapshots are first averaged per clock hour, so every profile cell holds one value
+    per week and its confidence interval is not narrowed by the strongly autocorrelated
+    per-minute samples. All metrics are grouped and decomposed together as one array,
+    the input frame is never modified.
+
+    Args:
+        df: DataFrame with snapshot statistics indexed by timestamp
+        metrics: Columns to analyse, defaults to the available SEASONALITY_METRICS
+        confidence: Confidence level of the profile intervals
+        period: Seasonal period in hours, weekly when the data spans two weeks, daily otherwise
+
+    Returns:
+        SeasonalityResult with profile, decomposition and seasonal strength per metric
+    """
+    metrics = [metric for metric in (metrics or SEASONALITY_METRICS) if metric in df.columns]
+    hourly = df[metrics].resample('h').mean()
+
+    # Profile: one groupby over the (day of week, hour) slot code of the hourly index
+    slot = hourly.index.dayofweek * HOURS_PER_DAY + hourly.index.hour
+    grouped = hourly.groupby(slot).agg(['mean', 'std', 'count']).reindex(range(HOURS_PER_WEEK))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    columns = {}
+    for metric in metrics:
+        mean, std, count = (grouped[(metric, stat)] for stat in ('mean', 'std', 'count'))
+        margin = z * std / np.sqrt(count)
+        columns.update({
+            (metric, 'mean'): mean,
+            (metric, 'std'): std,
+            (metric, 'count'): count.fillna(0).astype('int64'),
+            (metric, 'ci_low'): mean - margin,
+            (metric, 'ci_high'): mean + margin,
+        })
+    profile = pd.DataFrame(columns)
+    profile.index = pd.MultiIndex.from_product([range(7), range(HOURS_PER_DAY)], names=['day_of_week', 'hour'])
+
+    # Decomposition of the gap-filled hourly series
+    if period is None:
+        period = HOURS_PER_WEEK if len(hourly) >= 2 * HOURS_PER_WEEK else HOURS_PER_DAY
+    decomposition = {}
+    strength = {}
+    filled = hourly.interpolate(method='time', limit_direction='both')
+    if len(filled) and not filled.isna().all().any():
+        trend, seasonal, resid = _decompose(filled.to_numpy(dtype=float), period)
+        for position, metric in enumerate(metrics):
+            decomposition[metric] = pd.DataFrame({
+                'observed': hourly[metric],
+                'trend': trend[:, position],
+                'seasonal': seasonal[:, position],
+                'resid': resid[:, position],
+            }, index=hourly.index)
+            # Share of the detrended variance explained by the seasonal component
+            detrended_var = np.var(seasonal[:, position] + resid[:, position])
+            strength[metric] = float(max(0.0, 1 - np.var(resid[:, position]) / detrended_var)) \
+                if detrended_var > 0 else 0.0
+
+    return SeasonalityResult(profile, decomposition, strength, period, data_version(df, metrics))
+
+
+def cached_seasonality(df: pd.DataFrame, cache_dir: str, metrics: Optional[List[str]] = None,
+                       confidence: float = 0.95, period: Optional[int] = None,
+                       version: Optional[str] = None) -> SeasonalityResult:
+    """
+    Calculate seasonality once per data version, reusing the stored result afterwards.
+
+    Results are pickled to '<cache_dir>/seasonality_<key>.pkl', where the key covers the
+    data version and the parameters, so a dashboard reload with unchanged data skips the
+    computation.
+
+    Args:
+        df: DataFrame with snapshot statistics indexed by timestamp
+        cache_dir: Directory holding the cached results, created if missing
+        metrics: Columns to analyse, defaults to the available SEASONALITY_METRICS
+        confidence: Confidence level of the profile intervals
+        period: Seasonal period in hours, chosen from the data span when None
+        version: Known version of df, e.g. a checkpoint digest, hashed from the data when None
+
+    Returns:
+        SeasonalityResult, loaded from the cache when available
+    """
+    if version is None:
+        version = data_version(df, metrics)
+    key = hashlib.sha256(repr((version, metrics, confidence, period)).encode()).hexdigest()[:16]
+    filepath = os.path.join(cache_dir, f"seasonality_{key}.pkl")
+    if os.path.exists(filepath):
+        with open(filepath, 'rb') as file:
+            return pickle.load(file)
+
+    result = calculate_seasonality(df, metrics, confidence, period)
+    result.data_version = version
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_filepath = f"{filepath}.tmp"
+    with open(tmp_filepath, 'wb') as file:
+        pickle.dump(result, file)
+    os.replace(tmp_filepath, filepath)
+    return result
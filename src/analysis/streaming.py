@@ -0,0 +1,257 @@
+from typing import Dict, Iterable, Optional
+import math
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, field
+
+from .fees import FeeStatistics, FEE_STATISTICS_COLUMNS, TIME_STATISTICS_AGGREGATIONS
+
+
+@dataclass
+class RunningMoments:
+    """Mergeable count, mean, variance, min and max of a numeric stream."""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    def update(self, values) -> 'RunningMoments':
+        """Add a chunk of values, NaNs are ignored like in pandas."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            chunk_mean = values.mean()
+            self.merge(RunningMoments(
+                count=len(values),
+                mean=chunk_mean,
+                m2=float(((values - chunk_mean) ** 2).sum()),
+                min=float(values.min()),
+                max=float(values.max()),
+            ))
+        return self
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        """Combine with the moments of another chunk (Chan et al. parallel update)."""
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), NaN for fewer than two values."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class KllSketch:
+    """
+    Mergeable KLL quantile sketch.
+
+    Quantiles are exact (linear interpolation, as in pandas) until the sketch first
+    compacts. Afterwards the rank error is about 1.7% for k=200 with 99% confidence and
+    shrinks roughly as 1/k. Memory stays O(k) regardless of the stream length.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                # Every other item survives with double weight, the offset is random to stay unbiased
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values) -> 'KllSketch':
+        """Add a chunk of values, NaNs are ignored."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+        return self
+
+    def merge(self, other: 'KllSketch') -> 'KllSketch':
+        """Combine with another sketch, the error bound of the larger k does not apply."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compact()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile, NaN for an empty sketch."""
+        if self.count == 0:
+            return math.nan
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        rank = q * (cumulative[-1] - 1)
+        return float(values[order][np.searchsorted(cumulative, rank, side='right')])
+
+
+@dataclass
+class _ColumnSummary:
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    median_moments: RunningMoments = field(default_factory=RunningMoments)
+    sketch: KllSketch = field(default_factory=KllSketch)
+
+
+class StreamingFeeStatistics:
+    """Chunked, mergeable equivalent of calculate_fee_statistics."""
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.columns = {
+            key: _ColumnSummary(sketch=KllSketch(k, seed))
+            for key in FEE_STATISTICS_COLUMNS
+        }
+
+    def update(self, df: pd.DataFrame) -> 'StreamingFeeStatistics':
+        """Add a chunk of df_stats rows."""
+        for key, (mean_column, median_column) in FEE_STATISTICS_COLUMNS.items():
+            summary = self.columns[key]
+            summary.moments.update(df[mean_column].to_numpy())
+            summary.median_moments.update(df[median_column].to_numpy())
+            summary.sketch.update(df[mean_column].to_numpy())
+        return self
+
+    def merge(self, other: 'StreamingFeeStatistics') -> 'StreamingFeeStatistics':
+        """Combine with the partial result of another chunk or process."""
+        for key, summary in self.columns.items():
+            summary.moments.merge(other.columns[key].moments)
+            summary.median_moments.merge(other.columns[key].median_moments)
+            summary.sketch.merge(other.columns[key].sketch)
+        return self
+
+    def result(self) -> Dict[str, FeeStatistics]:
+        """Fee statistics in the format of calculate_fee_statistics."""
+        stats = {}
+        for key, summary in self.columns.items():
+            empty = summary.moments.count == 0
+            stats[key] = FeeStatistics(
+                mean=math.nan if empty else summary.moments.mean,
+                median=summary.median_moments.mean if summary.median_moments.count else math.nan,
+                std=summary.moments.std,
+                min=math.nan if empty else summary.moments.min,
+                max=math.nan if empty else summary.moments.max,
+                percentiles={
+                    '25': summary.sketch.quantile(0.25),
+                    '75': summary.sketch.quantile(0.75),
+                    '95': summary.sketch.quantile(0.95)
+                }
+            )
+        return stats
+
+
+class StreamingTimeStatistics:
+    """Chunked, mergeable equivalent of calculate_time_based_statistics."""
+
+    def __init__(self, freq: str = 'D'):
+        self.freq = freq
+        # Per column partial moments indexed by period: count, mean, m2, min, max
+        self.partials: Dict[str, pd.DataFrame] = {}
+
+    @staticmethod
+    def _combine(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+        index = a.index.union(b.index)
+        a = a.reindex(index).fillna({'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf})
+        b = b.reindex(index).fillna({'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf})
+        count = a['count'] + b['count']
+        safe_count = count.where(count > 0, 1)
+        delta = b['mean'] - a['mean']
+        return pd.DataFrame({
+            'count': count,
+            'mean': a['mean'] + delta * b['count'] / safe_count,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / safe_count,
+            'min': np.minimum(a['min'], b['min']),
+            'max': np.maximum(a['max'], b['max']),
+        }, index=index)
+
+    def update(self, df: pd.DataFrame) -> 'StreamingTimeStatistics':
+        """Add a chunk of df_stats rows, chunks may overlap the same periods."""
+        grouped = df[list(TIME_STATISTICS_AGGREGATIONS)].groupby(pd.Grouper(freq=self.freq))
+        count = grouped.count()
+        mean = grouped.mean().fillna(0.0)
+        m2 = (grouped.var(ddof=0) * count).fillna(0.0)
+        low = grouped.min().fillna(np.inf)
+        high = grouped.max().fillna(-np.inf)
+        for column in TIME_STATISTICS_AGGREGATIONS:
+            chunk = pd.DataFrame({
+                'count': count[column], 'mean': mean[column], 'm2': m2[column],
+                'min': low[column], 'max': high[column],
+            })
+            previous = self.partials.get(column)
+            self.partials[column] = chunk if previous is None else self._combine(previous, chunk)
+        return self
+
+    def merge(self, other: 'StreamingTimeStatistics') -> 'StreamingTimeStatistics':
+        """Combine with the partial result of another chunk or process."""
+        for column, partial in other.partials.items():
+            previous = self.partials.get(column)
+            self.partials[column] = partial if previous is None else self._combine(previous, partial)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """Period statistics in the format of calculate_time_based_statistics."""
+        columns = {}
+        for column, aggregations in TIME_STATISTICS_AGGREGATIONS.items():
+            partial = self.partials[column]
+            partial = partial.reindex(pd.date_range(partial.index.min(), partial.index.max(), freq=self.freq))
+            count = partial['count'].fillna(0)
+            present = count > 0
+            values = {
+                'count': count.astype('int64'),
+                'mean': partial['mean'].where(present),
+                'std': np.sqrt(partial['m2'] / (count - 1)).where(count > 1),
+                'min': partial['min'].where(present),
+                'max': partial['max'].where(present),
+            }
+            for aggregation in aggregations:
+                columns[(column, aggregation)] = values[aggregation]
+        result = pd.DataFrame(columns)
+        result.index.name = 'timestamp'
+        return result
+
+
+def calculate_fee_statistics_chunked(chunks: Iterable[pd.DataFrame], k: int = 200) -> Dict[str, FeeStatistics]:
+    """Calculate calculate_fee_statistics over chunks that do not fit in memory together."""
+    stats = StreamingFeeStatistics(k)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats.result()
+
+
+def calculate_time_based_statistics_chunked(chunks: Iterable[pd.DataFrame], freq: str = 'D') -> pd.DataFrame:
+    """Calculate calculate_time_based_statistics over chunks that do not fit in memory together."""
+    stats = StreamingTimeStatistics(freq)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats.result()
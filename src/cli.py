@@ -0,0 +1,102 @@
+import argparse
+from typing import List, Optional
+
+from .preprocessing.checkpoint import ingest_with_checkpoints, DEFAULT_CHUNK_SIZE
+from .preprocessing.dataframe import save_dataframe
+from .preprocessing.instrumentation import PipelineProfiler
+from .preprocessing.utils import (
+    get_snapshot_filepaths,
+    filter_filepaths_by_date,
+    sample_every_nth,
+    sample_per_bucket,
+    sample_stratified
+)
+from .preprocessing.validation import summarize_quarantine
+
+
+def build_ingest_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='jm-ingest',
+        description='Build the snapshot statistics DataFrame from a Joinmarket orderbook archive.')
+    parser.add_argument('data_dir', help="Directory with the daily snapshot directories or bundles")
+    parser.add_argument('-o', '--output', default='dataframe.pkl', help="Pickle file to write")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--start-date', help="First included day, YYYY-MM-DD")
+    parser.add_argument('--end-date', help="Last included day, YYYY-MM-DD")
+    parser.add_argument('--checkpoint-dir',
+                        help="Directory for the resumable chunks, defaults to '<output>.chunks'")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Maximum snapshot files per checkpointed chunk, chunks never span days")
+    parser.add_argument('--batched', action='store_true',
+                        help="Process the snapshots of every batch in one vectorized pass")
+    parser.add_argument('--profile', metavar='SUMMARY_JSON',
+                        help="Write a timing summary of the run to this file")
+    parser.add_argument('--cprofile', metavar='PSTATS',
+                        help="Also run cProfile and write its stats to this file, requires --profile")
+
+    sampling = parser.add_argument_group('sampling', "Process a subset of the snapshots, chosen from the filenames")
+    sampling.add_argument('--every', type=int, metavar='N', help="Keep every N-th snapshot")
+    sampling.add_argument('--bucket', type=int, metavar='MINUTES',
+                          help="Keep the first snapshot of every MINUTES-long time bucket")
+    sampling.add_argument('--stratified', type=int, metavar='K',
+                          help="Draw K random snapshots from every time bucket (--bucket, 60 minutes by default)")
+    sampling.add_argument('--seed', type=int, default=0, help="Seed of the stratified sample")
+    return parser
+
+
+def sample_filepaths(filepaths: List[str], args: argparse.Namespace) -> List[str]:
+    """Applies the sampling options of the ingest command."""
+    if args.every is not None:
+        filepaths = sample_every_nth(filepaths, args.every)
+    if args.stratified is not None:
+        return sample_stratified(filepaths, args.stratified, args.bucket or 60, args.seed)
+    if args.bucket is not None:
+        return sample_per_bucket(filepaths, args.bucket)
+    return filepaths
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the jm-ingest command.
+
+    Parameters:
+        argv (Optional[List[str]]): Command line arguments, sys.argv when None.
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = build_ingest_parser()
+    args = parser.parse_args(argv)
+    if args.cprofile and not args.profile:
+        parser.error("--cprofile requires --profile")
+
+    filepaths = get_snapshot_filepaths(args.data_dir)
+    filepaths = filter_filepaths_by_date(filepaths, args.start_date, args.end_date)
+    print(f"Found {len(filepaths)} snapshot files")
+    sampled = sample_filepaths(filepaths, args)
+    if len(sampled) != len(filepaths):
+        print(f"Sampled {len(sampled)} snapshot files")
+    filepaths = sampled
+
+    profiler = PipelineProfiler(cprofile=args.cprofile is not None) if args.profile else None
+    quarantine = []
+    df_stats = ingest_with_checkpoints(
+        filepaths,
+        args.checkpoint_dir or f"{args.output}.chunks",
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        quarantine=quarantine,
+        profiler=profiler,
+        batched=args.batched,
+    )
+    save_dataframe(df_stats, args.output)
+
+    if quarantine:
+        print(f"Quarantined files by reason: {summarize_quarantine(quarantine)}")
+    if profiler is not None:
+        profiler.export(args.profile, args.cprofile)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
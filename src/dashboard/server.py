@@ -0,0 +1,261 @@
+import argparse
+import glob
+import json
+import math
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+from ..analysis.fees import FEE_STATISTICS_COLUMNS
+from ..preprocessing.dataframe import load_snapshots_to_dataframe
+from ..preprocessing.utils import get_snapshot_filepaths, parse_snapshot_datetime
+from .tiles import TileStore
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+
+def _json_safe(value: Any) -> Any:
+    """Converts NaN to None and numpy/pandas scalars to plain Python values."""
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _with_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the per-snapshot metrics of the summary that are not snapshot statistics."""
+    makers = df['total_unique_makers'].where(df['total_unique_makers'] > 0)
+    return df.assign(liquidity_per_maker=df['total_liquidity'] / makers,
+                     market_depth=df['total_liquidity'] * df['total_unique_makers'])
+
+
+def _milliseconds(timestamp: Optional[pd.Timestamp]) -> Optional[int]:
+    """Milliseconds since the epoch, as used by JavaScript dates."""
+    return None if timestamp is None else timestamp.value // 10 ** 6
+
+
+class DashboardData:
+    """
+    Snapshot statistics and tiles behind the dashboard, refreshed from the data directory.
+
+    Every refresh ingests only the snapshot files newer than the last ingested one, appends
+    them to the stored statistics and merges them into the tiles. The stored statistics are
+    written first, tiles that do not cover all of them are rebuilt on start.
+    """
+
+    def __init__(self, data_dir: str, store_dir: str, workers: int = 1):
+        """
+        Parameters:
+            data_dir (str): Directory with the daily snapshot directories or bundles.
+            store_dir (str): Directory persisting the statistics and tiles between runs.
+            workers (int): Number of worker processes used for ingestion.
+        """
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.tiles = TileStore(store_dir)
+        # Every refresh stores its new rows as a separate part, so nothing is rewritten
+        parts = sorted(glob.glob(os.path.join(store_dir, 'snapshots_*.pkl')))
+        if parts:
+            self.df_stats = pd.concat([pd.read_pickle(part) for part in parts])
+        else:
+            self.df_stats = load_snapshots_to_dataframe([])
+        if self.tiles.rows != len(self.df_stats):
+            # A refresh was interrupted between storing its rows and its tiles
+            self.tiles.rebuild(_with_derived_metrics(self.df_stats)).save()
+        self.last_update: Optional[pd.Timestamp] = None
+
+    def refresh(self) -> int:
+        """
+        Ingests new snapshot files.
+
+        Returns:
+            int: Number of new snapshots.
+        """
+        last = self.df_stats.index.max() if len(self.df_stats) else None
+        filepaths = []
+        for filepath in get_snapshot_filepaths(self.data_dir):
+            timestamp = parse_snapshot_datetime(filepath)
+            if timestamp is not None and (last is None or timestamp > last):
+                filepaths.append(filepath)
+
+        df_new = load_snapshots_to_dataframe(filepaths, workers=self.workers) if filepaths else None
+        with self.lock:
+            if df_new is not None and len(df_new):
+                self.df_stats = pd.concat([self.df_stats, df_new]) if len(self.df_stats) else df_new
+                os.makedirs(self.store_dir, exist_ok=True)
+                part = os.path.join(self.store_dir, f"snapshots_{df_new.index[0]:%Y%m%dT%H%M}.pkl")
+                df_new.to_pickle(f"{part}.tmp")
+                os.replace(f"{part}.tmp", part)
+                self.tiles.append(_with_derived_metrics(df_new))
+                self.tiles.save()
+            self.last_update = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        return 0 if df_new is None else len(df_new)
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'metrics': self.tiles.available_metrics(),
+                'start': _milliseconds(self.tiles.start),
+                'end': _milliseconds(self.tiles.end),
+                'snapshots': len(self.df_stats),
+                'last_update': _milliseconds(self.last_update),
+            }
+
+    def series(self, metric: str, start=None, end=None, max_points: int = 2000) -> Dict[str, Any]:
+        with self.lock:
+            resolution, bins = self.tiles.query(metric, start, end, max_points)
+        return {
+            'metric': metric,
+            'resolution': resolution,
+            'timestamps': (bins.index.asi8 // 10 ** 6).tolist() if len(bins) else [],
+            'mean': bins['mean'].tolist(),
+            'min': bins['min'].tolist(),
+            'max': bins['max'].tolist(),
+        }
+
+    def summary(self, start=None, end=None) -> Dict[str, Any]:
+        """
+        Fee, liquidity and market depth metrics of the snapshots within a time range.
+
+        The metrics are combined from the finest tiles, so the range is widened to whole
+        tile bins and no snapshot rows are read. Percentiles and the rolling-window
+        stability metrics of the analysis need the rows and are left out.
+        """
+        with self.lock:
+            totals = self.tiles.totals(start, end)
+        if 'total_offers' not in totals.index or totals.at['total_offers', 'count'] == 0:
+            return {'snapshots': 0}
+        liquidity = totals.loc['total_liquidity']
+        return {
+            'snapshots': int(totals.at['total_offers', 'count']),
+            'fees': {
+                key: {
+                    'mean': totals.at[mean_column, 'mean'],
+                    'median': totals.at[median_column, 'mean'],
+                    'std': totals.at[mean_column, 'std'],
+                    'min': totals.at[mean_column, 'min'],
+                    'max': totals.at[mean_column, 'max'],
+                }
+                for key, (mean_column, median_column) in FEE_STATISTICS_COLUMNS.items()
+            },
+            'liquidity': {
+                'avg_liquidity': liquidity['mean'],
+                'liquidity_per_maker': totals.at['liquidity_per_maker', 'mean'],
+                'liquidity_volatility': liquidity['std'] / liquidity['mean'],
+            },
+            'market_health': {'market_depth': totals.at['market_depth', 'mean']},
+        }
+
+
+def make_handler(dashboard: DashboardData) -> type:
+    """Creates the request handler class serving a dashboard."""
+
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, payload: Any, status: HTTPStatus = HTTPStatus.OK):
+            body = json.dumps(_json_safe(payload), default=str).encode()
+            self._send(status, body, 'application/json')
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                start = pd.to_datetime(int(query['start']), unit='ms') if 'start' in query else None
+                end = pd.to_datetime(int(query['end']), unit='ms') if 'end' in query else None
+                if url.path in ('/', '/index.html'):
+                    with open(os.path.join(STATIC_DIR, 'index.html'), 'rb') as file:
+                        self._send(HTTPStatus.OK, file.read(), 'text/html; charset=utf-8')
+                elif url.path == '/api/status':
+                    self._send_json(dashboard.status())
+                elif url.path == '/api/series':
+                    if query.get('metric') not in dashboard.tiles.available_metrics():
+                        self._send_json({'error': 'unknown metric'}, HTTPStatus.BAD_REQUEST)
+                        return
+                    self._send_json(dashboard.series(query['metric'], start, end,
+                                                     int(query.get('points', 2000))))
+                elif url.path == '/api/summary':
+                    self._send_json(dashboard.summary(start, end))
+                else:
+                    self._send_json({'error': 'not found'}, HTTPStatus.NOT_FOUND)
+            except ValueError as e:
+                self._send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DashboardHandler
+
+
+def _refresh_loop(dashboard: DashboardData, interval: float, stopped: threading.Event):
+    while not stopped.wait(interval):
+        new = dashboard.refresh()
+        if new:
+            print(f"Ingested {new} new snapshots")
+
+
+def build_dashboard_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='jm-dashboard',
+        description='Serve an interactive dashboard of a Joinmarket orderbook archive on localhost.')
+    parser.add_argument('data_dir', help="Directory with the daily snapshot directories or bundles")
+    parser.add_argument('--store', default='dashboard-store',
+                        help="Directory persisting the ingested statistics and tiles")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8050, help="Port to listen on")
+    parser.add_argument('--refresh', type=float, default=60.0,
+                        help="Seconds between checks for new snapshots, 0 disables refreshing")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of worker processes")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the jm-dashboard command.
+
+    Parameters:
+        argv (Optional[List[str]]): Command line arguments, sys.argv when None.
+
+    Returns:
+        int: Process exit code.
+    """
+    args = build_dashboard_parser().parse_args(argv)
+
+    dashboard = DashboardData(args.data_dir, args.store, args.workers)
+    print(f"Ingested {dashboard.refresh()} new snapshots, {len(dashboard.df_stats)} in total")
+
+    stopped = threading.Event()
+    if args.refresh > 0:
+        threading.Thread(target=_refresh_loop, args=(dashboard, args.refresh, stopped), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(dashboard))
+    print(f"Serving the dashboard on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+
+# Tile resolutions from finest to coarsest, each is aggregated from the previous one
+TILE_RESOLUTIONS = ('5min', '1h', '6h', '1D', '7D')
+
+DASHBOARD_METRICS = [
+    'total_liquidity',
+    'total_unique_makers',
+    'total_offers',
+    'relative_fees_percentage_mean',
+    'absolute_fees_satoshis_mean',
+    'relative_fees_ratio',
+    'order_size_median',
+    'total_bond_value',
+    'relative_fees_percentage_median',
+    'absolute_fees_satoshis_median',
+    'liquidity_per_maker',
+    'market_depth',
+]
+
+# Per-bin statistics and how bins of the same period combine
+_TILE_STATS = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _reduce(tiles: pd.DataFrame, keys) -> pd.DataFrame:
+    """Combine tile bins sharing a key, columns are (statistic, metric)."""
+    return pd.concat({
+        stat: getattr(tiles[stat].groupby(keys), how)() for stat, how in _TILE_STATS.items()
+    }, axis=1)
+
+
+class TileStore:
+    """
+    Pre-aggregated count/sum/min/max tiles of the metric columns at several resolutions.
+
+    The finest tiles are aggregated from the snapshot rows, every coarser level from the
+    level below, so an append only touches the bins covered by the new rows. Any visible
+    range is then answered from the coarsest level that still gives enough points.
+
+    The number of appended rows is saved last, in 'tiles.json', so a reader can tell
+    whether the saved tiles cover all of its rows. Tiles without it are not loaded.
+    """
+
+    def __init__(self, directory: Optional[str] = None, metrics: Sequence[str] = DASHBOARD_METRICS,
+                 resolutions: Sequence[str] = TILE_RESOLUTIONS):
+        """
+        Parameters:
+            directory (Optional[str]): Where the tiles are persisted, in memory only when None.
+            metrics (Sequence[str]): Columns to aggregate.
+            resolutions (Sequence[str]): Bin lengths from finest to coarsest.
+        """
+        self.directory = directory
+        self.metrics = list(metrics)
+        self.resolutions = list(resolutions)
+        self.tiles: Dict[str, pd.DataFrame] = {}
+        self.rows = 0
+        if directory is not None and os.path.exists(self._manifest_filepath()):
+            with open(self._manifest_filepath()) as file:
+                self.rows = json.load(file)['rows']
+            for resolution in self.resolutions:
+                filepath = self._filepath(resolution)
+                if os.path.exists(filepath):
+                    self.tiles[resolution] = pd.read_pickle(filepath)
+
+    def _filepath(self, resolution: str) -> str:
+        return os.path.join(self.directory, f"tiles_{resolution}.pkl")
+
+    def _manifest_filepath(self) -> str:
+        return os.path.join(self.directory, "tiles.json")
+
+    @property
+    def start(self) -> Optional[pd.Timestamp]:
+        tiles = self.tiles.get(self.resolutions[0])
+        return None if tiles is None or tiles.empty else tiles.index[0]
+
+    @property
+    def end(self) -> Optional[pd.Timestamp]:
+        """End of the last finest bin holding data."""
+        tiles = self.tiles.get(self.resolutions[0])
+        if tiles is None or tiles.empty:
+            return None
+        return tiles.index[-1] + pd.tseries.frequencies.to_offset(self.resolutions[0])
+
+    def append(self, df: pd.DataFrame) -> 'TileStore':
+        """
+        Add snapshot rows, merging them into the bins they fall in.
+
+        Parameters:
+            df (pd.DataFrame): Snapshot statistics indexed by timestamp, in any order.
+        """
+        self.rows += len(df)
+        metrics = [metric for metric in self.metrics if metric in df.columns]
+        if df.empty or not metrics:
+            return self
+
+        finest = self.resolutions[0]
+        keys = df.index.floor(finest)
+        chunk = df[metrics].groupby(keys).agg(['count', 'sum', 'min', 'max']).swaplevel(axis=1)
+        squares = (df[metrics].astype(float) ** 2).groupby(keys).sum()
+        chunk = pd.concat([chunk, pd.concat({'sumsq': squares}, axis=1)], axis=1).sort_index(axis=1)
+        for position, resolution in enumerate(self.resolutions):
+            if position > 0:
+                chunk = _reduce(chunk, chunk.index.floor(resolution))
+            existing = self.tiles.get(resolution)
+            if existing is None or existing.empty:
+                self.tiles[resolution] = chunk
+                continue
+            # Only the bins from the first new one onwards need to be recombined
+            first = chunk.index[0]
+            tail = pd.concat([existing.loc[existing.index >= first], chunk])
+            self.tiles[resolution] = pd.concat([existing.loc[existing.index < first], _reduce(tail, tail.index)])
+        return self
+
+    def rebuild(self, df: pd.DataFrame) -> 'TileStore':
+        """Replace the tiles by those of the given snapshot rows."""
+        self.tiles = {}
+        self.rows = 0
+        return self.append(df)
+
+    def save(self):
+        """Persist the tiles, each file is replaced atomically and the row count is written last."""
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for resolution, tiles in self.tiles.items():
+            filepath = self._filepath(resolution)
+            tiles.to_pickle(f"{filepath}.tmp")
+            os.replace(f"{filepath}.tmp", filepath)
+        manifest = self._manifest_filepath()
+        with open(f"{manifest}.tmp", 'w') as file:
+            json.dump({'rows': self.rows}, file)
+        os.replace(f"{manifest}.tmp", manifest)
+
+    def query(self, metric: str, start=None, end=None, max_points: int = 2000) -> Tuple[str, pd.DataFrame]:
+        """
+        Aggregated series of a metric over a time range.
+
+        Parameters:
+            metric (str): Metric column.
+            start: Inclusive start, unbounded if None.
+            end: Inclusive end, unbounded if None.
+            max_points (int): Upper bound on the number of returned bins, unless even the
+                coarsest resolution has more.
+
+        Returns:
+            Tuple[str, pd.DataFrame]: The chosen resolution and the bins with mean, min, max
+                and count columns.
+        """
+        chosen = None
+        for resolution in self.resolutions:
+            tiles = self.tiles.get(resolution)
+            if tiles is None:
+                continue
+            chosen = (resolution, tiles.loc[start:end])
+            if len(chosen[1]) <= max_points:
+                break
+        if chosen is None:
+            return self.resolutions[0], pd.DataFrame(columns=['mean', 'min', 'max', 'count'])
+
+        resolution, tiles = chosen
+        count = tiles[('count', metric)]
+        return resolution, pd.DataFrame({
+            'mean': tiles[('sum', metric)] / count.where(count > 0),
+            'min': tiles[('min', metric)],
+            'max': tiles[('max', metric)],
+            'count': count,
+        })
+
+    def totals(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Statistics of every metric over a time range, combined from the finest tiles.
+
+        Parameters:
+            start: Inclusive start, unbounded if None.
+            end: Inclusive end, unbounded if None.
+
+        Returns:
+            pd.DataFrame: count, mean, std (sample), min and max of the rows, indexed by metric.
+        """
+        tiles = self.tiles.get(self.resolutions[0])
+        if tiles is None:
+            return pd.DataFrame(columns=['count', 'mean', 'std', 'min', 'max'])
+        tiles = tiles.loc[start:end]
+        count = tiles['count'].sum()
+        total = tiles['sum'].sum()
+        mean = total / count.where(count > 0)
+        variance = (tiles['sumsq'].sum() - total * mean) / (count - 1).where(count > 1)
+        return pd.DataFrame({
+            'count': count,
+            'mean': mean,
+            'std': variance.clip(lower=0) ** 0.5,
+            'min': tiles['min'].min(),
+            'max': tiles['max'].max(),
+        })
+
+    def available_metrics(self) -> List[str]:
+        tiles = self.tiles.get(self.resolutions[0])
+        return [] if tiles is None else list(tiles['count'].columns)
@@ -0,0 +1,285 @@
+import gzip
+import json
+import os
+import re
+import tarfile
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Iterator, Iterable, Optional, Tuple, Union, BinaryIO
+
+
+# Single snapshot files, optionally compressed
+SNAPSHOT_SUFFIXES = ('.json', '.json.gz', '.json.zst')
+
+# Per-day bundles holding the snapshots of one day, e.g. 'data/2024-01-01.tar.gz'
+BUNDLE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.zst', '.zip')
+
+# Members of a bundle are addressed as '<bundle path>/<member name>'
+_BUNDLE_PATH_PATTERN = re.compile(r'^(.*?\.(?:tar\.gz|tar\.zst|tgz|tar|zip))/(.+)$')
+
+
+# Index file of the member names of a tar bundle, written next to the bundle
+BUNDLE_INDEX_SUFFIX = '.members.json'
+
+# Member names by (bundle path, size, mtime), see list_bundle_members
+_bundle_listings: Dict[Tuple[str, int, int], List[str]] = {}
+
+
+class SnapshotArchiveError(OSError):
+    """Raised when a compressed snapshot or bundle cannot be decompressed."""
+
+
+def _open_zstd(fileobj: BinaryIO) -> BinaryIO:
+    """Wraps a binary file object with a streaming zstd decompressor."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading .zst snapshots requires the optional 'zstandard' package")
+    return zstandard.ZstdDecompressor().stream_reader(fileobj)
+
+
+def _zstd_errors() -> Tuple[type, ...]:
+    """The zstandard decompression error, empty when zstandard is not installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return ()
+    return (zstandard.ZstdError,)
+
+
+def is_snapshot_name(name: str) -> bool:
+    """Checks whether a file or member name looks like a (compressed) snapshot."""
+    return name.endswith(SNAPSHOT_SUFFIXES)
+
+
+def is_bundle_name(name: str) -> bool:
+    """Checks whether a file name looks like a per-day snapshot bundle."""
+    return name.endswith(BUNDLE_SUFFIXES)
+
+
+def split_bundle_path(filepath: str) -> Tuple[Optional[str], str]:
+    """
+    Splits a virtual bundle member path into the bundle path and the member name.
+
+    Parameters:
+        filepath (str): A snapshot filepath, possibly pointing inside a bundle.
+
+    Returns:
+        Tuple[Optional[str], str]: (bundle path, member name), or (None, filepath)
+            for a plain file.
+    """
+    match = _BUNDLE_PATH_PATTERN.match(filepath)
+    if match and os.path.isfile(match.group(1)):
+        return match.group(1), match.group(2)
+    return None, filepath
+
+
+def _decompress_stream(name: str, fileobj: BinaryIO) -> BinaryIO:
+    """Wraps a raw stream with the decompressor matching the snapshot name."""
+    if name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=fileobj)
+    if name.endswith('.zst'):
+        return _open_zstd(fileobj)
+    return fileobj
+
+
+def _read_member(name: str, fileobj: BinaryIO) -> bytes:
+    try:
+        return _decompress_stream(name, fileobj).read()
+    except (EOFError, zlib.error) + _zstd_errors() as e:
+        raise SnapshotArchiveError(f"{name}: {e}") from e
+
+
+@contextmanager
+def _open_tar(bundle_path: str) -> Iterator[tarfile.TarFile]:
+    """
+    Opens a tar bundle for sequential reading, transparently handling gzip and zstd.
+
+    Stream mode reads a compressed tar once instead of seeking back for every member.
+    """
+    with open(bundle_path, 'rb') as raw:
+        try:
+            if bundle_path.endswith('.tar.zst'):
+                bundle = tarfile.open(fileobj=_open_zstd(raw), mode='r|')
+            else:
+                bundle = tarfile.open(fileobj=raw, mode='r|*')
+        except (tarfile.TarError,) + _zstd_errors() as e:
+            raise SnapshotArchiveError(f"{bundle_path}: {e}") from e
+        with bundle:
+            try:
+                yield bundle
+            except _zstd_errors() as e:
+                # A corrupt zstd stream fails while the members are iterated
+                raise SnapshotArchiveError(f"{bundle_path}: {e}") from e
+
+
+def _read_bundle_index(bundle_path: str, stat: os.stat_result) -> Optional[List[str]]:
+    """Member names from the index file of a bundle, None if missing or stale."""
+    try:
+        with open(bundle_path + BUNDLE_INDEX_SUFFIX) as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('size') != stat.st_size or index.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+    names = index.get('members')
+    return names if isinstance(names, list) else None
+
+
+def _write_bundle_index(bundle_path: str, stat: os.stat_result, names: List[str]):
+    """Writes the index file of a bundle, skipped when the directory is not writable."""
+    index_path = bundle_path + BUNDLE_INDEX_SUFFIX
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as file:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'members': names}, file)
+        os.replace(temp_path, index_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def list_bundle_members(bundle_path: str) -> List[str]:
+    """
+    Lists the snapshot members of a bundle as virtual filepaths.
+
+    Zip bundles are listed from their central directory. Compressed tars have no directory,
+    so their member names are read once and stored in a '<bundle>.members.json' index file
+    next to the bundle, which is reused as long as the bundle's size and mtime are unchanged.
+    The listing is also kept in memory for repeated scans in the same process.
+
+    Parameters:
+        bundle_path (str): Path to a .tar, .tar.gz, .tgz, .tar.zst or .zip bundle.
+
+    Returns:
+        List[str]: Sorted '<bundle path>/<member name>' paths of the snapshots in the bundle.
+    """
+    stat = os.stat(bundle_path)
+    key = (bundle_path, stat.st_size, stat.st_mtime_ns)
+    names = _bundle_listings.get(key)
+    if names is None:
+        if bundle_path.endswith('.zip'):
+            with zipfile.ZipFile(bundle_path) as bundle:
+                names = [info.filename for info in bundle.infolist() if not info.is_dir()]
+        else:
+            names = _read_bundle_index(bundle_path, stat)
+            if names is None:
+                with _open_tar(bundle_path) as bundle:
+                    names = [member.name for member in bundle if member.isfile()]
+                _write_bundle_index(bundle_path, stat, names)
+        _bundle_listings[key] = names
+    return [f"{bundle_path}/{name}" for name in sorted(names) if is_snapshot_name(name)]
+
+
+def read_snapshot_bytes(filepath: str) -> bytes:
+    """
+    Reads the decompressed content of a snapshot without writing temporary files.
+
+    Parameters:
+        filepath (str): Path to a .json, .json.gz or .json.zst file, or a virtual
+            path of a member inside a per-day bundle.
+
+    Returns:
+        bytes: The raw JSON document.
+    """
+    bundle_path, member = split_bundle_path(filepath)
+    if bundle_path is None:
+        with open(filepath, 'rb') as file:
+            return _read_member(filepath, file)
+
+    for _, content in iter_bundle(bundle_path, [member]):
+        if isinstance(content, Exception):
+            raise content
+        return content
+    raise FileNotFoundError(f"{member} not found in {bundle_path}")
+
+
+def iter_bundle(bundle_path: str,
+                members: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+    """
+    Streams the members of a bundle in a single sequential pass.
+
+    Errors are yielded in place of the content, so one bad member does not stop the
+    iteration. If the bundle itself is unreadable, every requested member yields the error.
+
+    Parameters:
+        bundle_path (str): Path to the bundle.
+        members (Optional[Iterable[str]]): Member names to read, all snapshots if None.
+
+    Returns:
+        Iterator[Tuple[str, Union[bytes, Exception]]]: (member name, content or error) pairs.
+    """
+    wanted = set(members) if members is not None else None
+    remaining = set(wanted) if wanted is not None else set()
+
+    try:
+        if bundle_path.endswith('.zip'):
+            with zipfile.ZipFile(bundle_path) as bundle:
+                names = sorted(wanted) if wanted is not None else [
+                    info.filename for info in bundle.infolist() if is_snapshot_name(info.filename)]
+                for name in names:
+                    remaining.discard(name)
+                    try:
+                        with bundle.open(name) as file:
+                            yield name, _read_member(name, file)
+                    except (KeyError, OSError, zipfile.BadZipFile) as e:
+                        yield name, SnapshotArchiveError(f"{bundle_path}/{name}: {e}")
+        else:
+            with _open_tar(bundle_path) as bundle:
+                for member in bundle:
+                    if not member.isfile() or not is_snapshot_name(member.name):
+                        continue
+                    if wanted is not None and member.name not in wanted:
+                        continue
+                    remaining.discard(member.name)
+                    try:
+                        yield member.name, _read_member(member.name, bundle.extractfile(member))
+                    except SnapshotArchiveError as e:
+                        yield member.name, e
+    except (OSError, EOFError, zlib.error, tarfile.TarError, zipfile.BadZipFile) as e:
+        error = e if isinstance(e, SnapshotArchiveError) else SnapshotArchiveError(f"{bundle_path}: {e}")
+        for name in sorted(remaining):
+            yield name, error
+        return
+
+    for name in sorted(remaining):
+        yield name, FileNotFoundError(f"{name} not found in {bundle_path}")
+
+
+def iter_snapshot_bytes(filepaths: Iterable[str]) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+    """
+    Reads many snapshots, opening every bundle only once for its consecutive members.
+
+    Parameters:
+        filepaths (Iterable[str]): Snapshot filepaths, bundle members grouped together.
+
+    Returns:
+        Iterator[Tuple[str, Union[bytes, Exception]]]: (filepath, content or error) pairs
+            in bundle order for bundle members and input order otherwise.
+    """
+    pending_bundle = None
+    pending_members = []
+
+    def flush():
+        for name, content in iter_bundle(pending_bundle, pending_members):
+            yield f"{pending_bundle}/{name}", content
+
+    for filepath in filepaths:
+        bundle_path, member = split_bundle_path(filepath)
+        if pending_bundle is not None and bundle_path != pending_bundle:
+            yield from flush()
+            pending_bundle, pending_members = None, []
+        if bundle_path is not None:
+            pending_bundle = bundle_path
+            pending_members.append(member)
+            continue
+        try:
+            yield filepath, read_snapshot_bytes(filepath)
+        except OSError as e:
+            yield filepath, e
+
+    if pending_bundle is not None:
+        yield from flush()
@@ -0,0 +1,258 @@
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+import numpy as np
+
+from .archive import iter_snapshot_bytes
+from .instrumentation import PipelineProfiler, NULL_PROFILER
+from .shared import COLUMN_DTYPES
+from .snapshot import CORRUPT_SNAPSHOT_ERRORS, SNAPSHOT_RECORD_COLUMNS
+from .validation import validate_snapshot, flatten_anomalies
+
+# Nominal amount of the fee of offers without a positive minsize, see process_offers
+DEFAULT_NOMINAL_AMOUNT = 100000
+
+# Fee kinds of the flattened offers, only these two ordertypes are parsed by parse_cjfee
+_OTHER, _RELATIVE, _ABSOLUTE = 0, 1, 2
+_FEE_KINDS = {'sw0reloffer': _RELATIVE, 'sw0absoffer': _ABSOLUTE}
+
+
+def _parse_fees(cjfees: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts the cjfee values like float() does.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The fees and whether each value could be converted.
+    """
+    # NumPy converts None to NaN where float() raises, so only plain values take the fast path
+    if all(type(cjfee) in (str, int, float) for cjfee in cjfees):
+        try:
+            fees = np.array(cjfees, dtype=np.float64)
+            return fees, np.ones(len(fees), dtype=bool)
+        except (ValueError, TypeError):
+            pass
+    # Some value is malformed, convert one by one
+    fees = np.empty(len(cjfees), dtype=np.float64)
+    parsed = np.ones(len(cjfees), dtype=bool)
+    for index, cjfee in enumerate(cjfees):
+        try:
+            fees[index] = float(cjfee)
+        except (ValueError, TypeError):
+            fees[index] = 0.0
+            parsed[index] = False
+    return fees, parsed
+
+
+def _segment_mean(ids: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the values of every segment, 0 for empty segments."""
+    counts = np.bincount(ids, minlength=n)
+    sums = np.bincount(ids, weights=values, minlength=n)
+    return np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+
+
+def _segment_median(ids: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Median of the non-NaN values of every segment, 0 for segments without any."""
+    known = ~np.isnan(values)
+    ids, values = ids[known], values[known]
+    order = np.lexsort((values, ids))
+    ordered = values[order]
+    counts = np.bincount(ids, minlength=n)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    low = (starts + (counts - 1) // 2)[present]
+    high = (starts + counts // 2)[present]
+    medians = np.zeros(n)
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def _segment_reduce(function: np.ufunc, starts: np.ndarray, counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Reduces contiguous segments with a ufunc, 0 for empty segments."""
+    result = np.zeros(len(counts))
+    present = counts > 0
+    if present.any():
+        result[present] = function.reduceat(values, starts[present])
+    return result
+
+
+def process_snapshot_batch(snapshots: Sequence[Dict[str, Any]], timestamps: Sequence[datetime],
+                           profiler: PipelineProfiler = NULL_PROFILER
+                           ) -> Tuple[Dict[str, np.ndarray], List[Tuple[int, str]]]:
+    """
+    Validates and processes many decoded snapshots in one vectorized pass.
+
+    The offers of all snapshots are flattened into arrays with a snapshot id, and the
+    per-snapshot statistics are computed with grouped NumPy reductions instead of one
+    process_snapshot_data call per snapshot. The values equal those of process_snapshot_data
+    up to floating point rounding, both leave NaN fees out of the medians.
+
+    Parameters:
+        snapshots (Sequence[Dict[str, Any]]): The decoded snapshot JSONs.
+        timestamps (Sequence[datetime]): Timestamp of every snapshot.
+        profiler (PipelineProfiler): Collects stage timings and counters, disabled by default.
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[Tuple[int, str]]]: The SNAPSHOT_RECORD_COLUMNS of the
+            valid snapshots as arrays, ready for pd.DataFrame(columns), and the (position, reason)
+            pairs of the snapshots failing validation.
+    """
+    rejected = []
+    kept = []
+    offer_lists = []
+    bond_values = []
+    anomaly_rows = []
+    with profiler.stage('validate'):
+        for position, data in enumerate(snapshots):
+            try:
+                offers, fidelitybonds, anomalies = validate_snapshot(data)
+            except CORRUPT_SNAPSHOT_ERRORS as e:
+                rejected.append((position, f"{type(e).__name__}: {e}"))
+                continue
+            kept.append(position)
+            offer_lists.append(offers)
+            bond_values.append([bond.get('bond_value', 0) for bond in fidelitybonds])
+            anomaly_rows.append(flatten_anomalies(anomalies))
+
+    n = len(kept)
+    with profiler.stage('flatten'):
+        offer_counts = np.array([len(offers) for offers in offer_lists], dtype=np.int64)
+        profiler.count('offers', int(offer_counts.sum()))
+        ids = np.repeat(np.arange(n), offer_counts)
+        offers = [offer for offers in offer_lists for offer in offers]
+        minsize = np.array([offer.get('minsize', 0) for offer in offers], dtype=np.float64)
+        maxsize = np.array([offer.get('maxsize', 0) for offer in offers], dtype=np.float64)
+        kinds = np.array([_FEE_KINDS.get(offer.get('ordertype', ''), _OTHER) for offer in offers], dtype=np.int8)
+        cjfees, parsed = _parse_fees([offer.get('cjfee', '0') for offer in offers])
+        makers = {}
+        maker_ids = np.array([makers.setdefault(offer.get('counterparty', ''), len(makers)) for offer in offers],
+                             dtype=np.int64)
+        bond_counts = np.array([len(values) for values in bond_values], dtype=np.int64)
+        bonds = np.array([value for values in bond_values for value in values], dtype=np.float64)
+
+    with profiler.stage('compute_statistics'):
+        starts = np.cumsum(offer_counts) - offer_counts
+        relative = kinds == _RELATIVE
+        absolute = kinds == _ABSOLUTE
+        nominal = np.where(minsize > 0, minsize, DEFAULT_NOMINAL_AMOUNT)
+        relative_fees = relative & parsed
+        absolute_fees = absolute & parsed
+        all_fees = np.where(relative_fees, cjfees * nominal, np.where(absolute_fees, cjfees, 0.0))
+
+        relative_counts = np.bincount(ids[relative], minlength=n)
+        absolute_counts = np.bincount(ids[absolute], minlength=n)
+        safe_counts = np.maximum(offer_counts, 1)
+        unique_makers = np.unique(ids * max(len(makers), 1) + maker_ids) // max(len(makers), 1)
+
+        columns = {
+            'timestamp': np.array([timestamps[position] for position in kept], dtype='M8[ns]'),
+            'total_offers': offer_counts,
+            'total_liquidity': np.bincount(ids, weights=maxsize, minlength=n),
+            'all_fees_mean': _segment_mean(ids, all_fees, n),
+            'all_fees_median': _segment_median(ids, all_fees, n),
+            'all_fees_count': offer_counts,
+            'relative_fees_count': relative_counts,
+            'relative_fees_ratio': relative_counts / safe_counts,
+            'relative_fees_satoshis_mean': _segment_mean(ids[relative_fees], (cjfees * nominal)[relative_fees], n),
+            'relative_fees_satoshis_median': _segment_median(ids[relative_fees], (cjfees * nominal)[relative_fees], n),
+            'relative_fees_percentage_mean': _segment_mean(ids[relative_fees], cjfees[relative_fees], n),
+            'relative_fees_percentage_median': _segment_median(ids[relative_fees], cjfees[relative_fees], n),
+            'absolute_fees_count': absolute_counts,
+            'absolute_fees_ratio': absolute_counts / safe_counts,
+            'absolute_fees_satoshis_mean': _segment_mean(ids[absolute_fees], cjfees[absolute_fees], n),
+            'absolute_fees_satoshis_median': _segment_median(ids[absolute_fees], cjfees[absolute_fees], n),
+            'order_size_mean': _segment_mean(ids, maxsize, n),
+            'order_size_median': _segment_median(ids, maxsize, n),
+            'order_size_min': _segment_reduce(np.minimum, starts, offer_counts, minsize),
+            'order_size_max': _segment_reduce(np.maximum, starts, offer_counts, maxsize),
+            'total_unique_makers': np.bincount(unique_makers, minlength=n),
+            'total_fidelity_bonds': bond_counts,
+            'total_bond_value': np.bincount(np.repeat(np.arange(n), bond_counts), weights=bonds, minlength=n),
+        }
+        for name, kind in SNAPSHOT_RECORD_COLUMNS:
+            if name.startswith('anomaly_'):
+                columns[name] = np.array([row[name] for row in anomaly_rows], dtype=np.int64)
+            columns[name] = columns[name].astype(COLUMN_DTYPES[kind], copy=False)
+
+    return {name: columns[name] for name, _ in SNAPSHOT_RECORD_COLUMNS}, rejected
+
+
+def concatenate_batches(batches: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Concatenates the columns of several process_snapshot_batch results.
+
+    Parameters:
+        batches (List[Dict[str, np.ndarray]]): Column dicts, in order.
+
+    Returns:
+        Dict[str, np.ndarray]: The combined columns, empty arrays when there are no batches.
+    """
+    return {
+        name: np.concatenate([batch[name] for batch in batches]) if batches else
+        np.empty(0, dtype=COLUMN_DTYPES[kind])
+        for name, kind in SNAPSHOT_RECORD_COLUMNS
+    }
+
+
+def load_and_process_snapshot_batch(items: List[Tuple[str, datetime]],
+                                    profiler: PipelineProfiler = NULL_PROFILER
+                                    ) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, str]]]:
+    """
+    Loads a batch of snapshots and processes them with process_snapshot_batch.
+
+    Parameters:
+        items (List[Tuple[str, datetime]]): (filepath, timestamp) pairs.
+        profiler (PipelineProfiler): Collects stage timings and counters, disabled by default.
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[Tuple[str, str]]]: The snapshot columns and the
+            (filepath, reason) pairs of the corrupt files.
+    """
+    timestamps = dict(items)
+    filepaths = []
+    snapshots = []
+    quarantine = []
+    contents = iter_snapshot_bytes(timestamps)
+    while True:
+        with profiler.stage('read'):
+            item = next(contents, None)
+        if item is None:
+            break
+        filepath, content = item
+        profiler.count('files')
+        try:
+            if isinstance(content, Exception):
+                raise content
+            profiler.count('bytes', len(content))
+            with profiler.stage('decode'):
+                snapshots.append(json.loads(content))
+            filepaths.append(filepath)
+        except CORRUPT_SNAPSHOT_ERRORS as e:
+            profiler.count('errors')
+            quarantine.append((filepath, f"{type(e).__name__}: {e}"))
+        profiler.log_progress()
+
+    columns, rejected = process_snapshot_batch(snapshots, [timestamps[filepath] for filepath in filepaths], profiler)
+    if rejected:
+        profiler.count('errors', len(rejected))
+        quarantine.extend((filepaths[position], reason) for position, reason in rejected)
+    return columns, quarantine
+
+
+def load_and_process_snapshot_batch_task(task: Tuple[List[Tuple[str, datetime]], bool]
+                                         ) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, str]], Optional[Dict[str, Any]]]:
+    """
+    Worker entry point of the batched parallel ingestion.
+
+    Parameters:
+        task (Tuple[List[Tuple[str, datetime]], bool]): The (filepath, timestamp) pairs and
+            whether to profile.
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[Tuple[str, str]], Optional[Dict[str, Any]]]: The
+            snapshot columns, the quarantined files and the PipelineProfiler.state() of the
+            batch, None when not profiled.
+    """
+    items, profiled = task
+    profiler = PipelineProfiler(log_interval=None) if profiled else NULL_PROFILER
+    columns, quarantine = load_and_process_snapshot_batch(items, profiler)
+    return columns, quarantine, profiler.state() if profiled else None
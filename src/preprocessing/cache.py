@@ -0,0 +1,308 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+
+from .archive import iter_snapshot_bytes
+from .snapshot import CORRUPT_SNAPSHOT_ERRORS
+from .utils import parse_snapshot_datetime
+from .validation import validate_snapshot, SnapshotValidationError
+
+CACHE_VERSION = 2
+
+# Fixed-width records, offers and bonds are stored in snapshot order so any range of
+# snapshots maps to a contiguous slice
+OFFER_DTYPE = np.dtype([
+    ('snapshot', '<u4'),             # Row in the snapshot index
+    ('counterparty', '<u4'),         # Index into the counterparty string table
+    ('oid', '<i4'),                  # -1 when missing or not an integer
+    ('ordertype', '<u2'),            # Index into the ordertype string table
+    ('minsize', '<i8'),
+    ('maxsize', '<i8'),
+    ('txfee', '<i8'),
+    ('cjfee', '<f8'),                # NaN when malformed
+    ('fidelity_bond_value', '<f8'),  # NaN when malformed
+])
+BOND_DTYPE = np.dtype([
+    ('snapshot', '<u4'),
+    ('counterparty', '<u4'),
+    ('bond_value', '<f8'),
+    ('amount', '<i8'),
+    ('locktime', '<i8'),
+])
+SNAPSHOT_DTYPE = np.dtype([
+    ('timestamp', '<M8[ns]'),
+    ('offer_start', '<i8'),
+    ('offer_count', '<i8'),
+    ('bond_start', '<i8'),
+    ('bond_count', '<i8'),
+])
+
+_ARRAY_FILES = {'offers': OFFER_DTYPE, 'bonds': BOND_DTYPE, 'snapshots': SNAPSHOT_DTYPE}
+
+
+class _StringTable:
+    """Assigns consecutive ids to strings in order of first appearance, at most `limit` of them."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.ids = {}
+        self.strings = []
+        self.limit = limit
+
+    def __call__(self, value: Any) -> int:
+        value = '' if value is None else str(value)
+        index = self.ids.get(value)
+        if index is None:
+            if self.limit is not None and len(self.strings) >= self.limit:
+                raise SnapshotValidationError(f"more than {self.limit} distinct values, e.g. {value[:40]!r}")
+            index = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _to_int(value: Any, default: int, bits: int = 64) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return default
+    if not -2 ** (bits - 1) <= value < 2 ** (bits - 1):
+        raise SnapshotValidationError(f"{value} does not fit into a {bits}-bit integer")
+    return int(value)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float('nan')
+
+
+def _offer_records(offers: List[Dict[str, Any]], snapshot: int, counterparties: _StringTable,
+                   ordertypes: _StringTable) -> np.ndarray:
+    records = np.empty(len(offers), dtype=OFFER_DTYPE)
+    records['snapshot'] = snapshot
+    records['counterparty'] = [counterparties(offer.get('counterparty')) for offer in offers]
+    records['oid'] = [_to_int(offer.get('oid'), -1, bits=32) for offer in offers]
+    records['ordertype'] = [ordertypes(offer.get('ordertype')) for offer in offers]
+    records['minsize'] = [_to_int(offer.get('minsize', 0), 0) for offer in offers]
+    records['maxsize'] = [_to_int(offer.get('maxsize', 0), 0) for offer in offers]
+    records['txfee'] = [_to_int(offer.get('txfee', 0), 0) for offer in offers]
+    records['cjfee'] = [_to_float(offer.get('cjfee', '0')) for offer in offers]
+    records['fidelity_bond_value'] = [_to_float(offer.get('fidelity_bond_value', 0)) for offer in offers]
+    return records
+
+
+def _bond_records(bonds: List[Dict[str, Any]], snapshot: int, counterparties: _StringTable) -> np.ndarray:
+    records = np.empty(len(bonds), dtype=BOND_DTYPE)
+    records['snapshot'] = snapshot
+    records['counterparty'] = [counterparties(bond.get('counterparty')) for bond in bonds]
+    records['bond_value'] = [_to_float(bond.get('bond_value', 0)) for bond in bonds]
+    records['amount'] = [_to_int(bond.get('amount', 0), 0) for bond in bonds]
+    records['locktime'] = [_to_int(bond.get('locktime', 0), 0) for bond in bonds]
+    return records
+
+
+def build_snapshot_cache(filepaths: List[str], cache_dir: str,
+                         quarantine: Optional[List[Tuple[str, str]]] = None) -> 'SnapshotCache':
+    """
+    Converts snapshot files into a binary columnar cache readable with numpy.memmap.
+
+    The cache directory holds fixed-width offer and bond records ('offers.bin', 'bonds.bin'),
+    a per-snapshot index of timestamps and record offsets ('snapshots.bin') and the string
+    tables and dtypes in 'meta.json'. It is built in a temporary directory and renamed into
+    place, so an interrupted build never leaves a partial cache behind.
+
+    Snapshots are stored in time order. Corrupt files are skipped like during ingestion and
+    appended to the quarantine list as (filepath, reason) pairs, as are snapshots with values
+    the records cannot hold: integers out of the range of their field or more ordertypes than
+    the ordertype ids can number.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths.
+        cache_dir (str): Directory to create, replaced if it exists.
+        quarantine (Optional[List[Tuple[str, str]]]): List collecting the quarantined files.
+
+    Returns:
+        SnapshotCache: The opened cache.
+    """
+    timestamps = {}
+    for filepath in filepaths:
+        timestamp = parse_snapshot_datetime(filepath)
+        if timestamp is not None:
+            timestamps[filepath] = timestamp
+    # Stable, so bundle members stay consecutive for the single-pass reader
+    ordered = sorted(timestamps, key=timestamps.get)
+
+    tmp_dir = f"{cache_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    counterparties = _StringTable()
+    ordertypes = _StringTable(limit=np.iinfo(OFFER_DTYPE['ordertype']).max + 1)
+    index = []
+    skipped = []
+    n_offers = n_bonds = 0
+    with open(os.path.join(tmp_dir, 'offers.bin'), 'wb') as offers_file, \
+            open(os.path.join(tmp_dir, 'bonds.bin'), 'wb') as bonds_file:
+        for filepath, content in iter_snapshot_bytes(ordered):
+            try:
+                if isinstance(content, Exception):
+                    raise content
+                offers, bonds, _ = validate_snapshot(json.loads(content))
+                offer_records = _offer_records(offers, len(index), counterparties, ordertypes)
+                bond_records = _bond_records(bonds, len(index), counterparties)
+            except CORRUPT_SNAPSHOT_ERRORS as e:
+                skipped.append((filepath, f"{type(e).__name__}: {e}"))
+                continue
+
+            offer_records.tofile(offers_file)
+            bond_records.tofile(bonds_file)
+            index.append((np.datetime64(timestamps[filepath], 'ns'), n_offers, len(offers), n_bonds, len(bonds)))
+            n_offers += len(offers)
+            n_bonds += len(bonds)
+
+    np.array(index, dtype=SNAPSHOT_DTYPE).tofile(os.path.join(tmp_dir, 'snapshots.bin'))
+    meta = {
+        'version': CACHE_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'dtypes': {name: dtype.descr for name, dtype in _ARRAY_FILES.items()},
+        'counts': {'snapshots': len(index), 'offers': n_offers, 'bonds': n_bonds},
+        'counterparties': counterparties.strings,
+        'ordertypes': ordertypes.strings,
+        'quarantine': skipped,
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    if quarantine is not None:
+        quarantine.extend(skipped)
+    return SnapshotCache(cache_dir)
+
+
+class SnapshotCache:
+    """
+    Read-only view of a cache written by build_snapshot_cache.
+
+    All record arrays are memory-mapped, slicing by snapshot or time range returns views
+    into the mapping without reading or copying the rest of the archive.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Parameters:
+            cache_dir (str): Directory written by build_snapshot_cache.
+        """
+        with open(os.path.join(cache_dir, 'meta.json')) as file:
+            meta = json.load(file)
+        if meta.get('version') != CACHE_VERSION:
+            raise ValueError(f"Unsupported snapshot cache version {meta.get('version')} in {cache_dir}")
+
+        self.cache_dir = cache_dir
+        self.counterparties = meta['counterparties']
+        self.ordertypes = meta['ordertypes']
+        self.quarantine = [tuple(entry) for entry in meta['quarantine']]
+
+        arrays = {}
+        for name, dtype in _ARRAY_FILES.items():
+            count = meta['counts'][name]
+            if count == 0:
+                # numpy cannot map an empty file
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(os.path.join(cache_dir, f"{name}.bin"), dtype=dtype, mode='r',
+                                         shape=(count,))
+        self.offers = arrays['offers']
+        self.bonds = arrays['bonds']
+        self.index = arrays['snapshots']
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Snapshot times as datetime64[ns], in ascending order."""
+        return self.index['timestamp']
+
+    def snapshot_range(self, start: Union[str, datetime, None] = None,
+                       end: Union[str, datetime, None] = None) -> slice:
+        """
+        Finds the snapshots taken within a time range.
+
+        Parameters:
+            start (Union[str, datetime, None]): Inclusive start, unbounded if None.
+            end (Union[str, datetime, None]): Exclusive end, unbounded if None.
+
+        Returns:
+            slice: Rows of the snapshot index.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.timestamps, np.datetime64(start, 'ns'), 'left'))
+        last = len(self) if end is None else int(np.searchsorted(self.timestamps, np.datetime64(end, 'ns'), 'left'))
+        return slice(first, max(first, last))
+
+    def _records(self, records: np.ndarray, rows: slice, field: str) -> np.ndarray:
+        rows = range(len(self))[rows]
+        if len(rows) == 0:
+            return records[:0]
+        if rows.step != 1:
+            raise ValueError("Snapshot slices must be contiguous")
+        first, last = self.index[rows.start], self.index[rows[-1]]
+        return records[first[f'{field}_start']:last[f'{field}_start'] + last[f'{field}_count']]
+
+    def snapshot_offers(self, rows: Union[int, slice]) -> np.ndarray:
+        """
+        Offer records of one snapshot or a contiguous slice of snapshots, as a view.
+
+        Parameters:
+            rows (Union[int, slice]): Row or rows of the snapshot index.
+
+        Returns:
+            np.ndarray: Records of OFFER_DTYPE.
+        """
+        if isinstance(rows, int):
+            rows = slice(rows, rows + 1 or None)
+        return self._records(self.offers, rows, 'offer')
+
+    def snapshot_bonds(self, rows: Union[int, slice]) -> np.ndarray:
+        """
+        Fidelity bond records of one snapshot or a contiguous slice of snapshots, as a view.
+
+        Parameters:
+            rows (Union[int, slice]): Row or rows of the snapshot index.
+
+        Returns:
+            np.ndarray: Records of BOND_DTYPE.
+        """
+        if isinstance(rows, int):
+            rows = slice(rows, rows + 1 or None)
+        return self._records(self.bonds, rows, 'bond')
+
+    def offers_between(self, start: Union[str, datetime, None] = None,
+                       end: Union[str, datetime, None] = None) -> np.ndarray:
+        """
+        Offer records of the snapshots taken within a time range, as a view.
+
+        Parameters:
+            start (Union[str, datetime, None]): Inclusive start, unbounded if None.
+            end (Union[str, datetime, None]): Exclusive end, unbounded if None.
+
+        Returns:
+            np.ndarray: Records of OFFER_DTYPE.
+        """
+        return self.snapshot_offers(self.snapshot_range(start, end))
+
+    def offer_timestamps(self, offers: np.ndarray) -> np.ndarray:
+        """Snapshot time of each offer record."""
+        return self.timestamps[offers['snapshot']]
+
+    def counterparty_names(self, ids: np.ndarray) -> np.ndarray:
+        """Maps counterparty ids of offer or bond records back to their nicknames."""
+        return np.asarray(self.counterparties, dtype=object)[ids]
+
+    def ordertype_code(self, ordertype: str) -> int:
+        """Id of an ordertype in the 'ordertype' field, -1 if it never appears in the cache."""
+        try:
+            return self.ordertypes.index(ordertype)
+        except ValueError:
+            return -1
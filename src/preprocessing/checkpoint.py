@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from typing import List, Optional, Set, Tuple
+import pandas as pd
+
+from .dataframe import load_snapshots_to_dataframe
+from .instrumentation import PipelineProfiler
+from .utils import parse_snapshot_datetime
+
+# One day of per-minute snapshots
+DEFAULT_CHUNK_SIZE = 1440
+
+
+def _chunk_digest(filepaths: List[str]) -> str:
+    """Identifies a chunk by the files it covers, so a changed file list is never reused."""
+    return hashlib.sha256('\n'.join(filepaths).encode()).hexdigest()[:16]
+
+
+def _plan_chunks(filepaths: List[str], chunk_size: int) -> List[Tuple[str, List[str]]]:
+    """
+    Splits the snapshots into per-day chunks of at most chunk_size files.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths, files without a timestamp are left out.
+        chunk_size (int): Maximum number of snapshot files per chunk.
+
+    Returns:
+        List[Tuple[str, List[str]]]: ('<YYYY-MM-DD>_<part>', filepaths) of every chunk, in day order.
+    """
+    days = {}
+    for filepath in filepaths:
+        timestamp = parse_snapshot_datetime(filepath)
+        if timestamp is not None:
+            days.setdefault(timestamp.date().isoformat(), []).append(filepath)
+
+    chunks = []
+    for day in sorted(days):
+        day_filepaths = days[day]
+        for part, start in enumerate(range(0, len(day_filepaths), chunk_size)):
+            chunks.append((f"{day}_{part:04d}", day_filepaths[start:start + chunk_size]))
+    return chunks
+
+
+def _remove_superseded_chunks(checkpoint_dir: str, days: Set[str], current: Set[str]):
+    """Deletes the stored chunks of the given days that are not among the current chunk stems."""
+    for name in os.listdir(checkpoint_dir):
+        if not name.startswith('chunk_'):
+            continue
+        stem = name.split('.', 1)[0]
+        if stem.split('_')[1] in days and stem not in current:
+            os.remove(os.path.join(checkpoint_dir, name))
+
+
+def _atomic_write(filepath: str, write):
+    """Writes through a temporary file and renames it, so a killed run never leaves a partial chunk."""
+    tmp_filepath = f"{filepath}.tmp"
+    write(tmp_filepath)
+    os.replace(tmp_filepath, filepath)
+
+
+def ingest_with_checkpoints(filepaths: List[str], checkpoint_dir: str,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                            quarantine: Optional[List[Tuple[str, str]]] = None,
+                            profiler: Optional[PipelineProfiler] = None,
+                            batched: bool = False) -> pd.DataFrame:
+    """
+    Loads snapshots in per-day chunks, storing every completed chunk in the checkpoint directory.
+
+    A chunk holds the snapshots of one day, split into parts of at most chunk_size files, and
+    is stored as 'chunk_<YYYY-MM-DD>_<part>_<digest>.pkl', where the digest covers the
+    filepaths of the chunk. Re-running with the same inputs skips the stored chunks, so an
+    interrupted run resumes from the last completed chunk. Adding or removing files only
+    invalidates the chunks of the affected days, the chunks they supersede are deleted.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths.
+        checkpoint_dir (str): Directory holding the chunk files, created if missing.
+        chunk_size (int): Maximum number of snapshot files per chunk, larger days are split.
+        workers (int): Number of worker processes per chunk.
+        quarantine (Optional[List[Tuple[str, str]]]): List collecting the quarantined files.
+        profiler (Optional[PipelineProfiler]): Collects timings of the processed chunks.
+        batched (bool): Process the snapshots with process_snapshot_batch, see load_snapshots_to_dataframe.
+
+    Returns:
+        pd.DataFrame: DataFrame containing computed analysis for each snapshot.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    if quarantine is None:
+        quarantine = []
+
+    chunks = []
+    planned = _plan_chunks(filepaths, chunk_size)
+    stems = [f"chunk_{key}_{_chunk_digest(chunk_filepaths)}" for key, chunk_filepaths in planned]
+    for index, (key, chunk_filepaths) in enumerate(planned):
+        stem = os.path.join(checkpoint_dir, stems[index])
+
+        if os.path.exists(f"{stem}.pkl"):
+            with open(f"{stem}.quarantine.json") as file:
+                quarantine.extend(tuple(entry) for entry in json.load(file))
+            chunks.append(pd.read_pickle(f"{stem}.pkl"))
+            continue
+
+        chunk_quarantine = []
+        df_chunk = load_snapshots_to_dataframe(chunk_filepaths, chunk_quarantine, workers, profiler, batched)
+
+        # The pickle marks the chunk as complete, so it is written last
+        def write_quarantine(path):
+            with open(path, 'w') as file:
+                json.dump(chunk_quarantine, file)
+
+        _atomic_write(f"{stem}.quarantine.json", write_quarantine)
+        _atomic_write(f"{stem}.pkl", df_chunk.to_pickle)
+        print(f"Checkpointed chunk {key} ({index + 1}/{len(planned)}, {len(df_chunk)} snapshots)")
+
+        quarantine.extend(chunk_quarantine)
+        chunks.append(df_chunk)
+
+    _remove_superseded_chunks(checkpoint_dir, {key.split('_')[0] for key, _ in planned}, set(stems))
+
+    if not chunks:
+        return load_snapshots_to_dataframe([])
+
+    df_stats = pd.concat(chunks)
+    df_stats.sort_index(inplace=True)
+    return df_stats
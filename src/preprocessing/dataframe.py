@@ -1,7 +1,17 @@
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
 import pandas as pd
 
-from .snapshot import load_and_process_snapshot
+from .archive import split_bundle_path
+from .batch import load_and_process_snapshot_batch, load_and_process_snapshot_batch_task, concatenate_batches
+from .instrumentation import PipelineProfiler, NULL_PROFILER
+from .shared import SharedResultTable, COLUMN_DTYPES
+from .snapshot import load_and_process_snapshots, load_and_process_snapshots_shared, SNAPSHOT_RECORD_COLUMNS
+from .utils import parse_snapshot_datetime
+
+# Number of plain snapshot files handed to a worker at once, bundles are never split
+BATCH_SIZE = 64
 
 
 def save_dataframe(df: pd.DataFrame, filepath: str):
@@ -35,7 +45,8 @@ def extract_timestamp_from_filepath(filepath: str) -> pd.Timestamp:
     """
     Extracts a timestamp from the filepath.
 
-    Assumes the filepath is of the format: 'data/YYYY-MM-DD/orderbook_HH-MM.json'
+    Assumes the filepath is of the format: 'data/YYYY-MM-DD/orderbook_HH-MM.json',
+    see utils.SNAPSHOT_PATH_PATTERN for the compressed and bundled variants.
 
     Parameters:
         filepath (str): The full path to the snapshot file.
@@ -43,42 +54,137 @@ def extract_timestamp_from_filepath(filepath: str) -> pd.Timestamp:
     Returns:
         pd.Timestamp: The extracted timestamp.
     """
-    import re
-    from datetime import datetime
-
-    # Adjust the regex pattern to match the new filepath format
-    pattern = r'.*/(\d{4}-\d{2}-\d{2})/orderbook_(\d{2}-\d{2}).json$'
-    match = re.match(pattern, filepath)
-    if match:
-        date_str = match.group(1)      # Extracts 'YYYY-MM-DD'
-        time_str = match.group(2)      # Extracts 'HH-MM'
-        datetime_str = f"{date_str} {time_str}"
-        timestamp = datetime.strptime(datetime_str, '%Y-%m-%d %H-%M')
-        return pd.Timestamp(timestamp)
-    else:
+    timestamp = parse_snapshot_datetime(filepath)
+    if timestamp is None:
         # If no timestamp found, return NaT (Not a Time)
         return pd.NaT
+    return pd.Timestamp(timestamp)
 
 
-def load_snapshots_to_dataframe(filepaths: List[str]) -> pd.DataFrame:
+def _plan_batches(items: List[Tuple[str, datetime]],
+                  batch_size: int = BATCH_SIZE) -> List[List[Tuple[str, datetime]]]:
+    """
+    Splits the snapshots into worker batches, keeping the members of a bundle together.
+
+    Parameters:
+        items (List[Tuple[str, datetime]]): (filepath, timestamp) pairs.
+        batch_size (int): Preferred number of snapshots per batch.
+
+    Returns:
+        List[List[Tuple[str, datetime]]]: The batches, in input order.
+    """
+    batches = []
+    batch = []
+    previous_bundle = None
+    for item in items:
+        bundle_path, _ = split_bundle_path(item[0])
+        same_bundle = bundle_path is not None and bundle_path == previous_bundle
+        if len(batch) >= batch_size and not same_bundle:
+            batches.append(batch)
+            batch = []
+        batch.append(item)
+        previous_bundle = bundle_path
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def load_snapshots_to_dataframe(filepaths: List[str],
+                                quarantine: Optional[List[Tuple[str, str]]] = None,
+                                workers: int = 1,
+                                profiler: Optional[PipelineProfiler] = None,
+                                batched: bool = False) -> pd.DataFrame:
     """
     Loads and processes snapshots from a list of filepaths to create a DataFrame.
 
+    Corrupt files (truncated JSON, unreadable files, snapshots failing validation) are
+    skipped instead of aborting the run. Each skipped file is appended to the quarantine
+    list as a (filepath, reason) pair.
+
     Parameters:
         filepaths (List[str]): List of snapshot filepaths.
+        quarantine (Optional[List[Tuple[str, str]]]): List collecting the quarantined files.
+        workers (int): Number of worker processes, 1 processes the files in this process.
+        profiler (Optional[PipelineProfiler]): Collects per-stage timings, counters and
+            progress logs of the run. Instrumentation is disabled when None.
+        batched (bool): Process the snapshots of every batch with one vectorized
+            process_snapshot_batch call. With workers > 1 the batches are processed in the
+            worker processes, which send back the column arrays instead of using the shared table.
 
     Returns:
         pd.DataFrame: DataFrame containing computed analysis for each snapshot.
     """
-    records = []
+    if quarantine is None:
+        quarantine = []
+    quarantined_before = len(quarantine)
+    if profiler is None:
+        profiler = NULL_PROFILER
+
+    # Plain datetimes, so workers can unpickle them without importing pandas
+    items = []
     for filepath in filepaths:
-        timestamp = extract_timestamp_from_filepath(filepath)
-        if pd.isnull(timestamp):
+        timestamp = parse_snapshot_datetime(filepath)
+        if timestamp is None:
             continue  # Skip files without a valid timestamp
-        snapshot_stats = load_and_process_snapshot(filepath, timestamp)
-        records.append(snapshot_stats)
-
-    df_stats = pd.DataFrame(records)
-    df_stats.set_index('timestamp', inplace=True)
-    df_stats.sort_index(inplace=True)
-    return df_stats
\ No newline at end of file
+        items.append((filepath, timestamp))
+
+    profiler.start(total=len(items))
+    if batched:
+        # Every batch comes back as a few compact arrays, so there are no records to pickle
+        tasks = [(batch, profiler.enabled) for batch in _plan_batches(items)]
+        batches = []
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for columns, batch_quarantine, state in executor.map(load_and_process_snapshot_batch_task, tasks):
+                    batches.append(columns)
+                    quarantine.extend(batch_quarantine)
+                    if state is not None:
+                        profiler.merge(state)
+                        profiler.log_progress()
+        else:
+            for batch, _ in tasks:
+                columns, batch_quarantine = load_and_process_snapshot_batch(batch, profiler)
+                batches.append(columns)
+                quarantine.extend(batch_quarantine)
+        with profiler.stage('dataframe'):
+            df_stats = pd.DataFrame(concatenate_batches(batches)).set_index('timestamp')
+            if not df_stats.index.is_monotonic_increasing:
+                df_stats.sort_index(inplace=True)
+    elif workers > 1:
+        # Workers write their records straight into a shared table instead of pickling them back
+        table = SharedResultTable(SNAPSHOT_RECORD_COLUMNS, len(items))
+        tasks = []
+        offset = 0
+        for batch in _plan_batches(items):
+            tasks.append((table.spec, offset, batch, profiler.enabled))
+            offset += len(batch)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for batch_quarantine, state in executor.map(load_and_process_snapshots_shared, tasks):
+                    quarantine.extend(batch_quarantine)
+                    if state is not None:
+                        profiler.merge(state)
+                        profiler.log_progress()
+            with profiler.stage('dataframe'):
+                df_stats = table.to_dataframe()
+                if not df_stats.index.is_monotonic_increasing:
+                    df_stats.sort_index(inplace=True)
+        finally:
+            table.close()
+    else:
+        records, batch_quarantine = load_and_process_snapshots(items, profiler)
+        quarantine.extend(batch_quarantine)
+        with profiler.stage('dataframe'):
+            # Same schema and dtypes as the shared table and the batched path
+            df_stats = pd.DataFrame(records, columns=[name for name, _ in SNAPSHOT_RECORD_COLUMNS])
+            df_stats = df_stats.astype({name: COLUMN_DTYPES[kind] for name, kind in SNAPSHOT_RECORD_COLUMNS})
+            df_stats.set_index('timestamp', inplace=True)
+            df_stats.sort_index(inplace=True)
+
+    quarantined = len(quarantine) - quarantined_before
+    if quarantined:
+        print(f"Quarantined {quarantined} corrupt snapshot files")
+
+    profiler.stop()
+    profiler.log_progress(force=True)
+    return df_stats
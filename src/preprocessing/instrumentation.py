@@ -0,0 +1,176 @@
+import cProfile
+import json
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Dict, Any, Optional
+
+
+class PipelineProfiler:
+    """
+    Collects per-stage timings, counters and progress of an ingestion run.
+
+    Stages are timed with `with profiler.stage('name'):`, counters are increased with
+    `profiler.count('name', n)`. The standard counters are 'files', 'bytes', 'offers'
+    and 'errors'. Profilers of worker processes are combined with merge().
+    """
+    enabled = True
+
+    def __init__(self, log_interval: Optional[float] = 30.0, cprofile: bool = False):
+        """
+        Parameters:
+            log_interval (Optional[float]): Seconds between progress logs, None disables them.
+            cprofile (bool): Also run cProfile between start() and stop().
+        """
+        self.log_interval = log_interval
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.total = None
+        self._profile = cProfile.Profile() if cprofile else None
+        self._started = None
+        self._stopped = None
+        self._last_log = None
+
+    def start(self, total: Optional[int] = None):
+        """
+        Starts the run clock, total is the expected number of files for progress logs.
+
+        Starting again after stop() continues the same run, e.g. for checkpointed chunks.
+        """
+        if self._started is None:
+            self.total = total
+            self._started = self._last_log = perf_counter()
+        elif total is not None:
+            self.total = (self.total or 0) + total
+        self._stopped = None
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self):
+        """Stops the run clock and cProfile."""
+        if self._profile is not None:
+            self._profile.disable()
+        self._stopped = perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block and adds it to the named stage."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += perf_counter() - start
+            self.calls[name] += 1
+
+    def count(self, name: str, value: int = 1):
+        """Increases the named counter."""
+        self.counters[name] += value
+
+    @property
+    def elapsed(self) -> float:
+        if self._started is None:
+            return 0.0
+        return (self._stopped or perf_counter()) - self._started
+
+    def log_progress(self, force: bool = False):
+        """Prints files, bytes and offers processed with throughput, at most every log_interval."""
+        if self.log_interval is None or self._started is None:
+            return
+        now = perf_counter()
+        if not force and now - self._last_log < self.log_interval:
+            return
+        self._last_log = now
+
+        elapsed = max(now - self._started, 1e-9)
+        files = self.counters['files']
+        megabytes = self.counters['bytes'] / 1e6
+        done = f"{files}/{self.total} files ({files / self.total:.1%})" if self.total else f"{files} files"
+        print(f"[ingest] {done}, {files / elapsed:.1f} files/s, {megabytes / elapsed:.1f} MB/s, "
+              f"{self.counters['offers']} offers, {self.counters['errors']} errors, {elapsed:.0f}s elapsed")
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the picklable timings and counters, e.g. to send from a worker process."""
+        return {
+            'timings': dict(self.timings),
+            'calls': dict(self.calls),
+            'counters': dict(self.counters),
+        }
+
+    def merge(self, state: Dict[str, Dict[str, Any]]):
+        """Adds the timings and counters of another profiler's state()."""
+        for name, seconds in state['timings'].items():
+            self.timings[name] += seconds
+        for name, calls in state['calls'].items():
+            self.calls[name] += calls
+        for name, value in state['counters'].items():
+            self.counters[name] += value
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarizes the run.
+
+        Stage times of worker processes are summed, so with several workers the stage
+        total can exceed the elapsed wall time.
+
+        Returns:
+            Dict[str, Any]: Elapsed time, per-stage seconds and calls, counters and throughput.
+        """
+        elapsed = self.elapsed
+        return {
+            'elapsed_seconds': elapsed,
+            'stages': {
+                name: {'seconds': self.timings[name], 'calls': self.calls[name]}
+                for name in self.timings
+            },
+            'counters': dict(self.counters),
+            'throughput': {
+                f'{name}_per_second': (value / elapsed if elapsed > 0 else 0.0)
+                for name, value in self.counters.items()
+            },
+        }
+
+    def export(self, filepath: str, pstats_filepath: Optional[str] = None):
+        """
+        Writes the summary as JSON and, if cProfile was enabled, the pstats data.
+
+        Parameters:
+            filepath (str): Path of the JSON summary.
+            pstats_filepath (Optional[str]): Path of the cProfile output, readable by pstats.Stats.
+        """
+        with open(filepath, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+        if pstats_filepath is not None:
+            if self._profile is None:
+                raise ValueError("cProfile output requested, but the profiler was created with cprofile=False")
+            self._profile.dump_stats(pstats_filepath)
+
+
+class NullProfiler(PipelineProfiler):
+    """Profiler stand-in used when instrumentation is disabled, every call is a no-op."""
+    enabled = False
+    _stage = nullcontext()
+
+    def __init__(self):
+        super().__init__(log_interval=None)
+
+    def start(self, total: Optional[int] = None):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name: str):
+        return self._stage
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def log_progress(self, force: bool = False):
+        pass
+
+    def merge(self, state: Dict[str, Dict[str, Any]]):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,167 @@
+import mmap
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+
+# Workers import this module, so numpy and pandas are only imported on the parent side
+
+_EPOCH = datetime(1970, 1, 1)
+_ITEM_SIZE = 8  # Every column is stored as int64 or float64
+
+# Column kinds of a result table
+INT, FLOAT, DATETIME = 'int', 'float', 'datetime'
+# dtype of every column kind in the DataFrame of to_dataframe
+COLUMN_DTYPES = {INT: 'int64', FLOAT: 'float64', DATETIME: 'datetime64[ns]'}
+
+
+class ResultTableSpec(NamedTuple):
+    """Picklable description of a shared result table, sent to the workers."""
+    path: str
+    n_rows: int
+    columns: Tuple[Tuple[str, str], ...]  # (name, kind) pairs, the first column is the row-valid flag
+
+
+def _default_directory(size: int) -> str:
+    """
+    /dev/shm when it has room for the table, the temp directory otherwise.
+
+    /dev/shm is RAM backed on Linux, but often small (64 MB in a default Docker container)
+    and writing past its free space kills the workers with SIGBUS. Elsewhere the OS page
+    cache keeps a temp file in memory.
+    """
+    try:
+        stat = os.statvfs('/dev/shm')
+    except (OSError, AttributeError):
+        return tempfile.gettempdir()
+    # Keep headroom for the other users of the shared memory
+    return '/dev/shm' if stat.f_bavail * stat.f_frsize >= 2 * size else tempfile.gettempdir()
+
+
+class ResultTableWriter:
+    """
+    Worker side of a shared result table, writes records at preassigned rows.
+
+    The table is column-major: every column is a contiguous run of n_rows 8-byte values,
+    so the parent can wrap each column as an array without copying.
+    """
+
+    def __init__(self, spec: ResultTableSpec):
+        self.spec = spec
+        self._file = open(spec.path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._ints = memoryview(self._mmap).cast('q')
+        self._floats = memoryview(self._mmap).cast('d')
+        self._columns = [
+            (name, kind, index * spec.n_rows) for index, (name, kind) in enumerate(spec.columns)
+        ]
+
+    def write(self, row: int, record: Dict[str, Any]):
+        """
+        Writes a record into a row of the table.
+
+        Parameters:
+            row (int): Preassigned row of the record.
+            record (Dict[str, Any]): Values by column name, missing columns are left at 0.
+        """
+        for name, kind, offset in self._columns[1:]:
+            value = record.get(name)
+            if value is None:
+                continue
+            if kind == FLOAT:
+                self._floats[offset + row] = float(value)
+            elif kind == INT:
+                self._ints[offset + row] = int(value)
+            else:
+                self._ints[offset + row] = (value - _EPOCH) // timedelta(microseconds=1) * 1000
+        # Mark the row as written
+        self._ints[row] = 1
+
+    def close(self):
+        self._ints.release()
+        self._floats.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ResultTableWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SharedResultTable:
+    """
+    Fixed-schema numeric table in a memory-mapped file, filled by worker processes.
+
+    The parent allocates the table and sends `spec` to the workers, which write their
+    records with a ResultTableWriter at preassigned row offsets. to_dataframe() then wraps
+    the columns as a DataFrame without copying or pickling any per-row data.
+    """
+
+    def __init__(self, columns: List[Tuple[str, str]], n_rows: int, directory: Optional[str] = None):
+        """
+        Parameters:
+            columns (List[Tuple[str, str]]): (name, kind) pairs, kind is 'int', 'float' or 'datetime'.
+            n_rows (int): Number of rows to allocate.
+            directory (Optional[str]): Where to place the backing file, /dev/shm if it has room.
+        """
+        all_columns = (('_valid', INT),) + tuple(columns)
+        size = max(len(all_columns) * n_rows * _ITEM_SIZE, 1)
+        path = os.path.join(directory or _default_directory(size), f"jm-results-{uuid.uuid4().hex}.bin")
+        with open(path, 'wb') as file:
+            # Sparse, zero-filled: unwritten rows read as invalid
+            file.truncate(size)
+        self.spec = ResultTableSpec(path, n_rows, all_columns)
+
+    def to_dataframe(self, index_column: Optional[str] = 'timestamp'):
+        """
+        Wraps the filled table as a DataFrame backed by the shared memory.
+
+        Rows that no worker wrote are dropped, which copies the table only if such rows exist.
+        The backing file is unlinked, the mapping lives as long as the DataFrame.
+
+        Parameters:
+            index_column (Optional[str]): Column to use as the index.
+
+        Returns:
+            pd.DataFrame: The result table.
+        """
+        import numpy as np
+        import pandas as pd
+
+        n_rows = self.spec.n_rows
+        if n_rows == 0:
+            data = np.zeros((len(self.spec.columns), 0), dtype=np.int64)
+        else:
+            data = np.memmap(self.spec.path, dtype=np.int64, mode='r+', shape=(len(self.spec.columns), n_rows))
+        self.close()
+
+        columns = {}
+        for index, (name, kind) in enumerate(self.spec.columns):
+            if kind == FLOAT:
+                columns[name] = data[index].view(np.float64)
+            elif kind == DATETIME:
+                columns[name] = data[index].view('M8[ns]')
+            else:
+                columns[name] = data[index]
+        valid = columns.pop('_valid').astype(bool)
+
+        index = None
+        if index_column is not None:
+            index = pd.DatetimeIndex(columns.pop(index_column), name=index_column, copy=False)
+        df = pd.DataFrame(columns, index=index, copy=False)
+        if not valid.all():
+            df = df[valid]
+        return df
+
+    def close(self):
+        """Removes the backing file, existing mappings stay valid on POSIX systems."""
+        try:
+            os.unlink(self.spec.path)
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            # Windows cannot unlink a mapped file, it is left in the temp directory
+            pass
@@ -1,24 +1,60 @@
 import json
 from collections import defaultdict
+from datetime import datetime
 from statistics import mean, median
 
-import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Callable, Optional
+
+from .archive import read_snapshot_bytes, iter_snapshot_bytes
+from .instrumentation import PipelineProfiler, NULL_PROFILER
+from .shared import ResultTableSpec, ResultTableWriter, INT, FLOAT, DATETIME
+from .validation import validate_snapshot, flatten_anomalies, SnapshotValidationError, ANOMALY_KINDS
+
+# Errors that mark a single snapshot file as corrupt rather than aborting the whole run
+CORRUPT_SNAPSHOT_ERRORS = (json.JSONDecodeError, UnicodeDecodeError, SnapshotValidationError, OSError)
+
+# Fixed schema of the flattened snapshot record, see process_snapshot_data
+SNAPSHOT_RECORD_COLUMNS = [
+    ('timestamp', DATETIME),
+    ('total_offers', INT),
+    ('total_liquidity', FLOAT),
+    ('all_fees_mean', FLOAT),
+    ('all_fees_median', FLOAT),
+    ('all_fees_count', INT),
+    ('relative_fees_count', INT),
+    ('relative_fees_ratio', FLOAT),
+    ('relative_fees_satoshis_mean', FLOAT),
+    ('relative_fees_satoshis_median', FLOAT),
+    ('relative_fees_percentage_mean', FLOAT),
+    ('relative_fees_percentage_median', FLOAT),
+    ('absolute_fees_count', INT),
+    ('absolute_fees_ratio', FLOAT),
+    ('absolute_fees_satoshis_mean', FLOAT),
+    ('absolute_fees_satoshis_median', FLOAT),
+    ('order_size_mean', FLOAT),
+    ('order_size_median', FLOAT),
+    ('order_size_min', FLOAT),
+    ('order_size_max', FLOAT),
+    ('total_unique_makers', INT),
+    ('total_fidelity_bonds', INT),
+    ('total_bond_value', FLOAT),
+] + [(f'anomaly_{kind}', INT) for kind in ANOMALY_KINDS] + [('anomaly_total', INT)]
 
 
 def load_data(filepath: str) -> Dict[str, Any]:
     """
     Loads JSON data from a given file path.
 
+    The file may be gzip (.json.gz) or zstd (.json.zst) compressed, or be a member of a
+    per-day bundle, see archive.read_snapshot_bytes.
+
     Parameters:
         filepath (str): The path to the JSON file.
 
     Returns:
         Dict[str, Any]: The parsed JSON data as a dictionary.
     """
-    with open(filepath, 'r') as file:
-        data = json.load(file)
-    return data
+    return json.loads(read_snapshot_bytes(filepath))
 
 
 def process_offers(offers: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -102,6 +138,12 @@ def process_offers(offers: List[Dict[str, Any]]) -> Dict[str, Any]:
     return stats
 
 
+def _median(values: List[float]) -> float:
+    """Median of the values that are not NaN, which have no place in a sort, 0 if none are left."""
+    values = [value for value in values if value == value]
+    return median(values) if values else 0
+
+
 def compute_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
     """
     Computes statistical measures from the processed offer data.
@@ -138,7 +180,7 @@ def compute_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
         # Combined fee analysis (in satoshis)
         'all_fees': {
             'mean': mean(all_fees) if all_fees else 0,
-            'median': median(all_fees) if all_fees else 0,
+            'median': _median(all_fees),
             'count': len(all_fees),
         },
 
@@ -148,11 +190,11 @@ def compute_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
             'ratio': fee_ratios.get('sw0reloffer', 0),
             'satoshis': {
                 'mean': mean(relative_fees_satoshis) if relative_fees_satoshis else 0,
-                'median': median(relative_fees_satoshis) if relative_fees_satoshis else 0,
+                'median': _median(relative_fees_satoshis),
             },
             'percentages': {
                 'mean': mean(relative_fees_ratios) if relative_fees_ratios else 0,
-                'median': median(relative_fees_ratios) if relative_fees_ratios else 0,
+                'median': _median(relative_fees_ratios),
             }
         },
 
@@ -162,14 +204,14 @@ def compute_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
             'ratio': fee_ratios.get('sw0absoffer', 0),
             'satoshis': {
                 'mean': mean(absolute_fees) if absolute_fees else 0,
-                'median': median(absolute_fees) if absolute_fees else 0,
+                'median': _median(absolute_fees),
             }
         },
 
         # Order size analysis
         'order_sizes': {
             'mean': mean(order_sizes) if order_sizes else 0,
-            'median': median(order_sizes) if order_sizes else 0,
+            'median': _median(order_sizes),
             'min': min(min_order_sizes) if min_order_sizes else 0,
             'max': max(max_order_sizes) if max_order_sizes else 0,
         },
@@ -200,27 +242,134 @@ def process_fidelity_bonds(fidelitybonds: List[Dict[str, Any]]) -> Dict[str, Any
     }
 
 
-def load_and_process_snapshot(filepath: str, timestamp: pd.Timestamp) -> Dict[str, Any]:
+def load_and_process_snapshot(filepath: str, timestamp: datetime) -> Dict[str, Any]:
     """
     Loads and processes a single snapshot file.
 
     Parameters:
         filepath (str): Path to the snapshot file.
-        timestamp (pd.Timestamp): Timestamp of the snapshot.
+        timestamp (datetime): Timestamp of the snapshot, e.g. a pd.Timestamp.
 
     Returns:
         Dict[str, Any]: Flattened analysis for the snapshot, suitable for pandas DataFrame.
+
+    Raises:
+        ValueError: If the file is not valid JSON or fails validation
+            (SnapshotValidationError).
+        OSError: If the file cannot be read, including SnapshotArchiveError for a corrupt
+            compressed file or bundle.
     """
     data = load_data(filepath)
-    offers = data.get('offers', [])
-    fidelitybonds = data.get('fidelitybonds', [])
+    return process_snapshot_data(data, timestamp)
+
+
+def load_and_process_snapshots(items: List[Tuple[str, datetime]],
+                               profiler: PipelineProfiler = NULL_PROFILER,
+                               sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                               ) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Loads and processes a batch of snapshots, reading each bundle in a single pass.
+
+    This is the unit of work of the parallel ingestion, so decompression and parsing of
+    one batch overlap with the other workers.
+
+    Parameters:
+        items (List[Tuple[str, datetime]]): (filepath, timestamp) pairs.
+        profiler (PipelineProfiler): Collects stage timings and counters, disabled by default.
+        sink (Optional[Callable[[str, Dict[str, Any]], None]]): Receives each (filepath, record)
+            instead of collecting the records in the returned list.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]: The snapshot analysis records
+            and the (filepath, reason) pairs of the corrupt files.
+    """
+    timestamps = dict(items)
+    records = []
+    quarantine = []
+    contents = iter_snapshot_bytes(timestamps)
+    while True:
+        with profiler.stage('read'):
+            item = next(contents, None)
+        if item is None:
+            break
+        filepath, content = item
+        profiler.count('files')
+        try:
+            if isinstance(content, Exception):
+                raise content
+            profiler.count('bytes', len(content))
+            with profiler.stage('decode'):
+                data = json.loads(content)
+            record = process_snapshot_data(data, timestamps[filepath], profiler)
+        except CORRUPT_SNAPSHOT_ERRORS as e:
+            profiler.count('errors')
+            quarantine.append((filepath, f"{type(e).__name__}: {e}"))
+        else:
+            if sink is None:
+                records.append(record)
+            else:
+                sink(filepath, record)
+        profiler.log_progress()
+    return records, quarantine
+
+
+def load_and_process_snapshots_shared(task: Tuple[ResultTableSpec, int, List[Tuple[str, datetime]], bool]
+                                      ) -> Tuple[List[Tuple[str, str]], Optional[Dict[str, Any]]]:
+    """
+    Worker entry point writing the records of a batch straight into a shared result table.
+
+    Only the quarantined files and the profiler state are sent back to the parent, the
+    records never get pickled.
+
+    Parameters:
+        task (Tuple[ResultTableSpec, int, List[Tuple[str, datetime]], bool]): The table, the
+            first row of the batch, the (filepath, timestamp) pairs and whether to profile.
+
+    Returns:
+        Tuple[List[Tuple[str, str]], Optional[Dict[str, Any]]]: The quarantined files and the
+            PipelineProfiler.state() of the batch, None when not profiled.
+    """
+    spec, offset, items, profiled = task
+    profiler = PipelineProfiler(log_interval=None) if profiled else NULL_PROFILER
+    rows = {filepath: offset + position for position, (filepath, _) in enumerate(items)}
+
+    with ResultTableWriter(spec) as writer:
+        def write(filepath, record):
+            with profiler.stage('write'):
+                writer.write(rows[filepath], record)
+
+        _, quarantine = load_and_process_snapshots(items, profiler, sink=write)
+    return quarantine, profiler.state() if profiled else None
+
+
+def process_snapshot_data(data: Dict[str, Any], timestamp: datetime,
+                          profiler: PipelineProfiler = NULL_PROFILER) -> Dict[str, Any]:
+    """
+    Validates and processes an already decoded snapshot.
+
+    Parameters:
+        data (Dict[str, Any]): The decoded snapshot JSON.
+        timestamp (datetime): Timestamp of the snapshot, e.g. a pd.Timestamp.
+        profiler (PipelineProfiler): Collects stage timings and counters, disabled by default.
+
+    Returns:
+        Dict[str, Any]: Flattened analysis for the snapshot, including the anomaly counts.
+
+    Raises:
+        SnapshotValidationError: If the snapshot is structurally corrupt.
+    """
+    with profiler.stage('validate'):
+        offers, fidelitybonds, anomalies = validate_snapshot(data)
+    profiler.count('offers', len(offers))
 
     # Process offers and fidelity bonds
-    offer_stats_raw = process_offers(offers)
-    fidelity_stats = process_fidelity_bonds(fidelitybonds)
+    with profiler.stage('process_offers'):
+        offer_stats_raw = process_offers(offers)
+        fidelity_stats = process_fidelity_bonds(fidelitybonds)
 
     # Compute analysis
-    offer_stats = compute_statistics(offer_stats_raw)
+    with profiler.stage('compute_statistics'):
+        offer_stats = compute_statistics(offer_stats_raw)
 
     # Create flattened snapshot stats
     snapshot_stats = {
@@ -259,6 +408,9 @@ def load_and_process_snapshot(filepath: str, timestamp: pd.Timestamp) -> Dict[st
         'total_bond_value': fidelity_stats['total_bond_value'],
     }
 
+    # Data quality
+    snapshot_stats.update(flatten_anomalies(anomalies))
+
     return snapshot_stats
 
 
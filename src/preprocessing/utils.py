@@ -1,11 +1,29 @@
 import os
-from typing import List
+import random
+import re
+from itertools import groupby
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from .archive import is_snapshot_name, is_bundle_name, list_bundle_members
+
+# 'data/YYYY-MM-DD/orderbook_HH-MM.json', also compressed files and members of per-day
+# bundles, e.g. 'data/YYYY-MM-DD.tar.gz/orderbook_HH-MM.json.gz'
+SNAPSHOT_PATH_PATTERN = re.compile(
+    r'.*/(\d{4}-\d{2}-\d{2})(?:\.(?:tar|tar\.gz|tgz|tar\.zst|zip))?/(?:.*/)?'
+    r'orderbook_(\d{2}-\d{2})\.json(?:\.gz|\.zst)?$')
+
+_EPOCH = datetime(1970, 1, 1)
 
 
 def get_snapshot_filepaths(directory_path: str) -> List[str]:
     """
     Traverses the directory containing daily snapshot directories to get a list of snapshot filepaths.
 
+    Snapshots may be plain or compressed (.json.gz, .json.zst). A day may also be stored as
+    a single bundle ('YYYY-MM-DD.tar', '.tar.gz', '.tgz', '.tar.zst' or '.zip'), whose
+    members are returned as '<bundle path>/<member name>' paths.
+
     Parameters:
         directory_path (str): The root directory containing daily snapshot directories.
 
@@ -19,7 +37,127 @@ def get_snapshot_filepaths(directory_path: str) -> List[str]:
         if os.path.isdir(full_date_dir):
             # List files in the date directory
             for filename in sorted(os.listdir(full_date_dir)):
-                if filename.endswith('.json'):
+                if is_snapshot_name(filename):
                     filepath = os.path.join(full_date_dir, filename)
                     snapshot_filepaths.append(filepath)
-    return snapshot_filepaths
\ No newline at end of file
+        elif is_bundle_name(date_dir):
+            snapshot_filepaths.extend(list_bundle_members(full_date_dir))
+    return snapshot_filepaths
+
+
+def parse_snapshot_datetime(filepath: str) -> Optional[datetime]:
+    """
+    Parses the snapshot time from a filepath of the format 'data/YYYY-MM-DD/orderbook_HH-MM.json'.
+
+    Parameters:
+        filepath (str): The full path to the snapshot file.
+
+    Returns:
+        Optional[datetime]: The snapshot time, None if the filepath has no timestamp.
+    """
+    match = SNAPSHOT_PATH_PATTERN.match(filepath)
+    if match is None:
+        return None
+    return datetime.strptime(f"{match.group(1)} {match.group(2)}", '%Y-%m-%d %H-%M')
+
+
+def filter_filepaths_by_date(filepaths: List[str], start_date: Optional[str] = None,
+                             end_date: Optional[str] = None) -> List[str]:
+    """
+    Keeps the snapshots taken between two dates, using only the filepaths.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths.
+        start_date (Optional[str]): First included day as 'YYYY-MM-DD', unbounded if None.
+        end_date (Optional[str]): Last included day as 'YYYY-MM-DD', unbounded if None.
+
+    Returns:
+        List[str]: The filepaths within the date range, in their original order.
+    """
+    selected = []
+    for filepath in filepaths:
+        match = SNAPSHOT_PATH_PATTERN.match(filepath)
+        if match is None:
+            continue
+        # ISO dates compare correctly as strings
+        date = match.group(1)
+        if (start_date is None or date >= start_date) and (end_date is None or date <= end_date):
+            selected.append(filepath)
+    return selected
+
+
+def _bucketed_filepaths(filepaths: List[str], bucket_minutes: int) -> List[Tuple[int, str]]:
+    """Pairs every timestamped filepath with the index of its time bucket since the epoch."""
+    bucketed = []
+    for filepath in filepaths:
+        timestamp = parse_snapshot_datetime(filepath)
+        if timestamp is None:
+            continue
+        minutes = (timestamp - _EPOCH) // timedelta(minutes=1)
+        bucketed.append((minutes // bucket_minutes, filepath))
+    return bucketed
+
+
+def sample_every_nth(filepaths: List[str], n: int) -> List[str]:
+    """
+    Keeps every n-th snapshot, starting with the first one.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths, in time order.
+        n (int): Sampling step, 1 keeps every snapshot.
+
+    Returns:
+        List[str]: The sampled filepaths.
+    """
+    if n < 1:
+        raise ValueError(f"Sampling step must be positive, got {n}")
+    return filepaths[::n]
+
+
+def sample_per_bucket(filepaths: List[str], bucket_minutes: int) -> List[str]:
+    """
+    Keeps the first snapshot of every time bucket, e.g. one per 15 minutes.
+
+    Buckets are aligned to midnight for bucket lengths dividing a day, so the sample does
+    not depend on the first file. Only the filenames are used, no file is opened.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths, in time order.
+        bucket_minutes (int): Bucket length in minutes.
+
+    Returns:
+        List[str]: The sampled filepaths, in their original order.
+    """
+    if bucket_minutes < 1:
+        raise ValueError(f"Bucket length must be positive, got {bucket_minutes}")
+    return [next(stratum)[1] for _, stratum in groupby(_bucketed_filepaths(filepaths, bucket_minutes),
+                                                        key=lambda item: item[0])]
+
+
+def sample_stratified(filepaths: List[str], per_bucket: int, bucket_minutes: int = 60,
+                      seed: Optional[int] = 0) -> List[str]:
+    """
+    Draws a random sample of snapshots stratified by time bucket.
+
+    Every bucket, e.g. every hour, contributes up to per_bucket snapshots drawn without
+    replacement, so the sample covers the whole period evenly while the position within
+    the bucket is random. Only the filenames are used, no file is opened.
+
+    Parameters:
+        filepaths (List[str]): List of snapshot filepaths, in time order.
+        per_bucket (int): Number of snapshots drawn from each bucket.
+        bucket_minutes (int): Bucket length in minutes.
+        seed (Optional[int]): Seed of the random draw, so runs are reproducible.
+
+    Returns:
+        List[str]: The sampled filepaths, in their original order.
+    """
+    if per_bucket < 1 or bucket_minutes < 1:
+        raise ValueError(f"Sample size and bucket length must be positive, got {per_bucket} and {bucket_minutes}")
+    rng = random.Random(seed)
+    selected = []
+    for _, stratum in groupby(_bucketed_filepaths(filepaths, bucket_minutes), key=lambda item: item[0]):
+        stratum = [filepath for _, filepath in stratum]
+        chosen = sorted(rng.sample(range(len(stratum)), min(per_bucket, len(stratum))))
+        selected.extend(stratum[position] for position in chosen)
+    return selected
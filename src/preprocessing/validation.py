@@ -0,0 +1,143 @@
+import math
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple
+
+
+# Order types announced on the Joinmarket orderbook
+RELATIVE_ORDERTYPES = {'sw0reloffer', 'swreloffer', 'reloffer'}
+ABSOLUTE_ORDERTYPES = {'sw0absoffer', 'swabsoffer', 'absoffer'}
+KNOWN_ORDERTYPES = RELATIVE_ORDERTYPES | ABSOLUTE_ORDERTYPES
+
+REQUIRED_OFFER_FIELDS = ('counterparty', 'oid', 'ordertype', 'minsize', 'maxsize', 'cjfee')
+
+# Relative fees are fractions of the coinjoin amount, anything above 1 (100%) is bogus
+MAX_RELATIVE_FEE = 1.0
+
+# Anomaly categories, each becomes an 'anomaly_<kind>' column in the output
+ANOMALY_KINDS = (
+    'missing_field',      # Required offer field is absent
+    'malformed_cjfee',    # cjfee cannot be parsed as a number
+    'fee_out_of_range',   # Negative fee or relative fee above MAX_RELATIVE_FEE
+    'invalid_size',       # minsize/maxsize not a non-negative number
+    'size_order',         # minsize larger than maxsize
+    'unknown_ordertype',  # ordertype not in KNOWN_ORDERTYPES
+    'malformed_bond',     # Fidelity bond without a numeric bond_value
+)
+
+
+class SnapshotValidationError(ValueError):
+    """Raised when a snapshot is structurally corrupt and cannot be processed."""
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_snapshot(data: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Checks the schema and value ranges of a decoded snapshot.
+
+    Structural problems (wrong top-level types) raise SnapshotValidationError, so the
+    caller can quarantine the file. Field-level problems are counted per anomaly kind;
+    offers whose sizes are unusable are dropped from the returned offer list, everything
+    else is kept so the statistics stay comparable with unvalidated runs.
+
+    Parameters:
+        data (Any): The decoded JSON snapshot.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int]]:
+            The usable offers, the fidelity bonds and the anomaly counts by kind.
+    """
+    if not isinstance(data, dict):
+        raise SnapshotValidationError(f"snapshot is a {type(data).__name__}, expected an object")
+
+    offers = data.get('offers', [])
+    fidelitybonds = data.get('fidelitybonds', [])
+    if not isinstance(offers, list):
+        raise SnapshotValidationError("'offers' is not a list")
+    if not isinstance(fidelitybonds, list):
+        raise SnapshotValidationError("'fidelitybonds' is not a list")
+
+    anomalies = dict.fromkeys(ANOMALY_KINDS, 0)
+    usable = None  # Only copied once the first offer is rejected
+    for index, offer in enumerate(offers):
+        if not isinstance(offer, dict):
+            raise SnapshotValidationError(f"offer is a {type(offer).__name__}, expected an object")
+
+        for field in REQUIRED_OFFER_FIELDS:
+            if field not in offer:
+                anomalies['missing_field'] += 1
+                break
+
+        ordertype = offer.get('ordertype', '')
+        if ordertype not in KNOWN_ORDERTYPES:
+            anomalies['unknown_ordertype'] += 1
+
+        minsize = offer.get('minsize', 0)
+        maxsize = offer.get('maxsize', 0)
+        if not (_is_number(minsize) and _is_number(maxsize)):
+            # process_offers cannot aggregate these, drop the offer
+            anomalies['invalid_size'] += 1
+            if usable is None:
+                usable = offers[:index]
+            continue
+        if usable is not None:
+            usable.append(offer)
+        if minsize < 0 or maxsize < 0:
+            anomalies['invalid_size'] += 1
+        elif minsize > maxsize:
+            anomalies['size_order'] += 1
+
+        cjfee = offer.get('cjfee', '0')
+        try:
+            fee = float(cjfee)
+        except (ValueError, TypeError):
+            anomalies['malformed_cjfee'] += 1
+            continue
+        if not math.isfinite(fee) or fee < 0 or (ordertype in RELATIVE_ORDERTYPES and fee > MAX_RELATIVE_FEE):
+            anomalies['fee_out_of_range'] += 1
+
+    for bond in fidelitybonds:
+        if not isinstance(bond, dict):
+            raise SnapshotValidationError(f"fidelity bond is a {type(bond).__name__}, expected an object")
+        if not _is_number(bond.get('bond_value', 0)):
+            anomalies['malformed_bond'] += 1
+
+    if usable is not None:
+        offers = usable
+    if anomalies['malformed_bond']:
+        fidelitybonds = [bond for bond in fidelitybonds if _is_number(bond.get('bond_value', 0))]
+
+    return offers, fidelitybonds, anomalies
+
+
+def flatten_anomalies(anomalies: Dict[str, int]) -> Dict[str, int]:
+    """
+    Flattens anomaly counts into 'anomaly_<kind>' columns plus an 'anomaly_total' column.
+
+    Parameters:
+        anomalies (Dict[str, int]): Anomaly counts by kind, as returned by validate_snapshot.
+
+    Returns:
+        Dict[str, int]: The anomaly columns for a snapshot record.
+    """
+    columns = {f'anomaly_{kind}': anomalies.get(kind, 0) for kind in ANOMALY_KINDS}
+    columns['anomaly_total'] = sum(columns.values())
+    return columns
+
+
+def summarize_quarantine(quarantine: List[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    Counts quarantined files by the exception type that caused them to be quarantined.
+
+    Parameters:
+        quarantine (List[Tuple[str, str]]): (filepath, reason) pairs collected during loading.
+
+    Returns:
+        Dict[str, int]: Number of quarantined files per reason class.
+    """
+    counts = defaultdict(int)
+    for _, reason in quarantine:
+        counts[reason.split(':', 1)[0]] += 1
+    return dict(counts)
@@ -1,7 +1,10 @@
+from __future__ import annotations
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Tuple
+from typing import Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 
 def plot_fee_metrics(df: pd.DataFrame, window_size: int = 1000) -> Tuple[plt.Figure, plt.Axes]:
@@ -15,6 +18,8 @@ def plot_fee_metrics(df: pd.DataFrame, window_size: int = 1000) -> Tuple[plt.Fig
     Returns:
         fig, ax: Figure and Axes objects
     """
+    import matplotlib.pyplot as plt
+
     # Calculate smoothed metrics
     df_smooth = pd.DataFrame(index=df.index)
     metrics = [
@@ -63,6 +68,8 @@ def plot_fee_type_distribution(df: pd.DataFrame, window_size: int = 1000) -> Tup
     Returns:
         fig, ax: Figure and Axes objects
     """
+    import matplotlib.pyplot as plt
+
     # Calculate smoothed ratios
     df_smooth = pd.DataFrame(index=df.index)
     df_smooth['relative_ratio_smooth'] = df['relative_fees_ratio'].rolling(
@@ -96,6 +103,8 @@ def plot_fee_volume_metrics(df: pd.DataFrame, window_size: int = 1000) -> Tuple[
     Returns:
         fig, ax: Figure and Axes objects
     """
+    import matplotlib.pyplot as plt
+
     # Calculate smoothed metrics
     df_smooth = pd.DataFrame(index=df.index)
     count_metrics = ['relative_fees_count', 'absolute_fees_count']
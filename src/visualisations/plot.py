@@ -1,5 +1,9 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def plot_total_liquidity(df_stats: pd.DataFrame):
@@ -9,6 +13,8 @@ def plot_total_liquidity(df_stats: pd.DataFrame):
     Parameters:
         df_stats (pd.DataFrame): DataFrame containing the analysis.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 6))
     df_stats['total_liquidity'].plot()
     plt.title('Total Liquidity Over Time')
@@ -24,6 +30,8 @@ def plot_average_fee(df_stats: pd.DataFrame):
     Parameters:
         df_stats (pd.DataFrame): DataFrame containing the analysis.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 6))
     df_stats['average_fee'].plot()
     plt.title('Average Fee Over Time')
@@ -39,6 +47,8 @@ def plot_unique_makers(df_stats: pd.DataFrame):
     Parameters:
         df_stats (pd.DataFrame): DataFrame containing the analysis.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 6))
     df_stats['total_unique_makers'].plot()
     plt.title('Number of Unique Makers Over Time')
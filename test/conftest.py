@@ -2,6 +2,7 @@ import pytest
 import json
 from pathlib import Path
 
+
 @pytest.fixture
 def basic_snapshot_data():
     """Basic test data for simple cases."""
@@ -31,6 +32,39 @@ def basic_snapshot_data():
         "fidelitybonds": []
     }
 
+
+@pytest.fixture
+def write_snapshot_files(tmp_path):
+    """
+    Writer of 'YYYY-MM-DD/orderbook_00-MM.json' snapshot files under tmp_path.
+
+    The returned function takes the snapshots of a day (dicts, or strings written as-is
+    to create corrupt files), the days, a subdirectory of tmp_path and a {position: content}
+    mapping overriding single files of the returned list, and returns the filepaths in order.
+    """
+    def write(snapshots, days=("2024-01-01",), root=".", corrupt=None):
+        filepaths = []
+        for day in days:
+            day_dir = tmp_path / root / day
+            day_dir.mkdir(parents=True)
+            for minute, data in enumerate(snapshots):
+                path = day_dir / f"orderbook_00-{minute:02d}.json"
+                path.write_text(data if isinstance(data, str) else json.dumps(data))
+                filepaths.append(str(path))
+        for position, content in (corrupt or {}).items():
+            Path(filepaths[position]).write_text(content)
+        return filepaths
+
+    return write
+
+
+@pytest.fixture
+def snapshot_files(write_snapshot_files, basic_snapshot_data, extended_snapshot_data):
+    """Two days of four snapshots under tmp_path/data, alternating between the test datasets, the last one corrupt."""
+    snapshots = [extended_snapshot_data if minute % 2 else basic_snapshot_data for minute in range(4)]
+    return write_snapshot_files(snapshots, days=("2024-01-01", "2024-01-02"), root="data", corrupt={7: "{"})
+
+
 @pytest.fixture
 def extended_snapshot_data():
     """Extended test data matching real-world scenarios."""
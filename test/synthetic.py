@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import random
+from datetime import date, timedelta
+from typing import List
+
+BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+class _Maker:
+    """A synthetic maker with a lifetime, a drifting fee and an optional fidelity bond."""
+
+    def __init__(self, rng: random.Random, arrival: int, mean_lifetime: float, offers_per_maker: int):
+        self.nick = 'J5' + ''.join(rng.choice(BASE58) for _ in range(14))
+        self.arrival = arrival
+        self.departure = arrival + max(1, int(rng.expovariate(1 / mean_lifetime)))
+        self.relative = rng.random() < 0.8
+        # Relative fees around 0.002% - 0.03%, absolute fees around 100 - 5000 sats
+        self.log_fee = rng.uniform(math.log(2e-5), math.log(3e-4)) if self.relative else \
+            rng.uniform(math.log(100), math.log(5000))
+        self.offers = []
+        for oid in range(offers_per_maker):
+            maxsize = int(rng.lognormvariate(math.log(2e7), 1.5))
+            self.offers.append({'oid': oid, 'minsize': min(rng.randint(27300, 1_000_000), maxsize),
+                                'maxsize': maxsize})
+        self.bond = None
+        if rng.random() < 0.3:
+            amount = int(rng.lognormvariate(math.log(5e7), 1.0))
+            self.bond = {
+                'utxo': {'txid': ''.join(rng.choice('0123456789abcdef') for _ in range(64)), 'vout': 0},
+                'bond_value': amount ** 2 / 1e9 * rng.uniform(0.5, 2.0),
+                'locktime': 1_700_000_000 + rng.randint(0, 10 ** 8),
+                'amount': amount,
+            }
+
+    def drift(self, rng: random.Random):
+        """Daily random walk of the fee in log space."""
+        self.log_fee += rng.gauss(0, 0.05)
+
+    def snapshot_offers(self, rng: random.Random) -> List[dict]:
+        fee = math.exp(self.log_fee)
+        bond_value = self.bond['bond_value'] if self.bond else 0
+        offers = []
+        for offer in self.offers:
+            offers.append({
+                'counterparty': self.nick,
+                'oid': offer['oid'],
+                'ordertype': 'sw0reloffer' if self.relative else 'sw0absoffer',
+                'minsize': offer['minsize'],
+                # Available liquidity moves as coinjoins are made
+                'maxsize': max(offer['minsize'], int(offer['maxsize'] * rng.uniform(0.9, 1.0))),
+                'txfee': 0,
+                'cjfee': f"{fee:.6f}" if self.relative else str(int(fee)),
+                'fidelity_bond_value': bond_value,
+            })
+        return offers
+
+
+def write_synthetic_archive(root: str, days: int, makers: int, offers_per_maker: int = 2,
+                            interval_minutes: int = 60, mean_lifetime_days: float = 30.0,
+                            start: date = date(2022, 1, 1), seed: int = 0) -> List[str]:
+    """
+    Writes a synthetic 'root/YYYY-MM-DD/orderbook_HH-MM.json' tree.
+
+    About `makers` makers are active at any time. Each lives for an exponentially
+    distributed number of days and is replaced by a new arrival, fees follow a daily
+    random walk, 30% of makers hold a fidelity bond and 5% of the active makers are
+    missing from any single snapshot.
+
+    Parameters:
+        root (str): Directory to write the daily directories into.
+        days (int): Number of days.
+        makers (int): Number of simultaneously active makers.
+        offers_per_maker (int): Offers announced by every maker.
+        interval_minutes (int): Minutes between snapshots.
+        mean_lifetime_days (float): Mean maker lifetime, controls the churn.
+        start (date): First day of the archive.
+        seed (int): Seed of the generator.
+
+    Returns:
+        List[str]: The written snapshot filepaths, in time order.
+    """
+    rng = random.Random(seed)
+    # Makers already active at the start have a random remaining lifetime
+    active = [_Maker(rng, 0, mean_lifetime_days, offers_per_maker) for _ in range(makers)]
+    filepaths = []
+    for day in range(days):
+        active = [maker for maker in active if maker.departure > day]
+        while len(active) < makers:
+            active.append(_Maker(rng, day, mean_lifetime_days, offers_per_maker))
+        for maker in active:
+            maker.drift(rng)
+
+        day_dir = os.path.join(root, (start + timedelta(days=day)).isoformat())
+        os.makedirs(day_dir, exist_ok=True)
+        for minute in range(0, 24 * 60, interval_minutes):
+            online = [maker for maker in active if rng.random() >= 0.05]
+            snapshot = {
+                'offers': [offer for maker in online for offer in maker.snapshot_offers(rng)],
+                'fidelitybonds': [{'counterparty': maker.nick, **maker.bond} for maker in online if maker.bond],
+            }
+            filepath = os.path.join(day_dir, f"orderbook_{minute // 60:02d}-{minute % 60:02d}.json")
+            with open(filepath, 'w') as file:
+                json.dump(snapshot, file)
+            filepaths.append(filepath)
+    return filepaths
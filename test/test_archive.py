@@ -0,0 +1,153 @@
+import pytest
+import gzip
+import io
+import json
+import os
+import tarfile
+import zipfile
+import pandas as pd
+
+from src.preprocessing.archive import (
+    read_snapshot_bytes,
+    iter_snapshot_bytes,
+    list_bundle_members,
+    split_bundle_path
+)
+from src.preprocessing.snapshot import load_data
+from src.preprocessing.utils import get_snapshot_filepaths
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+
+
+def _add_tar_member(tar, name, content):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    tar.addfile(info, io.BytesIO(content))
+
+
+@pytest.fixture
+def archive_tree(tmp_path, basic_snapshot_data):
+    """Create a data tree mixing plain, compressed and bundled snapshots."""
+    raw = json.dumps(basic_snapshot_data).encode()
+
+    day_dir = tmp_path / "2024-01-01"
+    day_dir.mkdir()
+    (day_dir / "orderbook_00-00.json").write_bytes(raw)
+    (day_dir / "orderbook_00-01.json.gz").write_bytes(gzip.compress(raw))
+
+    with tarfile.open(tmp_path / "2024-01-02.tar.gz", "w:gz") as tar:
+        _add_tar_member(tar, "orderbook_00-00.json", raw)
+        _add_tar_member(tar, "orderbook_00-01.json.gz", gzip.compress(raw))
+        _add_tar_member(tar, "notes.txt", b"not a snapshot")
+
+    with zipfile.ZipFile(tmp_path / "2024-01-03.zip", "w") as bundle:
+        bundle.writestr("2024-01-03/orderbook_00-00.json", raw)
+        bundle.writestr("2024-01-03/orderbook_00-01.json", raw[:30])
+
+    return tmp_path
+
+
+def test_compressed_files_are_read(archive_tree, basic_snapshot_data):
+    """Test transparent decompression of single snapshot files."""
+    data = load_data(str(archive_tree / "2024-01-01" / "orderbook_00-01.json.gz"))
+    assert data == basic_snapshot_data
+
+
+def test_zstd_files_are_read(tmp_path, basic_snapshot_data):
+    """Test reading zstd compressed snapshots."""
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "orderbook_00-00.json.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(json.dumps(basic_snapshot_data).encode()))
+
+    assert load_data(str(path)) == basic_snapshot_data
+
+
+def test_corrupt_zstd_files_are_quarantined(tmp_path, basic_snapshot_data):
+    """Test that corrupt zstd snapshots and bundles are quarantined instead of aborting the run."""
+    zstandard = pytest.importorskip("zstandard")
+    raw = json.dumps(basic_snapshot_data).encode()
+    day_dir = tmp_path / "2024-01-01"
+    day_dir.mkdir()
+    (day_dir / "orderbook_00-00.json").write_bytes(raw)
+    (day_dir / "orderbook_00-01.json.zst").write_bytes(b"garbage")
+    (day_dir / "orderbook_00-02.json.zst").write_bytes(zstandard.ZstdCompressor().compress(raw)[:-8])
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        _add_tar_member(tar, "orderbook_00-00.json", raw)
+    bundle = tmp_path / "2024-01-02.tar.zst"
+    bundle.write_bytes(zstandard.ZstdCompressor().compress(buffer.getvalue())[:40])
+    filepaths = [str(day_dir / name) for name in sorted(os.listdir(day_dir))] + \
+        [str(bundle / "orderbook_00-00.json")]
+
+    quarantine = []
+    df = load_snapshots_to_dataframe(filepaths, quarantine)
+    assert len(df) == 1
+    reasons = dict(quarantine)
+    assert len(reasons) == 3
+    assert reasons[filepaths[1]].startswith('SnapshotArchiveError')
+    assert reasons[filepaths[3]].startswith('SnapshotArchiveError')
+    # A truncated frame decompresses to a truncated document
+    assert reasons[filepaths[2]].startswith('JSONDecodeError')
+
+
+def test_bundle_members_are_listed(archive_tree):
+    """Test discovery of snapshots inside per-day bundles."""
+    filepaths = get_snapshot_filepaths(str(archive_tree))
+
+    tar_path = str(archive_tree / "2024-01-02.tar.gz")
+    assert filepaths[2:4] == list_bundle_members(tar_path)
+    assert len(filepaths) == 6
+    assert split_bundle_path(filepaths[2]) == (tar_path, "orderbook_00-00.json")
+
+
+def test_bundle_listing_is_indexed(archive_tree, monkeypatch, basic_snapshot_data):
+    """Test that tar bundles are listed from the index file instead of being decompressed again."""
+    from src.preprocessing import archive
+
+    tar_path = archive_tree / "2024-01-02.tar.gz"
+    expected = list_bundle_members(str(tar_path))
+    assert (archive_tree / "2024-01-02.tar.gz.members.json").exists()
+    assert get_snapshot_filepaths(str(archive_tree))[2:4] == expected
+
+    def no_decompression(bundle_path):
+        raise AssertionError(f"{bundle_path} was decompressed")
+
+    monkeypatch.setattr(archive, '_bundle_listings', {})
+    monkeypatch.setattr(archive, '_open_tar', no_decompression)
+    assert list_bundle_members(str(tar_path)) == expected
+
+    # A rewritten bundle invalidates the index
+    monkeypatch.undo()
+    with tarfile.open(tar_path, "w:gz") as tar:
+        _add_tar_member(tar, "orderbook_12-00.json", json.dumps(basic_snapshot_data).encode())
+    os.utime(tar_path, ns=(0, 0))
+    assert list_bundle_members(str(tar_path)) == [f"{tar_path}/orderbook_12-00.json"]
+
+
+def test_bundle_member_read(archive_tree, basic_snapshot_data):
+    """Test random access to a single bundle member."""
+    member = str(archive_tree / "2024-01-02.tar.gz" / "orderbook_00-01.json.gz")
+    assert json.loads(read_snapshot_bytes(member)) == basic_snapshot_data
+
+
+def test_missing_members_yield_errors(archive_tree):
+    """Test that missing bundle members are reported instead of raising."""
+    bundle = archive_tree / "2024-01-02.tar.gz"
+    results = dict(iter_snapshot_bytes([str(bundle / "orderbook_00-00.json"),
+                                        str(bundle / "orderbook_23-59.json")]))
+
+    assert isinstance(results[str(bundle / "orderbook_00-00.json")], bytes)
+    assert isinstance(results[str(bundle / "orderbook_23-59.json")], FileNotFoundError)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_archive_tree_to_dataframe(archive_tree, workers):
+    """Test the full pipeline over a mixed archive tree."""
+    quarantine = []
+    df = load_snapshots_to_dataframe(get_snapshot_filepaths(str(archive_tree)), quarantine, workers=workers)
+
+    assert len(df) == 5
+    assert df.index.is_monotonic_increasing
+    assert df.index[-1] == pd.Timestamp('2024-01-03 00:00')  # The valid zip member
+    assert len(quarantine) == 1
+    assert quarantine[0][0].endswith("2024-01-03/orderbook_00-01.json")
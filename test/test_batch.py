@@ -0,0 +1,130 @@
+import pytest
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.preprocessing.batch import process_snapshot_batch, load_and_process_snapshot_batch, concatenate_batches
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+from src.preprocessing.shared import COLUMN_DTYPES
+from src.preprocessing.snapshot import process_snapshot_data, SNAPSHOT_RECORD_COLUMNS
+from test.synthetic import write_synthetic_archive
+
+
+@pytest.fixture
+def edge_snapshot_data():
+    """Offers the per-snapshot path treats specially: malformed, null and unknown fees, zero minsize."""
+    return {
+        "offers": [
+            {"counterparty": "J5a", "oid": 0, "ordertype": "sw0reloffer", "minsize": 0,
+             "maxsize": 500000, "txfee": 0, "cjfee": "0.0002"},
+            {"counterparty": "J5a", "oid": 1, "ordertype": "sw0reloffer", "minsize": 30000,
+             "maxsize": 900000, "txfee": 0, "cjfee": "bad"},
+            {"counterparty": "J5b", "oid": 0, "ordertype": "sw0absoffer", "minsize": 40000,
+             "maxsize": 700000.5, "txfee": 0, "cjfee": 250},
+            {"counterparty": "J5c", "oid": 0, "ordertype": "swreloffer", "minsize": 50000,
+             "maxsize": 600000, "txfee": 0, "cjfee": "0.001"},
+            {"counterparty": "J5c", "oid": 1, "ordertype": "sw0reloffer", "minsize": 60000,
+             "maxsize": 800000, "txfee": 0, "cjfee": None},
+            {"counterparty": "J5d", "oid": 0, "ordertype": "sw0absoffer", "minsize": "x",
+             "maxsize": 100, "cjfee": "10"},
+        ],
+        "fidelitybonds": [{"counterparty": "J5a", "bond_value": 2.5}, {"bond_value": "bad"}],
+    }
+
+
+@pytest.fixture
+def nan_fee_snapshot_data():
+    """Offers with 'NaN' fees between regular ones, the NaNs have no place in a sorted order."""
+    return {
+        "offers": [
+            {"counterparty": "J5a", "oid": 0, "ordertype": "sw0reloffer", "minsize": 10000,
+             "maxsize": 500000, "txfee": 0, "cjfee": "0.0003"},
+            {"counterparty": "J5a", "oid": 1, "ordertype": "sw0reloffer", "minsize": 10000,
+             "maxsize": 500000, "txfee": 0, "cjfee": "NaN"},
+            {"counterparty": "J5b", "oid": 0, "ordertype": "sw0reloffer", "minsize": 10000,
+             "maxsize": 500000, "txfee": 0, "cjfee": "0.0001"},
+            {"counterparty": "J5b", "oid": 1, "ordertype": "sw0absoffer", "minsize": 10000,
+             "maxsize": 500000, "txfee": 0, "cjfee": "nan"},
+            {"counterparty": "J5c", "oid": 0, "ordertype": "sw0absoffer", "minsize": 10000,
+             "maxsize": 500000, "txfee": 0, "cjfee": "300"},
+        ],
+        "fidelitybonds": [],
+    }
+
+
+def _assert_matches_records(columns, records):
+    dtypes = {name: COLUMN_DTYPES[kind] for name, kind in SNAPSHOT_RECORD_COLUMNS}
+    expected = pd.DataFrame(records).astype(dtypes).set_index('timestamp')
+    actual = pd.DataFrame(columns).set_index('timestamp')
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], rtol=1e-12)
+
+
+def test_batch_matches_per_snapshot_path(basic_snapshot_data, extended_snapshot_data, edge_snapshot_data,
+                                        nan_fee_snapshot_data):
+    """Test that the batch columns equal the per-snapshot records, empty snapshots and NaN fees included."""
+    snapshots = [basic_snapshot_data, {"offers": [], "fidelitybonds": []}, extended_snapshot_data,
+                 edge_snapshot_data, basic_snapshot_data, nan_fee_snapshot_data]
+    timestamps = [datetime(2024, 1, 1, hour) for hour in range(len(snapshots))]
+
+    columns, rejected = process_snapshot_batch(snapshots, timestamps)
+    assert rejected == []
+    assert list(columns) == [name for name, _ in SNAPSHOT_RECORD_COLUMNS]
+    _assert_matches_records(columns, [process_snapshot_data(data, timestamp)
+                                      for data, timestamp in zip(snapshots, timestamps)])
+    assert columns['total_unique_makers'][3] == 3
+    assert columns['anomaly_total'][3] > 0
+    # NaN fees are left out of the medians, but make the means NaN
+    assert columns['relative_fees_percentage_median'][5] == pytest.approx(0.0002)
+    assert columns['absolute_fees_satoshis_median'][5] == 300
+    assert np.isnan(columns['relative_fees_percentage_mean'][5])
+
+
+def test_batch_null_cjfee(basic_snapshot_data):
+    """Test that a null cjfee counts as malformed when it is the only malformed fee of the batch."""
+    null_fee_data = {"offers": [{**basic_snapshot_data["offers"][0], "cjfee": None}], "fidelitybonds": []}
+    snapshots = [basic_snapshot_data, null_fee_data]
+    timestamps = [datetime(2024, 1, 1, hour) for hour in range(len(snapshots))]
+    columns, _ = process_snapshot_batch(snapshots, timestamps)
+    _assert_matches_records(columns, [process_snapshot_data(data, timestamp)
+                                      for data, timestamp in zip(snapshots, timestamps)])
+    assert columns['relative_fees_percentage_mean'][1] == 0
+
+
+def test_batch_rejects_corrupt_snapshots(basic_snapshot_data):
+    """Test that snapshots failing validation are reported by position and left out."""
+    snapshots = [basic_snapshot_data, {"offers": {}}, [], basic_snapshot_data]
+    timestamps = [datetime(2024, 1, 1, hour) for hour in range(len(snapshots))]
+    columns, rejected = process_snapshot_batch(snapshots, timestamps)
+    assert [position for position, _ in rejected] == [1, 2]
+    assert rejected[0][1].startswith('SnapshotValidationError')
+    assert list(columns['timestamp']) == [np.datetime64('2024-01-01T00:00'), np.datetime64('2024-01-01T03:00')]
+
+    empty, _ = process_snapshot_batch([], [])
+    assert all(len(values) == 0 for values in empty.values())
+    assert len(concatenate_batches([])['total_offers']) == 0
+
+
+def test_batch_matches_on_synthetic_archive(tmp_path):
+    """Test the batch path against the per-snapshot path on many makers and snapshots."""
+    filepaths = write_synthetic_archive(str(tmp_path / 'data'), days=2, makers=60)
+    items = [(filepath, datetime(2022, 1, 1 + position // 24, position % 24))
+             for position, filepath in enumerate(filepaths)]
+    columns, quarantine = load_and_process_snapshot_batch(items)
+    assert quarantine == []
+    records = []
+    for filepath, timestamp in items:
+        with open(filepath) as file:
+            records.append(process_snapshot_data(json.load(file), timestamp))
+    _assert_matches_records(columns, records)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batched_dataframe(snapshot_files, workers):
+    """Test that the batched ingestion gives the DataFrame and quarantine of the default path."""
+    quarantine, batched_quarantine = [], []
+    expected = load_snapshots_to_dataframe(snapshot_files, quarantine)
+    batched = load_snapshots_to_dataframe(snapshot_files, batched_quarantine, workers=workers, batched=True)
+    pd.testing.assert_frame_equal(batched, expected[batched.columns], rtol=1e-12)
+    assert batched_quarantine == quarantine and len(quarantine) == 1
@@ -0,0 +1,70 @@
+import numpy as np
+
+from src.preprocessing.cache import build_snapshot_cache, SnapshotCache
+from src.preprocessing.snapshot import load_data
+
+
+def test_cache_roundtrip(tmp_path, snapshot_files):
+    """Test that cached offers reproduce the raw snapshot fields."""
+    quarantine = []
+    cache = build_snapshot_cache(snapshot_files, str(tmp_path / "cache"), quarantine)
+
+    assert len(cache) == 7
+    assert [entry[0] for entry in quarantine] == [snapshot_files[-1]]
+    assert SnapshotCache(str(tmp_path / "cache")).quarantine == quarantine
+
+    for row, filepath in enumerate(snapshot_files[:-1]):
+        raw = load_data(filepath)
+        offers = cache.snapshot_offers(row)
+        assert list(cache.counterparty_names(offers['counterparty'])) == [o['counterparty'] for o in raw['offers']]
+        assert [cache.ordertypes[code] for code in offers['ordertype']] == [o['ordertype'] for o in raw['offers']]
+        assert offers['maxsize'].tolist() == [o['maxsize'] for o in raw['offers']]
+        assert offers['cjfee'].tolist() == [float(o['cjfee']) for o in raw['offers']]
+        assert cache.snapshot_bonds(row)['bond_value'].tolist() == [b['bond_value'] for b in raw['fidelitybonds']]
+
+
+def test_cache_slices_are_views(tmp_path, snapshot_files):
+    """Test zero-copy access to a time range."""
+    cache = build_snapshot_cache(snapshot_files, str(tmp_path / "cache"))
+
+    offers = cache.offers_between('2024-01-01 00:01', '2024-01-02 00:00')
+    assert np.shares_memory(offers, cache.offers)
+    # 00:01 and 00:03 have 3 offers each, 00:02 has 2
+    assert len(offers) == 8
+    assert set(cache.offer_timestamps(offers)) == set(cache.timestamps[1:4])
+
+    assert len(cache.offers_between('2025-01-01')) == 0
+    assert len(cache.snapshot_offers(slice(None))) == len(cache.offers)
+
+
+def test_empty_cache(tmp_path):
+    """Test that a cache without snapshots can be opened."""
+    cache = build_snapshot_cache([], str(tmp_path / "cache"))
+    assert len(cache) == 0
+    assert len(cache.offers_between()) == 0
+
+
+def test_many_ordertypes(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Test that more ordertypes than one byte can number keep their ids."""
+    offer = basic_snapshot_data['offers'][0]
+    data = {"offers": [{**offer, 'oid': oid, 'ordertype': f"type{oid}"} for oid in range(300)], "fidelitybonds": []}
+    cache = build_snapshot_cache(write_snapshot_files([data]), str(tmp_path / "cache"))
+
+    offers = cache.snapshot_offers(0)
+    assert [cache.ordertypes[code] for code in offers['ordertype']] == [f"type{oid}" for oid in range(300)]
+    assert cache.ordertype_code('type299') == 299
+
+
+def test_out_of_range_integers_are_quarantined(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Test that snapshots with integers their record fields cannot hold are quarantined."""
+    offer = basic_snapshot_data['offers'][0]
+    huge_size = {**basic_snapshot_data, "offers": [{**offer, 'maxsize': 2 ** 70}]}
+    huge_oid = {**basic_snapshot_data, "offers": [{**offer, 'oid': 2 ** 40}]}
+    filepaths = write_snapshot_files([basic_snapshot_data, huge_size, huge_oid, basic_snapshot_data])
+
+    quarantine = []
+    cache = build_snapshot_cache(filepaths, str(tmp_path / "cache"), quarantine)
+    assert len(cache) == 2
+    assert [filepath for filepath, _ in quarantine] == filepaths[1:3]
+    assert all(reason.startswith('SnapshotValidationError') for _, reason in quarantine)
+    assert cache.snapshot_offers(1)['maxsize'].tolist() == [o['maxsize'] for o in basic_snapshot_data['offers']]
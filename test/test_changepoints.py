@@ -0,0 +1,93 @@
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.analysis.changepoints import (
+    detect_change_points,
+    detect_cusum,
+    CusumDetector,
+    rolling_zscore_anomalies,
+    RollingZScoreDetector,
+    detect_liquidity_events
+)
+
+
+def _step_series(n, steps, noise=1.0, seed=0, name='total_liquidity'):
+    """Per-minute series with level shifts at the given (position, new level) steps."""
+    rng = np.random.default_rng(seed)
+    levels = np.full(n, 100.0)
+    for position, level in steps:
+        levels[position:] = level
+    index = pd.date_range('2022-01-01', periods=n, freq='min')
+    return pd.Series(levels + rng.normal(0, noise, n), index=index, name=name)
+
+
+def test_change_points_located():
+    """Test that binary segmentation finds the shifts with their magnitudes."""
+    series = _step_series(20_000, [(5_000, 120.0), (12_000, 90.0)])
+    events = detect_change_points(series)
+
+    assert [event.timestamp for event in events] == [series.index[5_000], series.index[12_000]]
+    assert events[0].magnitude == pytest.approx(20, abs=0.5)
+    assert events[1].direction == 'decrease'
+
+
+def test_no_change_points_in_noise():
+    """Test that pure noise does not produce events."""
+    assert detect_change_points(_step_series(20_000, [])) == []
+
+
+def test_change_points_cap_keeps_largest():
+    """Test that max_changes keeps the most significant shifts wherever they are, with a warning."""
+    series = _step_series(40_000, [(5_000, 150.0), (15_000, 152.0), (25_000, 153.0), (35_000, 110.0)])
+    with pytest.warns(RuntimeWarning, match='max_changes=2'):
+        events = detect_change_points(series, max_changes=2)
+    assert [event.timestamp for event in events] == [series.index[5_000], series.index[35_000]]
+
+
+def test_cusum_streaming_matches_batch():
+    """Test that incremental CUSUM updates find the same events as a single pass."""
+    series = _step_series(30_000, [(10_000, 110.0), (20_000, 95.0)])
+    batch = detect_cusum(series)
+
+    detector = CusumDetector('total_liquidity')
+    streamed = []
+    for start in range(0, len(series), 777):
+        streamed.extend(detector.update(series.iloc[start:start + 777]))
+
+    assert streamed == batch
+    assert len(batch) == 2
+    assert series.index[10_000] <= batch[0].detected_at < series.index[10_030]
+    assert batch[0].magnitude == pytest.approx(10, abs=1.5)
+    assert batch[1].direction == 'decrease'
+
+
+def test_rolling_zscore_flags_spike():
+    """Test that an isolated spike is flagged, also when streamed."""
+    series = _step_series(5_000, [])
+    series.iloc[3_000] += 50
+    flags = rolling_zscore_anomalies(series, window=500)
+
+    assert flags.index[flags['is_anomaly']].tolist() == [series.index[3_000]]
+
+    detector = RollingZScoreDetector(window=500)
+    streamed = pd.concat([detector.update(series.iloc[:2_500]), detector.update(series.iloc[2_500:])])
+    pd.testing.assert_frame_equal(streamed, flags)
+
+
+def test_multi_year_series_is_fast():
+    """Test that two years of per-minute data are processed in seconds."""
+    n = 2 * 365 * 24 * 60
+    liquidity = _step_series(n, [(n // 3, 130.0), (2 * n // 3, 80.0)], seed=1)
+    makers = _step_series(n, [(n // 2, 140.0)], seed=2, name='total_unique_makers')
+    df = pd.DataFrame({'total_liquidity': liquidity, 'total_unique_makers': makers})
+
+    start = time.perf_counter()
+    events = detect_liquidity_events(df)
+    detect_cusum(df['total_liquidity'])
+    rolling_zscore_anomalies(df['total_unique_makers'])
+    elapsed = time.perf_counter() - start
+
+    assert len(events) == 3
+    assert elapsed < 10
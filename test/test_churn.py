@@ -0,0 +1,102 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.analysis.churn import (
+    maker_presence_from_snapshots,
+    maker_presence_from_cache,
+    calculate_daily_churn,
+    calculate_cohort_retention,
+    calculate_maker_lifetimes,
+    kaplan_meier,
+    analyze_maker_churn
+)
+from src.preprocessing.cache import build_snapshot_cache
+
+
+def _snapshots(days):
+    """Hourly snapshots, days maps a day offset to the makers present that day."""
+    for day, makers in days.items():
+        for hour in range(24):
+            yield datetime(2024, 1, 1) + timedelta(days=day, hours=hour), makers
+
+
+DAYS = {
+    0: ['A', 'B', 'C'],
+    1: ['A', 'B', 'D'],
+    2: ['A', 'D'],
+    3: ['A', 'D', 'E'],
+}
+
+
+def test_daily_churn():
+    """Test arrivals, departures and first/last appearances per day."""
+    churn = calculate_daily_churn(maker_presence_from_snapshots(_snapshots(DAYS)))
+
+    assert churn['active'].tolist() == [3, 3, 2, 3]
+    assert churn['arrivals'].tolist() == [3, 1, 0, 1]
+    assert churn['departures'].tolist() == [0, 1, 1, 0]
+    assert churn['new_makers'].tolist() == [3, 1, 0, 1]
+    assert churn['lost_makers'].iloc[:3].tolist() == [1, 1, 0]
+    assert np.isnan(churn['lost_makers'].iloc[3])
+
+
+def test_cohort_retention():
+    """Test retention curves of the first-seen cohorts."""
+    retention = calculate_cohort_retention(maker_presence_from_snapshots(_snapshots(DAYS)))
+
+    assert retention['size'].tolist() == [3, 1, 1]
+    assert retention.loc['2024-01-01', [0, 1, 2, 3]].tolist() == [1.0, pytest.approx(2 / 3), pytest.approx(1 / 3),
+                                                                  pytest.approx(1 / 3)]
+    assert retention.loc['2024-01-02', [0, 1, 2]].tolist() == [1.0, 1.0, 1.0]
+    assert np.isnan(retention.loc['2024-01-02', 3])
+
+
+def test_lifetimes_and_survival():
+    """Test censoring of active makers and the Kaplan-Meier estimate."""
+    lifetimes = calculate_maker_lifetimes(maker_presence_from_snapshots(_snapshots(DAYS)))
+    assert lifetimes.loc[['A', 'B', 'C', 'D', 'E'], 'lifetime'].tolist() == [4, 2, 1, 3, 1]
+    assert lifetimes.loc[['A', 'B', 'C', 'D', 'E'], 'observed'].tolist() == [False, True, True, False, False]
+
+    survival = kaplan_meier(lifetimes['lifetime'], lifetimes['observed'])
+    # 5 at risk at 1: C dies, E censored; 3 at risk at 2: B dies
+    assert survival.loc[1, 'survival'] == pytest.approx(4 / 5)
+    assert survival.loc[2, 'survival'] == pytest.approx(4 / 5 * 2 / 3)
+    assert survival['survival'].iloc[-1] == survival.loc[2, 'survival']
+
+
+def test_kaplan_meier_without_censoring():
+    """Test that without censoring the estimate is the empirical survival function."""
+    durations = np.random.default_rng(0).integers(1, 50, 1000)
+    survival = kaplan_meier(durations, np.ones(1000, dtype=bool))
+    for duration in (5, 20, 40):
+        assert survival.loc[duration, 'survival'] == pytest.approx((durations > duration).mean())
+        assert survival.loc[duration, 'ci_low'] <= survival.loc[duration, 'survival'] <= survival.loc[duration, 'ci_high']
+
+
+def test_presence_from_cache_matches_snapshots(tmp_path):
+    """Test that the cache-based builder matches the snapshot-based one."""
+    for day, makers in DAYS.items():
+        day_dir = tmp_path / "data" / f"2024-01-0{day + 1}"
+        day_dir.mkdir(parents=True)
+        offers = [{"counterparty": maker, "oid": 0, "ordertype": "sw0reloffer", "minsize": 1,
+                   "maxsize": 2, "txfee": 0, "cjfee": "0.0001"} for maker in makers]
+        for hour in (0, 12):
+            (day_dir / f"orderbook_{hour:02d}-00.json").write_text(json.dumps({"offers": offers, "fidelitybonds": []}))
+    filepaths = sorted(str(path) for path in (tmp_path / "data").glob("*/*.json"))
+    cache = build_snapshot_cache(filepaths, str(tmp_path / "cache"))
+
+    expected = analyze_maker_churn(maker_presence_from_snapshots(_snapshots(DAYS)))
+    result = analyze_maker_churn(maker_presence_from_cache(cache))
+    pd.testing.assert_frame_equal(result.churn, expected.churn)
+    pd.testing.assert_frame_equal(result.lifetimes.sort_index(), expected.lifetimes.sort_index())
+    pd.testing.assert_frame_equal(result.survival, expected.survival)
+
+
+def test_empty_presence():
+    """Test that an empty input gives empty results."""
+    analysis = analyze_maker_churn(maker_presence_from_snapshots([]))
+    assert analysis.churn.empty
+    assert analysis.survival.empty
@@ -0,0 +1,123 @@
+import pytest
+import json
+import pstats
+import pandas as pd
+
+from src import cli
+from src.preprocessing import checkpoint
+from src.preprocessing.utils import (
+    filter_filepaths_by_date,
+    get_snapshot_filepaths,
+    sample_every_nth,
+    sample_per_bucket,
+    sample_stratified
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Create three days of snapshots, four per day."""
+    write_snapshot_files([basic_snapshot_data] * 4, days=("2024-01-01", "2024-01-02", "2024-01-03"), root="data")
+    return tmp_path / "data"
+
+
+def test_date_filter(data_dir):
+    """Test the date range selection on filepaths."""
+    filepaths = get_snapshot_filepaths(str(data_dir))
+    assert len(filter_filepaths_by_date(filepaths, '2024-01-02')) == 8
+    assert len(filter_filepaths_by_date(filepaths, '2024-01-02', '2024-01-02')) == 4
+    assert len(filter_filepaths_by_date(filepaths, end_date='2024-01-01')) == 4
+
+
+def test_ingest_command(data_dir, tmp_path):
+    """Test a complete run of the ingestion entry point."""
+    output = tmp_path / "dataframe.pkl"
+    exit_code = cli.main([str(data_dir), '-o', str(output), '--start-date', '2024-01-02',
+                          '--chunk-size', '3', '--batched', '--profile', str(tmp_path / "profile.json"),
+                          '--cprofile', str(tmp_path / "profile.pstats")])
+
+    df = pd.read_pickle(output)
+    assert exit_code == 0
+    assert len(df) == 8
+    assert df.index.is_monotonic_increasing
+    # Every day of four files is split into a chunk of three and a chunk of one
+    chunks = sorted(path.name for path in (tmp_path / "dataframe.pkl.chunks").glob("chunk_*.pkl"))
+    assert [name[:21] for name in chunks] == ['chunk_2024-01-02_0000', 'chunk_2024-01-02_0001',
+                                              'chunk_2024-01-03_0000', 'chunk_2024-01-03_0001']
+    with open(tmp_path / "profile.json") as f:
+        assert json.load(f)['counters']['files'] == 8
+    assert pstats.Stats(str(tmp_path / "profile.pstats")).total_calls > 0
+
+
+def test_interrupted_run_resumes(data_dir, tmp_path, monkeypatch):
+    """Test that a rerun only processes the chunks missing after an interruption."""
+    output = str(tmp_path / "dataframe.pkl")
+    original = checkpoint.load_snapshots_to_dataframe
+    calls = []
+
+    def crash_on_third_chunk(filepaths, *args, **kwargs):
+        calls.append(filepaths)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return original(filepaths, *args, **kwargs)
+
+    monkeypatch.setattr(checkpoint, 'load_snapshots_to_dataframe', crash_on_third_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        cli.main([str(data_dir), '-o', output, '--chunk-size', '5'])
+
+    calls.clear()
+    cli.main([str(data_dir), '-o', output, '--chunk-size', '5'])
+
+    assert len(calls) == 1
+    assert len(calls[0]) == 4  # Only the last, incomplete day
+    assert len(pd.read_pickle(output)) == 12
+
+
+def test_new_snapshots_only_invalidate_their_day(data_dir, tmp_path, monkeypatch, basic_snapshot_data):
+    """Test that a snapshot added to a day reprocesses that day only and deletes its old chunk."""
+    output = str(tmp_path / "dataframe.pkl")
+    cli.main([str(data_dir), '-o', output])
+    chunk_dir = tmp_path / "dataframe.pkl.chunks"
+    before = set(path.name for path in chunk_dir.iterdir())
+
+    (data_dir / "2024-01-02" / "orderbook_00-30.json").write_text(json.dumps(basic_snapshot_data))
+    original = checkpoint.load_snapshots_to_dataframe
+    calls = []
+
+    def record_calls(filepaths, *args, **kwargs):
+        calls.append(filepaths)
+        return original(filepaths, *args, **kwargs)
+
+    monkeypatch.setattr(checkpoint, 'load_snapshots_to_dataframe', record_calls)
+    cli.main([str(data_dir), '-o', output])
+
+    assert [len(filepaths) for filepaths in calls] == [5]
+    assert all('2024-01-02' in filepath for filepath in calls[0])
+    after = set(path.name for path in chunk_dir.iterdir())
+    assert len(after) == len(before) == 6  # Pickle and quarantine file of each day
+    assert len(before - after) == 2 and all('2024-01-02' in name for name in before - after)
+    assert len(pd.read_pickle(output)) == 13
+
+
+def test_sampling(data_dir):
+    """Test the filename-based sampling strategies."""
+    filepaths = get_snapshot_filepaths(str(data_dir))
+
+    assert sample_every_nth(filepaths, 5) == filepaths[::5]
+    assert sample_per_bucket(filepaths, 2) == filepaths[::2]
+    assert sample_per_bucket(filepaths, 1440) == filepaths[::4]
+
+    sample = sample_stratified(filepaths, 1, bucket_minutes=1440, seed=1)
+    assert len(sample) == 3
+    assert [path.split('/')[-2] for path in sample] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert sample == sample_stratified(filepaths, 1, bucket_minutes=1440, seed=1)
+    assert sample_stratified(filepaths, 10, bucket_minutes=1440) == filepaths
+
+
+def test_ingest_command_sampling(data_dir, tmp_path):
+    """Test that sampled runs only process the selected snapshots."""
+    output = tmp_path / "dataframe.pkl"
+    cli.main([str(data_dir), '-o', str(output), '--stratified', '2', '--bucket', '1440'])
+    df = pd.read_pickle(output)
+    assert len(df) == 6
+    assert df.index.normalize().value_counts().tolist() == [2, 2, 2]
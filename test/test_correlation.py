@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.analysis.correlation import CORRELATION_METRICS, CoMoments, StreamingCorrelation, calculate_correlations
+from src.analysis.fees import calculate_metric_correlations
+
+
+@pytest.fixture
+def stats_df():
+    """Create a df_stats-like frame with correlated columns, missing values and a gap of empty days."""
+    dates = pd.date_range(start='2024-01-01', end='2024-01-20', freq='15min')
+    dates = dates[(dates < '2024-01-08') | (dates >= '2024-01-10')]
+    rng = np.random.default_rng(2)
+    liquidity = rng.normal(5e9, 1e9, len(dates))
+    df = pd.DataFrame({
+        'total_liquidity': liquidity,
+        'total_unique_makers': 80 + liquidity / 1e8 + rng.normal(0, 5, len(dates)),
+        'relative_fees_percentage_mean': rng.uniform(0.0001, 0.001, len(dates)),
+        'absolute_fees_satoshis_mean': rng.uniform(500, 1500, len(dates)),
+        'relative_fees_count': rng.integers(50, 100, len(dates)),
+        'absolute_fees_count': rng.integers(10, 30, len(dates)),
+    }, index=dates)
+    df.iloc[::11, 2] = np.nan
+    return df
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_full_correlation_matches_pandas(stats_df):
+    """Test that the streaming matrix equals DataFrame.corr() with pairwise missing values."""
+    expected = stats_df[CORRELATION_METRICS].corr()
+    pd.testing.assert_frame_equal(calculate_correlations(stats_df).result(), expected, atol=1e-12)
+    assert expected.loc['total_liquidity', 'total_unique_makers'] > 0.8
+
+
+def test_incremental_updates_and_merge(stats_df):
+    """Test that chunked updates and merged partial results give the same matrices."""
+    expected = calculate_correlations(stats_df)
+
+    incremental = StreamingCorrelation()
+    for chunk in _chunks(stats_df, 77):
+        incremental.update(chunk)
+    left, right = StreamingCorrelation(), StreamingCorrelation()
+    for position, chunk in enumerate(_chunks(stats_df, 100)):
+        (left if position % 2 else right).update(chunk)
+    merged = left.merge(right)
+
+    for streaming in (incremental, merged):
+        pd.testing.assert_frame_equal(streaming.result(), expected.result(), atol=1e-12)
+        pd.testing.assert_frame_equal(streaming.per_period(), expected.per_period(), atol=1e-12)
+
+
+def test_per_period_and_rolling(stats_df):
+    """Test the per-day and the rolling window matrices against pandas on the same rows."""
+    correlations = calculate_correlations(stats_df)
+    days = stats_df.index.floor('D')
+
+    per_day = correlations.per_period()
+    assert list(per_day.index.get_level_values('timestamp').unique()) == sorted(days.unique())
+    day = pd.Timestamp('2024-01-03')
+    pd.testing.assert_frame_equal(per_day.loc[day], stats_df[days == day].corr(), check_names=False, atol=1e-12)
+
+    rolling = correlations.rolling(3)
+    # Empty days are part of the window, the window ending on the 11th holds the 10th and 11th only
+    assert len(rolling.index.get_level_values('timestamp').unique()) == 20
+    for end in (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-11'), pd.Timestamp('2024-01-20')):
+        window = stats_df[(days > end - pd.Timedelta(days=3)) & (days <= end)]
+        pd.testing.assert_frame_equal(rolling.loc[end], window.corr(), check_names=False, atol=1e-9)
+    assert correlations.rolling(1).loc[pd.Timestamp('2024-01-09')].isna().all().all()
+
+
+def test_constant_and_short_input():
+    """Test that pairs without variance or with a single row are NaN, like in pandas."""
+    values = np.array([[1.0, 2.0], [1.0, 3.0], [1.0, np.nan]])
+    correlation = CoMoments.from_values(values).correlation()
+    assert np.isnan(correlation[0, 1]) and np.isnan(correlation[0, 0])
+    assert correlation[1, 1] == 1.0
+    assert np.isnan(CoMoments.from_values(values[:1]).correlation()).all()
+
+
+def test_calculate_metric_correlations(stats_df):
+    """Test the result exposed next to the market health metrics."""
+    result = calculate_metric_correlations(stats_df, window=7)
+    assert set(result) == {'full', 'per_period', 'rolling'}
+    assert result['full'].shape == (len(CORRELATION_METRICS), len(CORRELATION_METRICS))
+    # Missing days are only part of the rolling matrices
+    assert len(result['per_period']) == 18 * len(CORRELATION_METRICS)
+    assert len(result['rolling']) == 20 * len(CORRELATION_METRICS)
@@ -0,0 +1,147 @@
+import pytest
+import json
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+
+from src.analysis.fees import calculate_fee_statistics, calculate_liquidity_metrics
+from src.dashboard.tiles import TileStore
+from src.dashboard.server import DashboardData, make_handler, ThreadingHTTPServer
+
+
+@pytest.fixture
+def stats():
+    """Ten days of per-minute statistics."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=10 * 1440, freq='min', name='timestamp')
+    return pd.DataFrame({
+        'total_liquidity': rng.uniform(1e9, 2e9, len(index)),
+        'total_unique_makers': rng.integers(80, 120, len(index)),
+    }, index=index)
+
+
+def test_incremental_tiles_match_full_build(stats, tmp_path):
+    """Test that appending in chunks gives the same tiles as a single append."""
+    full = TileStore().append(stats)
+    incremental = TileStore(str(tmp_path))
+    for chunk in np.array_split(np.arange(len(stats)), 7):
+        incremental.append(stats.iloc[chunk])
+    incremental.save()
+
+    reloaded = TileStore(str(tmp_path))
+    for resolution in full.resolutions:
+        pd.testing.assert_frame_equal(reloaded.tiles[resolution], full.tiles[resolution], check_freq=False)
+
+
+def test_query_picks_resolution(stats):
+    """Test that queries use the finest resolution fitting the point budget."""
+    tiles = TileStore().append(stats)
+
+    resolution, bins = tiles.query('total_liquidity', max_points=100)
+    assert resolution == '6h'
+    assert len(bins) == 40
+    assert bins['mean'].iloc[0] == pytest.approx(stats['total_liquidity'].iloc[:360].mean())
+    assert bins['max'].iloc[0] == stats['total_liquidity'].iloc[:360].max()
+
+    resolution, bins = tiles.query('total_liquidity', '2024-01-05', '2024-01-05 02:00', max_points=500)
+    assert resolution == '5min'
+    assert len(bins) == 25
+
+
+def test_totals_match_rows(stats):
+    """Test that the range statistics combined from the tiles equal those of the rows."""
+    tiles = TileStore().append(stats)
+    totals = tiles.totals('2024-01-03', '2024-01-05 23:59')
+    rows = stats.loc['2024-01-03':'2024-01-05', 'total_liquidity']
+    assert totals.at['total_liquidity', 'count'] == len(rows)
+    assert totals.at['total_liquidity', 'mean'] == pytest.approx(rows.mean())
+    assert totals.at['total_liquidity', 'std'] == pytest.approx(rows.std(), rel=1e-6)
+    assert totals.at['total_liquidity', 'max'] == rows.max()
+
+
+@pytest.fixture
+def data_dir(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Create a day of three snapshots."""
+    write_snapshot_files([basic_snapshot_data] * 3, root="data")
+    return tmp_path / "data"
+
+
+def test_refresh_ingests_new_snapshots(data_dir, tmp_path, basic_snapshot_data):
+    """Test that refreshes only ingest new files and survive a restart."""
+    dashboard = DashboardData(str(data_dir), str(tmp_path / "store"))
+    assert dashboard.refresh() == 3
+    assert dashboard.refresh() == 0
+
+    (data_dir / "2024-01-01" / "orderbook_00-10.json").write_text(json.dumps(basic_snapshot_data))
+    restarted = DashboardData(str(data_dir), str(tmp_path / "store"))
+    assert len(restarted.df_stats) == 3
+    assert restarted.refresh() == 1
+    assert restarted.tiles.query('total_offers')[1]['count'].sum() == 4
+
+
+def test_interrupted_refresh_rebuilds_tiles(data_dir, tmp_path, monkeypatch, basic_snapshot_data):
+    """Test that tiles missing the rows of an interrupted refresh are rebuilt on start."""
+    dashboard = DashboardData(str(data_dir), str(tmp_path / "store"))
+    dashboard.refresh()
+
+    (data_dir / "2024-01-01" / "orderbook_00-10.json").write_text(json.dumps(basic_snapshot_data))
+
+    def crash():
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(dashboard.tiles, 'save', crash)
+    with pytest.raises(KeyboardInterrupt):
+        dashboard.refresh()
+
+    restarted = DashboardData(str(data_dir), str(tmp_path / "store"))
+    assert restarted.tiles.rows == len(restarted.df_stats) == 4
+    assert restarted.refresh() == 0
+    assert restarted.tiles.query('total_offers')[1]['count'].sum() == 4
+
+
+def test_summary_is_served_from_tiles(data_dir, tmp_path):
+    """Test that the summary equals the analysis metrics without reading the snapshot rows."""
+    dashboard = DashboardData(str(data_dir), str(tmp_path / "store"))
+    dashboard.refresh()
+    df = dashboard.df_stats
+    fees = calculate_fee_statistics(df)['relative_percentage']
+    liquidity = calculate_liquidity_metrics(df)
+
+    dashboard.df_stats = None
+    summary = dashboard.summary()
+    assert summary['snapshots'] == 3
+    assert summary['fees']['relative_percentage']['mean'] == pytest.approx(fees.mean)
+    assert summary['fees']['relative_percentage']['median'] == pytest.approx(fees.median)
+    assert summary['liquidity']['avg_liquidity'] == pytest.approx(liquidity['avg_liquidity'])
+    assert summary['liquidity']['liquidity_per_maker'] == pytest.approx(liquidity['liquidity_per_maker'])
+    assert dashboard.summary('2025-01-01') == {'snapshots': 0}
+
+
+def test_http_api(data_dir, tmp_path):
+    """Test the JSON endpoints and the page of a running server."""
+    dashboard = DashboardData(str(data_dir), str(tmp_path / "store"))
+    dashboard.refresh()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(dashboard))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        status = json.load(urllib.request.urlopen(f"{url}/api/status"))
+        assert status['snapshots'] == 3
+        assert 'total_liquidity' in status['metrics']
+
+        series = json.load(urllib.request.urlopen(
+            f"{url}/api/series?metric=total_offers&start={status['start']}&end={status['end']}"))
+        assert series['resolution'] == '5min'
+        assert series['mean'] == [2.0]
+
+        summary = json.load(urllib.request.urlopen(f"{url}/api/summary"))
+        assert summary['snapshots'] == 3
+        assert summary['liquidity']['avg_liquidity'] > 0
+
+        assert b'<canvas' in urllib.request.urlopen(url).read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/api/series?metric=unknown")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+import pytest
+import copy
+from datetime import datetime
+
+from src.analysis.diff import (
+    diff_snapshots,
+    iter_offer_events,
+    iter_cached_offer_events,
+    summarize_offer_events,
+    events_to_dataframe
+)
+from src.preprocessing.cache import build_snapshot_cache
+
+
+def _changed(snapshot):
+    """Later version of a snapshot: one fee change, one size and bond change, one removal, one addition."""
+    changed = copy.deepcopy(snapshot)
+    offers = changed['offers']
+    offers[0]['cjfee'] = "0.00002"
+    offers[1]['maxsize'] += 1000
+    offers[1]['fidelity_bond_value'] = 5.0
+    removed = offers.pop(2)
+    offers.append({**removed, 'oid': 7})
+    return changed
+
+
+def _key(event):
+    return event.kind, event.counterparty, event.oid
+
+
+def test_diff_snapshots(extended_snapshot_data):
+    """Test the typed events between two snapshots."""
+    after = _changed(extended_snapshot_data)
+    events = sorted(diff_snapshots(extended_snapshot_data, after, datetime(2024, 1, 1)), key=_key)
+
+    offers = extended_snapshot_data['offers']
+    assert [_key(event) for event in events] == sorted([
+        ('fee_changed', offers[0]['counterparty'], 0),
+        ('size_changed', offers[1]['counterparty'], 0),
+        ('bond_changed', offers[1]['counterparty'], 0),
+        ('offer_removed', offers[2]['counterparty'], 0),
+        ('offer_added', offers[2]['counterparty'], 7),
+    ])
+    fee = next(event for event in events if event.kind == 'fee_changed')
+    assert fee.before == {'cjfee': 0.000003} and fee.after == {'cjfee': 0.00002}
+    size = next(event for event in events if event.kind == 'size_changed')
+    assert size.after == {'maxsize': offers[1]['maxsize'] + 1000}
+    assert all(event.timestamp == datetime(2024, 1, 1) for event in events)
+
+
+def test_equal_fee_notation_is_no_change(basic_snapshot_data):
+    """Test that differently formatted but equal fees are not reported."""
+    after = copy.deepcopy(basic_snapshot_data)
+    after['offers'][0]['cjfee'] = "0.0000090"
+    assert diff_snapshots(basic_snapshot_data, after) == []
+
+
+@pytest.fixture
+def event_files(write_snapshot_files, extended_snapshot_data):
+    """Three snapshots, the middle one changed and the last one corrupt, then one back to the original."""
+    return write_snapshot_files([extended_snapshot_data, _changed(extended_snapshot_data), "{", extended_snapshot_data],
+                                root="data")
+
+
+def test_event_stream(event_files):
+    """Test streaming events over a range of files, skipping corrupt ones."""
+    events = list(iter_offer_events(event_files))
+    assert len(events) == 10
+    assert {event.timestamp for event in events} == {datetime(2024, 1, 1, 0, 1), datetime(2024, 1, 1, 0, 3)}
+
+    summary = summarize_offer_events(events)
+    assert summary['total'].sum() == 10
+    assert summary.columns.tolist()[-1] == 'total'
+    assert len(events_to_dataframe(events)) == 10
+
+
+def test_cached_event_stream_matches_files(tmp_path, event_files):
+    """Test that the sorted-merge diff of cached snapshots gives the same events."""
+    cache = build_snapshot_cache(event_files, str(tmp_path / "cache"))
+    expected = sorted(iter_offer_events(event_files), key=lambda event: (event.timestamp, _key(event)))
+    cached = sorted(iter_cached_offer_events(cache), key=lambda event: (event.timestamp, _key(event)))
+    assert cached == expected
+
+    assert len(list(iter_cached_offer_events(cache, '2024-01-01 00:01'))) == 5
+
+
+def test_unchanged_malformed_fee_is_no_change(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Test that an offer whose cjfee stays malformed gives no events, from files or from the cache."""
+    data = copy.deepcopy(basic_snapshot_data)
+    data['offers'][0]['cjfee'] = "bad"
+    filepaths = write_snapshot_files([data] * 3, root="data")
+
+    cache = build_snapshot_cache(filepaths, str(tmp_path / "cache"))
+    assert list(iter_offer_events(filepaths)) == []
+    assert list(iter_cached_offer_events(cache)) == []
+
+
+def test_unchanged_nan_fee_is_no_change(basic_snapshot_data):
+    """Test that a 'NaN' cjfee compared with itself is not reported."""
+    data = copy.deepcopy(basic_snapshot_data)
+    data['offers'][0]['cjfee'] = "NaN"
+    assert diff_snapshots(data, copy.deepcopy(data)) == []
+
+
+def test_malformed_fee_values_match(tmp_path, write_snapshot_files, basic_snapshot_data):
+    """Test that a malformed cjfee is reported as the same value from files and from the cache."""
+    changed = copy.deepcopy(basic_snapshot_data)
+    changed['offers'][0]['cjfee'] = "bad"
+    filepaths = write_snapshot_files([basic_snapshot_data, changed], root="data")
+
+    cache = build_snapshot_cache(filepaths, str(tmp_path / "cache"))
+    events = list(iter_offer_events(filepaths))
+    cached = list(iter_cached_offer_events(cache))
+    assert [event.kind for event in events] == ['fee_changed']
+    assert events[0].after['cjfee'] != events[0].after['cjfee']  # NaN
+    assert cached[0].after['cjfee'] != cached[0].after['cjfee']
+    assert cached[0].before == events[0].before
+
+
+def test_duplicate_keys_match(tmp_path, write_snapshot_files, extended_snapshot_data):
+    """Test that duplicated (counterparty, oid) keys are diffed alike from files and from the cache, the last one winning."""
+    first = copy.deepcopy(extended_snapshot_data)
+    first['offers'].append({**first['offers'][0], 'cjfee': "0.5"})
+    second = _changed(first)
+    second['offers'].insert(0, {**second['offers'][1], 'maxsize': 1})
+    filepaths = write_snapshot_files([first, second, first], root="data")
+
+    cache = build_snapshot_cache(filepaths, str(tmp_path / "cache"))
+    expected = sorted(iter_offer_events(filepaths), key=lambda event: (event.timestamp, _key(event)))
+    cached = sorted(iter_cached_offer_events(cache), key=lambda event: (event.timestamp, _key(event)))
+    assert cached == expected
+    assert not any(event.kind in ('offer_added', 'offer_removed') and event.oid == 0
+                   and event.counterparty == first['offers'][0]['counterparty'] for event in expected)
@@ -0,0 +1,50 @@
+import pytest
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Import-time budget of the parsing/statistics core loaded by every ingestion worker,
+# importing pandas alone takes about 0.3s
+CORE_IMPORT_BUDGET = 0.2
+
+CORE_MODULES = [
+    'src.preprocessing.snapshot',
+    'src.preprocessing.utils',
+    'src.preprocessing.validation',
+    'src.preprocessing.archive',
+    'src.preprocessing.instrumentation',
+]
+
+
+def _import_in_subprocess(modules):
+    """Import modules in a fresh interpreter, returning the import time and the heavy modules loaded."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {modules!r}: __import__(name)\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('pandas', 'numpy', 'matplotlib', 'seaborn') if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return float(output[0]), output[1].split(',') if len(output) > 1 else []
+
+
+def test_core_import_budget():
+    """Test that the worker-side core imports fast and without heavy libraries."""
+    elapsed, heavy = min((_import_in_subprocess(CORE_MODULES) for _ in range(3)), key=lambda r: r[0])
+
+    assert heavy == []
+    assert elapsed < CORE_IMPORT_BUDGET
+
+
+@pytest.mark.parametrize("module", ['src.visualisations.fees', 'src.visualisations.plot'])
+def test_plotting_libraries_load_lazily(module):
+    """Test that importing the plotting modules does not load matplotlib or seaborn."""
+    _, heavy = _import_in_subprocess([module])
+
+    assert 'matplotlib' not in heavy
+    assert 'seaborn' not in heavy
@@ -0,0 +1,51 @@
+import pytest
+import json
+import pstats
+
+from src.preprocessing.instrumentation import PipelineProfiler, NULL_PROFILER
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_stage_timers_and_counters(snapshot_files, workers):
+    """Test that an instrumented run records stages and counters."""
+    profiler = PipelineProfiler(log_interval=None)
+    load_snapshots_to_dataframe(snapshot_files, workers=workers, profiler=profiler)
+
+    summary = profiler.summary()
+    assert summary['counters']['files'] == 8
+    assert summary['counters']['errors'] == 1
+    assert summary['counters']['offers'] == 17
+    assert summary['counters']['bytes'] > 0
+    for stage in ('read', 'decode', 'validate', 'process_offers', 'compute_statistics', 'dataframe'):
+        assert stage in summary['stages']
+    assert summary['stages']['decode']['calls'] == 8
+    assert summary['elapsed_seconds'] > 0
+
+
+def test_progress_log(snapshot_files, capsys):
+    """Test the periodic progress log."""
+    profiler = PipelineProfiler(log_interval=0)
+    load_snapshots_to_dataframe(snapshot_files, profiler=profiler)
+
+    output = capsys.readouterr().out
+    assert "[ingest] 8/8 files (100.0%)" in output
+
+
+def test_summary_export(snapshot_files, tmp_path):
+    """Test the JSON and pstats export."""
+    profiler = PipelineProfiler(log_interval=None, cprofile=True)
+    load_snapshots_to_dataframe(snapshot_files, profiler=profiler)
+    profiler.export(str(tmp_path / "summary.json"), str(tmp_path / "profile.pstats"))
+
+    with open(tmp_path / "summary.json") as f:
+        assert json.load(f)['counters']['files'] == 8
+    assert pstats.Stats(str(tmp_path / "profile.pstats")).total_calls > 0
+
+
+def test_disabled_profiler_is_noop():
+    """Test that the default profiler records nothing."""
+    with NULL_PROFILER.stage('decode'):
+        NULL_PROFILER.count('files')
+    assert NULL_PROFILER.summary()['counters'] == {}
+    assert NULL_PROFILER.summary()['stages'] == {}
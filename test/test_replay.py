@@ -0,0 +1,101 @@
+import pytest
+from datetime import datetime, timezone
+
+from irc_watcher.records import make_record, format_record, parse_record
+from irc_watcher.replay import ChatLogIndex, OrderbookState, iter_records, replay_snapshots, replay_to_records
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _offer(oid, ordertype='sw0reloffer', cjfee='0.0002'):
+    return f"!{ordertype} {oid} 100000 5000000 0 {cjfee}"
+
+
+def _write_log(path, records):
+    with open(path, 'w', encoding='utf-8') as file:
+        for record in records:
+            file.write(format_record(record) + '\n')
+    return str(path)
+
+
+def test_parse_record_legacy_line():
+    """Test that plain 'nick: message' lines are read as untimed public messages."""
+    assert parse_record("J5maker: !orderbook\n") == {'ts': None, 'type': 'pubmsg', 'nick': 'J5maker',
+                                                     'msg': '!orderbook'}
+    assert parse_record("\n") is None
+    record = make_record('nick', 'J5old', timestamp=T0, new_nick='J5new')
+    assert parse_record(format_record(record)) == record
+
+
+def test_orderbook_state_messages():
+    """Test offer announcements, multi-line messages, cancels, nick changes and quits."""
+    state = OrderbookState()
+    state.apply(make_record('privmsg', 'J5a', _offer(0) + ' ;', T0))
+    assert state.offers == {}
+    state.apply(make_record('privmsg', 'J5a', _offer(1, 'sw0absoffer', '500') + ' ~', T0))
+    state.apply(make_record('pubmsg', 'J5b', _offer(0) + _offer(1) + ' ~', T0))
+    assert sorted(state.offers) == [('J5a', 0), ('J5a', 1), ('J5b', 0), ('J5b', 1)]
+    assert state.offers[('J5a', 1)]['cjfee'] == '500'
+
+    state.apply(make_record('pubmsg', 'J5b', '!cancel 1 ~', T0))
+    state.apply(make_record('nick', 'J5a', timestamp=T0, new_nick='J5c'))
+    assert sorted(state.offers) == [('J5b', 0), ('J5c', 0), ('J5c', 1)]
+    assert state.offers[('J5c', 0)]['counterparty'] == 'J5c'
+
+    state.apply(make_record('quit', 'J5c', timestamp=T0))
+    assert sorted(state.offers) == [('J5b', 0)]
+    assert len(state.snapshot()['offers']) == 1
+
+
+@pytest.fixture
+def chat_log(tmp_path):
+    """Two makers announcing offers for two hours, one leaving after an hour."""
+    records = []
+    for minute in range(120):
+        ts = T0 + minute * 60 + 5
+        records.append(make_record('privmsg', 'J5a', _offer(0) + ' ~', ts))
+        if minute < 60:
+            records.append(make_record('privmsg', 'J5b', _offer(0, 'sw0absoffer', '1000') + ' ~', ts + 1))
+        elif minute == 60:
+            records.append(make_record('part', 'J5b', timestamp=ts + 1))
+    return _write_log(tmp_path / 'chat.log', records)
+
+
+def test_replay_to_records(chat_log):
+    """Test that replayed snapshots go through the snapshot processing path."""
+    records = replay_to_records(chat_log)
+    assert len(records) == 119
+    assert records[0]['timestamp'] == datetime(2024, 1, 1, 0, 1)
+    assert records[0]['total_unique_makers'] == 2
+    assert records[0]['total_offers'] == 2
+    assert records[-1]['total_unique_makers'] == 1
+    assert records[0]['anomaly_total'] == 0
+
+
+def test_index_seek_matches_full_scan(chat_log):
+    """Test that seeking through the sidecar index gives the records of a full scan."""
+    index = ChatLogIndex(chat_log)
+    assert index.update() == 120
+    assert index.update() == 0
+    # Reloaded from disk
+    index = ChatLogIndex(chat_log)
+    assert len(index.times) == 120
+
+    start, end = datetime(2024, 1, 1, 0, 30), datetime(2024, 1, 1, 1, 10)
+    assert list(iter_records(chat_log, start, end, index)) == list(iter_records(chat_log, start, end))
+
+    seeked = list(replay_snapshots(chat_log, start=start, end=end, warmup=600, index=index))
+    full = [(timestamp, snapshot) for timestamp, snapshot in replay_snapshots(chat_log)
+            if start <= timestamp < end]
+    assert [timestamp for timestamp, _ in seeked] == [timestamp for timestamp, _ in full]
+    assert seeked == full
+
+
+def test_index_update_appended_records(chat_log):
+    """Test that records appended to the log are indexed incrementally."""
+    index = ChatLogIndex(chat_log, step=3600)
+    assert index.update() == 2
+    with open(chat_log, 'a', encoding='utf-8') as file:
+        file.write(format_record(make_record('join', 'J5d', timestamp=T0 + 3 * 3600)) + '\n')
+    assert index.update() == 1
+    assert index.offset_at(T0 + 3 * 3600) > index.offset_at(T0 + 2 * 3600) > 0
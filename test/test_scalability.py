@@ -0,0 +1,120 @@
+import pytest
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+from src.preprocessing.cache import build_snapshot_cache
+from src.analysis.churn import maker_presence_from_cache, analyze_maker_churn
+from src.analysis.changepoints import rolling_zscore_anomalies, detect_liquidity_events
+from src.analysis.fees import calculate_market_health_metrics
+from src.analysis.seasonality import calculate_seasonality
+from test.synthetic import write_synthetic_archive
+
+# Growth factor between the small and the large inputs
+GROWTH = 4
+# Allowed time ratio between the large and the small input, linear scaling plus noise
+MAX_TIME_RATIO = 2 * GROWTH
+# Generous absolute budgets, an order of magnitude above the measured cost
+INGEST_SECONDS_PER_OFFER = 50e-6
+INGEST_BYTES_PER_SNAPSHOT = 20_000
+ROLLING_SECONDS_PER_MILLION_ROWS = 2.0
+
+
+def _best_time(function, repeat: int = 2) -> float:
+    """Best wall time of a few runs, so one-off stalls do not fail the budget."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _peak_memory(function) -> int:
+    """Peak Python heap allocation in bytes while running a function."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope='module')
+def archives(tmp_path_factory):
+    """A small archive and two grown by GROWTH in the number of days and in the number of makers."""
+    root = tmp_path_factory.mktemp('synthetic')
+    return {
+        'small': write_synthetic_archive(str(root / 'small'), days=3, makers=40),
+        'days': write_synthetic_archive(str(root / 'days'), days=3 * GROWTH, makers=40),
+        'makers': write_synthetic_archive(str(root / 'makers'), days=3, makers=40 * GROWTH),
+    }
+
+
+def test_synthetic_archive(archives):
+    """Test that the generated archive is ingestible and has churn, fee drift and bonds."""
+    df = load_snapshots_to_dataframe(archives['days'])
+    assert len(df) == len(archives['days']) == 12 * 24
+    assert df['total_unique_makers'].between(30, 40).all()
+    assert df['total_fidelity_bonds'].mean() > 5
+    assert df['relative_fees_percentage_mean'].std() > 0
+    assert df['anomaly_total'].sum() == 0
+
+
+@pytest.mark.parametrize("grown", ['days', 'makers'])
+def test_ingestion_scales_linearly(archives, grown):
+    """Test ingestion time and memory as the number of files or offers grows."""
+    small = _best_time(lambda: load_snapshots_to_dataframe(archives['small']))
+    large = _best_time(lambda: load_snapshots_to_dataframe(archives[grown]))
+    assert large < MAX_TIME_RATIO * small + 0.05
+
+    df = load_snapshots_to_dataframe(archives[grown])
+    assert large < INGEST_SECONDS_PER_OFFER * df['total_offers'].sum()
+
+    # Offers are never retained, memory grows with the number of snapshots only
+    peak = _peak_memory(lambda: load_snapshots_to_dataframe(archives[grown]))
+    assert peak < INGEST_BYTES_PER_SNAPSHOT * len(archives[grown])
+
+
+def test_lifetime_analysis_scales_linearly(archives, tmp_path):
+    """Test the cache build and the churn/lifetime analysis as the archive grows."""
+    def analyze(name):
+        cache = build_snapshot_cache(archives[name], str(tmp_path / name))
+        return analyze_maker_churn(maker_presence_from_cache(cache))
+
+    small = _best_time(lambda: analyze('small'))
+    large = _best_time(lambda: analyze('days'))
+    assert large < MAX_TIME_RATIO * small + 0.05
+
+    analysis = analyze('days')
+    assert analysis.churn['arrivals'].iloc[1:].sum() > 0
+    assert analysis.survival['survival'].is_monotonic_decreasing
+
+
+def _per_minute_stats(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'total_liquidity': 1e9 + rng.normal(0, 1e7, n),
+        'total_unique_makers': 100 + rng.normal(0, 3, n),
+        'relative_fees_percentage_mean': 0.002 + rng.normal(0, 1e-5, n),
+        'absolute_fees_satoshis_mean': 1000 + rng.normal(0, 10, n),
+    }, index=pd.date_range('2022-01-01', periods=n, freq='min', name='timestamp'))
+
+
+@pytest.mark.parametrize("analysis", [
+    calculate_market_health_metrics,
+    lambda df: rolling_zscore_anomalies(df['total_liquidity']),
+    detect_liquidity_events,
+    calculate_seasonality,
+], ids=['market_health', 'rolling_zscore', 'liquidity_events', 'seasonality'])
+def test_rolling_analysis_scales_linearly(analysis):
+    """Test the rolling analyses on up to two years of per-minute statistics."""
+    small_df = _per_minute_stats(250_000)
+    large_df = _per_minute_stats(250_000 * GROWTH)
+
+    small = _best_time(lambda: analysis(small_df))
+    large = _best_time(lambda: analysis(large_df))
+    assert large < MAX_TIME_RATIO * small + 0.05
+    assert large < ROLLING_SECONDS_PER_MILLION_ROWS * len(large_df) / 1e6
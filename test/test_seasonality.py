@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.analysis.seasonality import calculate_seasonality, cached_seasonality, data_version
+
+
+@pytest.fixture
+def seasonal_stats():
+    """Four weeks of per-5-minute statistics with a daily maker cycle and a weekend liquidity dip."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=4 * 7 * 288, freq='5min')
+    hours = index.hour.to_numpy()
+    weekend = index.dayofweek.to_numpy() >= 5
+    trend = np.linspace(0, 10, len(index))
+    return pd.DataFrame({
+        'total_unique_makers': 100 + 10 * np.sin(2 * np.pi * hours / 24) + trend + rng.normal(0, 1, len(index)),
+        'total_liquidity': 1e9 - 2e8 * weekend + rng.normal(0, 1e7, len(index)),
+        'relative_fees_percentage_mean': 0.002 + rng.normal(0, 1e-5, len(index)),
+    }, index=index)
+
+
+def test_profile_recovers_cycles(seasonal_stats):
+    """Test the hour x weekday profile and its confidence intervals."""
+    original = seasonal_stats.copy()
+    result = calculate_seasonality(seasonal_stats)
+
+    pd.testing.assert_frame_equal(seasonal_stats, original)
+    profile = result.profile
+    assert profile.shape[0] == 168
+    assert (profile[('total_unique_makers', 'count')] == 4).all()
+
+    makers = profile['total_unique_makers']['mean'].groupby(level='hour').mean()
+    assert makers.idxmax() == 6
+    assert makers.idxmin() == 18
+
+    liquidity = profile['total_liquidity']['mean'].groupby(level='day_of_week').mean()
+    assert liquidity[5] < liquidity[4] - 1.5e8
+
+    ci = profile['total_liquidity']
+    assert (ci['ci_low'] < ci['mean']).all() and (ci['mean'] < ci['ci_high']).all()
+
+
+def test_decomposition(seasonal_stats):
+    """Test that the weekly decomposition separates trend and seasonal components."""
+    result = calculate_seasonality(seasonal_stats)
+    assert result.period == 168
+
+    makers = result.decomposition['total_unique_makers']
+    pd.testing.assert_series_equal(makers['trend'] + makers['seasonal'] + makers['resid'],
+                                   makers['observed'], check_names=False)
+    # Away from the edges the trend follows the linear drift
+    inner = makers['trend'].iloc[168:-168]
+    assert inner.iloc[-1] - inner.iloc[0] == pytest.approx(10 * len(inner) / len(makers), rel=0.1)
+    assert result.strength['total_unique_makers'] > 0.9
+    assert result.strength['relative_fees_percentage_mean'] < 0.3
+
+
+def test_short_data_uses_daily_period(seasonal_stats):
+    """Test the fallback to a daily period for less than two weeks of data."""
+    result = calculate_seasonality(seasonal_stats.loc[:'2024-01-05'])
+    assert result.period == 24
+    assert result.profile[('total_liquidity', 'count')].loc[6].sum() == 0
+
+
+def test_cached_seasonality(tmp_path, seasonal_stats, monkeypatch):
+    """Test that results are reused until the data changes."""
+    first = cached_seasonality(seasonal_stats, str(tmp_path))
+    assert first.data_version == data_version(seasonal_stats)
+
+    import src.analysis.seasonality as seasonality
+    monkeypatch.setattr(seasonality, 'calculate_seasonality', lambda *args: pytest.fail("not cached"))
+    cached = cached_seasonality(seasonal_stats, str(tmp_path))
+    pd.testing.assert_frame_equal(cached.profile, first.profile)
+
+    changed = seasonal_stats.copy()
+    changed.iloc[0, 0] += 1
+    assert data_version(changed) != first.data_version
+    with pytest.raises(pytest.fail.Exception):
+        cached_seasonality(changed, str(tmp_path))
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from src.preprocessing import shared
+from src.preprocessing.shared import SharedResultTable, ResultTableWriter, INT, FLOAT, DATETIME
+from src.preprocessing.snapshot import process_snapshot_data, SNAPSHOT_RECORD_COLUMNS
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+
+
+def test_record_columns_match_snapshot_record(basic_snapshot_data):
+    """Test that the shared table schema covers every column of a snapshot record."""
+    record = process_snapshot_data(basic_snapshot_data, datetime(2024, 1, 1))
+    assert [name for name, _ in SNAPSHOT_RECORD_COLUMNS] == list(record)
+
+
+def test_shared_table_roundtrip(tmp_path):
+    """Test writing rows out of order and dropping the unwritten ones."""
+    table = SharedResultTable([('timestamp', DATETIME), ('count', INT), ('value', FLOAT)], 3,
+                              directory=str(tmp_path))
+    with ResultTableWriter(table.spec) as writer:
+        writer.write(2, {'timestamp': datetime(2024, 1, 1, 0, 2), 'count': 2, 'value': 0.5})
+        writer.write(0, {'timestamp': datetime(2024, 1, 1, 0, 0), 'count': 7, 'value': None})
+
+    df = table.to_dataframe()
+    assert list(df.index) == [pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 00:02')]
+    assert df['count'].tolist() == [7, 2]
+    assert df['value'].iloc[1] == 0.5
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_shared_table_is_not_copied(tmp_path):
+    """Test that the DataFrame wraps the mapped columns."""
+    table = SharedResultTable([('timestamp', DATETIME), ('value', FLOAT)], 2, directory=str(tmp_path))
+    with ResultTableWriter(table.spec) as writer:
+        for row in range(2):
+            writer.write(row, {'timestamp': datetime(2024, 1, 1, 0, row), 'value': float(row)})
+    df = table.to_dataframe()
+
+    def mapped(array):
+        while array is not None and not isinstance(array, np.memmap):
+            array = array.base
+        return array is not None
+
+    assert mapped(df['value'].values)
+    assert mapped(df.index.values)
+    assert df['value'].tolist() == [0.0, 1.0]
+
+
+def test_parallel_matches_serial(snapshot_files):
+    """Test that the shared table path produces the same DataFrame as the serial path."""
+    serial_quarantine, parallel_quarantine = [], []
+    df_serial = load_snapshots_to_dataframe(snapshot_files, serial_quarantine, workers=1)
+    df_parallel = load_snapshots_to_dataframe(snapshot_files, parallel_quarantine, workers=2)
+
+    assert len(df_parallel) == len(snapshot_files) - 1
+    assert sorted(parallel_quarantine) == sorted(serial_quarantine)
+    pd.testing.assert_frame_equal(df_parallel, df_serial)
+
+
+def test_small_dev_shm_falls_back_to_temp_dir(monkeypatch, tmp_path):
+    """Test that a table larger than the free shared memory is placed in the temp directory."""
+    class SmallShm:
+        f_bavail, f_frsize = 16, 4096  # 64 kB free
+
+    monkeypatch.setattr(shared.os, 'statvfs', lambda path: SmallShm, raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    assert shared._default_directory(1024) == '/dev/shm'
+
+    table = SharedResultTable([('value', INT)], 100_000)
+    try:
+        assert os.path.dirname(table.spec.path) == str(tmp_path)
+    finally:
+        table.close()
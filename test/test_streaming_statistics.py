@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.analysis.fees import calculate_fee_statistics, calculate_time_based_statistics
+from src.analysis.streaming import (
+    RunningMoments,
+    KllSketch,
+    StreamingFeeStatistics,
+    StreamingTimeStatistics,
+    calculate_fee_statistics_chunked,
+    calculate_time_based_statistics_chunked
+)
+
+
+@pytest.fixture
+def stats_df():
+    """Create a df_stats-like frame with a gap of empty days."""
+    dates = pd.date_range(start='2024-01-01', end='2024-01-10', freq='15min')
+    dates = dates[(dates < '2024-01-04') | (dates >= '2024-01-06')]
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'relative_fees_percentage_mean': rng.uniform(0.0001, 0.001, len(dates)),
+        'relative_fees_percentage_median': rng.uniform(0.0001, 0.001, len(dates)),
+        'absolute_fees_satoshis_mean': rng.uniform(500, 1500, len(dates)),
+        'absolute_fees_satoshis_median': rng.uniform(500, 1500, len(dates)),
+        'total_liquidity': rng.integers(10 ** 9, 10 ** 10, len(dates)),
+        'total_unique_makers': rng.integers(50, 120, len(dates)),
+    }, index=dates)
+    df.iloc[5, 0] = np.nan
+    return df
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_running_moments_merge_exactly():
+    """Test that merged moments equal the moments of the full data."""
+    values = np.random.default_rng(0).normal(10, 3, 1001)
+    merged = RunningMoments()
+    for part in np.array_split(values, 7):
+        merged.merge(RunningMoments().update(part))
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.std == pytest.approx(values.std(ddof=1))
+    assert merged.min == values.min() and merged.max == values.max()
+
+
+def test_kll_sketch_rank_error():
+    """Test that sketch quantiles stay within the stated rank error."""
+    values = np.random.default_rng(0).lognormal(size=200_000)
+    sketches = [KllSketch(k=200, seed=i).update(part) for i, part in enumerate(np.array_split(values, 4))]
+    sketch = sketches[0]
+    for other in sketches[1:]:
+        sketch.merge(other)
+
+    assert sum(len(level) for level in sketch.levels) < 2000
+    sorted_values = np.sort(values)
+    for q in (0.25, 0.75, 0.95):
+        rank = np.searchsorted(sorted_values, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) < 0.017
+
+
+def test_fee_statistics_chunked_match(stats_df):
+    """Test chunked fee statistics against the in-memory version."""
+    expected = calculate_fee_statistics(stats_df)
+    result = calculate_fee_statistics_chunked(_chunks(stats_df, 100))
+
+    for key, stats in expected.items():
+        assert result[key].mean == pytest.approx(stats.mean)
+        assert result[key].median == pytest.approx(stats.median)
+        assert result[key].std == pytest.approx(stats.std)
+        assert result[key].min == stats.min and result[key].max == stats.max
+        for q, value in stats.percentiles.items():
+            assert result[key].percentiles[q] == pytest.approx(value, rel=0.05)
+
+
+def test_fee_statistics_merge_across_processes(stats_df):
+    """Test that partial results of separate workers merge."""
+    left = StreamingFeeStatistics().update(stats_df.iloc[:300])
+    right = StreamingFeeStatistics().update(stats_df.iloc[300:])
+    merged = left.merge(right).result()
+
+    assert merged['absolute_satoshis'].mean == pytest.approx(stats_df['absolute_fees_satoshis_mean'].mean())
+
+
+def test_time_based_statistics_chunked_match(stats_df):
+    """Test chunked period statistics, including empty periods and overlapping chunks."""
+    expected = calculate_time_based_statistics(stats_df, freq='D')
+    result = calculate_time_based_statistics_chunked(_chunks(stats_df, 77), freq='D')
+
+    pd.testing.assert_index_equal(result.columns, expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_names=False)
+
+
+def test_time_based_statistics_merge(stats_df):
+    """Test merging period statistics computed by separate workers."""
+    left = StreamingTimeStatistics('W').update(stats_df.iloc[::2])
+    right = StreamingTimeStatistics('W').update(stats_df.iloc[1::2])
+
+    expected = calculate_time_based_statistics(stats_df, freq='W')
+    pd.testing.assert_frame_equal(left.merge(right).result(), expected, check_dtype=False, check_names=False)
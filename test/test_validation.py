@@ -0,0 +1,93 @@
+import pytest
+import json
+import pandas as pd
+
+from src.preprocessing.validation import (
+    validate_snapshot,
+    flatten_anomalies,
+    summarize_quarantine,
+    SnapshotValidationError,
+    ANOMALY_KINDS
+)
+from src.preprocessing.snapshot import process_snapshot_data
+from src.preprocessing.dataframe import load_snapshots_to_dataframe
+
+
+def test_clean_snapshot_has_no_anomalies(extended_snapshot_data):
+    """Test that real-world data passes validation untouched."""
+    offers, bonds, anomalies = validate_snapshot(extended_snapshot_data)
+
+    assert offers is extended_snapshot_data['offers']
+    assert bonds is extended_snapshot_data['fidelitybonds']
+    assert sum(anomalies.values()) == 0
+
+
+def test_anomalies_are_classified(basic_snapshot_data):
+    """Test counting of each anomaly kind."""
+    offers = basic_snapshot_data['offers']
+    offers.append({"counterparty": "J5bad", "oid": 0, "ordertype": "sw0reloffer",
+                   "minsize": 10, "maxsize": 5, "cjfee": "abc"})
+    offers.append({"counterparty": "J5neg", "oid": 1, "ordertype": "sw0reloffer",
+                   "minsize": 10, "maxsize": 50, "cjfee": "2.5"})
+    offers.append({"counterparty": "J5str", "ordertype": "weird",
+                   "minsize": "10", "maxsize": 50, "cjfee": "1"})
+    basic_snapshot_data['fidelitybonds'].append({"bond_value": "lots"})
+
+    offers_ok, bonds_ok, anomalies = validate_snapshot(basic_snapshot_data)
+
+    assert anomalies['size_order'] == 1
+    assert anomalies['malformed_cjfee'] == 1
+    assert anomalies['fee_out_of_range'] == 1
+    assert anomalies['missing_field'] == 1
+    assert anomalies['unknown_ordertype'] == 1
+    assert anomalies['invalid_size'] == 1
+    assert anomalies['malformed_bond'] == 1
+
+    # The offer with a string minsize cannot be aggregated and is dropped
+    assert len(offers_ok) == len(offers) - 1
+    assert all(offer['counterparty'] != 'J5str' for offer in offers_ok)
+    assert bonds_ok == []
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"offers": {}},
+    {"offers": [], "fidelitybonds": None},
+    {"offers": ["not an offer"]},
+])
+def test_structural_errors_raise(data):
+    """Test that structurally corrupt snapshots are rejected."""
+    with pytest.raises(SnapshotValidationError):
+        validate_snapshot(data)
+
+
+def test_anomaly_columns_in_output(basic_snapshot_data):
+    """Test that anomaly counts are exposed as flat columns."""
+    basic_snapshot_data['offers'][0]['cjfee'] = None
+    result = process_snapshot_data(basic_snapshot_data, pd.Timestamp('2024-01-01'))
+
+    for kind in ANOMALY_KINDS:
+        assert f'anomaly_{kind}' in result
+    assert result['anomaly_malformed_cjfee'] == 1
+    assert result['anomaly_total'] == 1
+    assert flatten_anomalies({})['anomaly_total'] == 0
+
+
+def test_corrupt_files_are_quarantined(tmp_path, basic_snapshot_data):
+    """Test that corrupt files do not abort a batch run."""
+    day_dir = tmp_path / "2024-01-01"
+    day_dir.mkdir()
+    good = day_dir / "orderbook_12-00.json"
+    good.write_text(json.dumps(basic_snapshot_data))
+    truncated = day_dir / "orderbook_12-01.json"
+    truncated.write_text(json.dumps(basic_snapshot_data)[:40])
+    wrong_schema = day_dir / "orderbook_12-02.json"
+    wrong_schema.write_text(json.dumps({"offers": "nope"}))
+
+    quarantine = []
+    df = load_snapshots_to_dataframe([str(good), str(truncated), str(wrong_schema)], quarantine)
+
+    assert len(df) == 1
+    assert [path for path, _ in quarantine] == [str(truncated), str(wrong_schema)]
+    assert summarize_quarantine(quarantine) == {'JSONDecodeError': 1, 'SnapshotValidationError': 1}
+    assert df['anomaly_total'].iloc[0] == 0